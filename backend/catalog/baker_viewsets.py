@@ -2,6 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from utils.pagination import ProductCursorPagination
 from .models import Category, Product, ProductVariant, ProductImage
 from .serializers import (CategorySerializer, ProductSerializer, BakerProductSerializer,
                          ProductVariantSerializer, ProductImageSerializer)
@@ -14,9 +15,10 @@ class IsBaker(IsAuthenticated):
 class BakerProductViewSet(viewsets.ModelViewSet):
     """Baker-only product management"""
     permission_classes = [IsBaker]
-    queryset = Product.objects.all().prefetch_related('variants', 'images')
+    queryset = Product.objects.all().select_related('category').prefetch_related('variants', 'images')
     serializer_class = BakerProductSerializer
     ordering = ['-id']
+    pagination_class = ProductCursorPagination
     
     @action(detail=True, methods=['post'], url_path='variants')
     def add_variant(self, request, pk=None):
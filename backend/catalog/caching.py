@@ -0,0 +1,94 @@
+import hashlib
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from utils.cache import cache_response, get_or_build
+from .models import CatalogVersion, CakeBase, CakeFlavour, CakeShape, CakeWeight
+
+# Cached catalog responses; rotated together with CatalogVersion
+CATALOG_NAMESPACE = 'catalog'
+
+def catalog_version(request):
+    """CatalogVersion.current(), read once per request so the cache key and the ETag agree"""
+    if not hasattr(request, '_catalog_version'):
+        request._catalog_version = CatalogVersion.current()
+    return request._catalog_version
+
+class CatalogETagMixin:
+    """
+    Conditional, cached GETs for public catalog viewsets.
+    The ETag and the cache key are derived from the catalog version, so an
+    unchanged client gets a 304 after a single version lookup, repeated
+    reads are served from the cache after that same lookup, and a write
+    handled by any worker retires every worker's cached responses.
+    """
+
+    @cache_response(CATALOG_NAMESPACE, version=catalog_version)
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    @cache_response(CATALOG_NAMESPACE, version=catalog_version)
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_catalog_etag(self, request):
+        version = catalog_version(request)
+        key = f"{request.accepted_renderer.format}:{request.get_full_path()}"
+        digest = hashlib.md5(key.encode()).hexdigest()[:16]
+        return f'"catalog-v{version}-{digest}"'
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_catalog_etag(request)
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+
+        if etag in if_none_match or '*' in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            patch_cache_control(response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE)
+        return response
+
+
+CUSTOM_CAKE_NAMESPACE = 'catalog:custom-cake'
+
+# Per-process copy of the bundle, validated against CatalogVersion
+_local_bundle = {'version': None, 'data': None}
+
+def build_custom_cake_bundle():
+    """Everything the custom-cake screen needs, in one payload"""
+    from users.models import User
+    from .serializers import CakeBaseSerializer, CakeFlavourSerializer, CakeShapeSerializer, CakeWeightSerializer
+
+    baker = User.objects.filter(role='baker').order_by('-date_joined').only('is_custom_build_enabled').first()
+    return {
+        'base': CakeBaseSerializer(CakeBase.objects.filter(is_active=True), many=True).data,
+        'flavour': CakeFlavourSerializer(CakeFlavour.objects.filter(is_active=True), many=True).data,
+        'shape': CakeShapeSerializer(CakeShape.objects.filter(is_active=True), many=True).data,
+        'weight': CakeWeightSerializer(CakeWeight.objects.filter(is_active=True), many=True).data,
+        'is_custom_build_enabled': baker.is_custom_build_enabled if baker else True,
+    }
+
+def get_custom_cake_bundle():
+    """
+    Return the custom-cake bundle from the in-process copy, then the cache,
+    building it from the database only when both are stale. Both are keyed
+    by CatalogVersion, so one query tells every process whether its copy
+    still holds, whether or not the cache is shared.
+    """
+    version = CatalogVersion.current()
+    if _local_bundle['version'] == version:
+        return _local_bundle['data']
+
+    data = get_or_build(CUSTOM_CAKE_NAMESPACE, ['bundle', version], build_custom_cake_bundle)
+    _local_bundle['version'] = version
+    _local_bundle['data'] = data
+    return data
+
+def invalidate_custom_cake_bundle():
+    """Bump the catalog version; every process rebuilds on next read"""
+    CatalogVersion.bump()
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:03
+
+from django.db import migrations, models
+
+
+def backfill_display_fields(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    for product in Product.objects.all():
+        cheapest = product.variants.order_by('price').values_list('price', flat=True).first()
+        image = product.images.order_by('-is_primary', 'id').first()
+        if image is None:
+            image_url = ''
+        elif image.image:
+            image_url = image.image.url
+        else:
+            image_url = image.image_url or ''
+        Product.objects.filter(pk=product.pk).update(
+            min_price=cheapest if cheapest is not None else 0,
+            primary_image_url=image_url,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_cakebase_cakeflavour_cakeshape_cakeweight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='min_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='primary_image_url',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.RunPython(backfill_display_fields, migrations.RunPython.noop),
+    ]
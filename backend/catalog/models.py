@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils.text import slugify
 
 class Category(models.Model):
@@ -21,6 +22,22 @@ class Product(models.Model):
     description = models.TextField(blank=True)
     is_customizable = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    # Denormalized from variants/images so list endpoints don't query per product.
+    # Kept up to date by catalog.signals.
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    primary_image_url = models.CharField(max_length=500, blank=True)
+
+    def refresh_display_fields(self):
+        """Recompute min_price and primary_image_url from variants and images"""
+        cheapest = self.variants.order_by('price').values_list('price', flat=True).first()
+        image = self.images.order_by('-is_primary', 'id').first()
+
+        self.min_price = cheapest if cheapest is not None else 0
+        self.primary_image_url = image.url if image else ''
+        Product.objects.filter(pk=self.pk).update(
+            min_price=self.min_price,
+            primary_image_url=self.primary_image_url,
+        )
 
     def __str__(self):
         return self.name
@@ -41,6 +58,13 @@ class ProductImage(models.Model):
     image_url = models.URLField(max_length=500, blank=True, null=True)
     is_primary = models.BooleanField(default=False)
 
+    @property
+    def url(self):
+        """Uploaded file URL, falling back to the external image_url"""
+        if self.image:
+            return self.image.url
+        return self.image_url or ''
+
     def __str__(self):
         return f"Image for {self.product.name}"
 
@@ -75,3 +99,27 @@ class CakeWeight(models.Model):
 
     def __str__(self):
         return self.label
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter bumped on every catalog write.
+    Used to build ETags for the public catalog endpoints.
+    """
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def current(cls):
+        version = cls.objects.filter(pk=1).values_list('version', flat=True).first()
+        return version or 1
+
+    @classmethod
+    def bump(cls):
+        # Bump after commit so readers never pair a new version with old data
+        def _bump():
+            if not cls.objects.filter(pk=1).update(version=F('version') + 1):
+                cls.objects.get_or_create(pk=1, defaults={'version': 2})
+        transaction.on_commit(_bump)
+
+    def __str__(self):
+        return f"Catalog v{self.version}"
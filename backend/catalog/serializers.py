@@ -30,20 +30,12 @@ class ProductSerializer(serializers.ModelSerializer):
     price = serializers.SerializerMethodField()
 
     def get_image(self, obj):
-        # Return the primary image or the first image
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            return primary_image.image.url # Assuming standard Django media handling
-        first_image = obj.images.first()
-        if first_image:
-            return first_image.image.url
-        return None
+        # Primary image (or the first image), maintained on the product by catalog.signals
+        return obj.primary_image_url or None
 
     def get_price(self, obj):
-        # Return the lowest price from variants or a default
-        if obj.variants.exists():
-            return obj.variants.order_by('price').first().price
-        return 0
+        # Lowest variant price, maintained on the product by catalog.signals
+        return obj.min_price
 
 class BakerProductSerializer(serializers.ModelSerializer):
     """
@@ -68,20 +60,10 @@ class BakerProductSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'price', 'image_url', 'image', 'display_price', 'display_image', 'category', 'category_name', 'images', 'variants', 'is_active', 'is_customizable']
 
     def get_display_price(self, obj):
-        if obj.variants.exists():
-            return obj.variants.order_by('price').first().price
-        return 0
+        return obj.min_price
 
     def get_display_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            if primary_image.image: return primary_image.image.url
-            if primary_image.image_url: return primary_image.image_url
-        first_image = obj.images.first()
-        if first_image:
-            if first_image.image: return first_image.image.url
-            if first_image.image_url: return first_image.image_url
-        return None
+        return obj.primary_image_url or None
     
     def to_representation(self, instance):
         """Map display fields back to 'price' and 'image' for consistent API response"""
@@ -106,7 +88,9 @@ class BakerProductSerializer(serializers.ModelSerializer):
         elif image_url:
             # Create default image
             ProductImage.objects.create(product=product, image_url=image_url, is_primary=True)
-            
+
+        # Pick up min_price/primary_image_url refreshed by the variant/image signals
+        product.refresh_from_db(fields=['min_price', 'primary_image_url'])
         return product
 
     def update(self, instance, validated_data):
@@ -155,6 +139,8 @@ class BakerProductSerializer(serializers.ModelSerializer):
                 elif image_url:
                     ProductImage.objects.create(product=instance, image_url=image_url, is_primary=True)
 
+        if price is not None or image or image_url:
+            instance.refresh_from_db(fields=['min_price', 'primary_image_url'])
         return instance
 
 class CakeBaseSerializer(serializers.ModelSerializer):
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from users.models import User
+from utils.cache import invalidate_namespace
+from .caching import CATALOG_NAMESPACE, invalidate_custom_cake_bundle
+from .models import (Category, Product, ProductVariant, ProductImage, CakeBase, CakeFlavour,
+                     CakeShape, CakeWeight, CatalogVersion)
+
+CATALOG_MODELS = [Category, Product, ProductVariant, ProductImage, CakeBase, CakeFlavour, CakeShape, CakeWeight]
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def refresh_product_display_fields(sender, instance, **kwargs):
+    # Nothing to refresh when the product itself is being deleted
+    if isinstance(kwargs.get('origin'), Product):
+        return
+    product = Product.objects.filter(pk=instance.product_id).first()
+    if product:
+        product.refresh_display_fields()
+
+def bump_catalog_version(sender, **kwargs):
+    CatalogVersion.bump()
+    invalidate_namespace(CATALOG_NAMESPACE)
+
+for model in CATALOG_MODELS:
+    post_save.connect(bump_catalog_version, sender=model, dispatch_uid=f'catalog_version_save_{model.__name__}')
+    post_delete.connect(bump_catalog_version, sender=model, dispatch_uid=f'catalog_version_delete_{model.__name__}')
+
+# Cake option writes retire the custom-cake bundle through the CatalogVersion bump above
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def refresh_custom_cake_bundle_for_baker(sender, instance, **kwargs):
+    # The bundle carries the baker's is_custom_build_enabled flag
+    update_fields = kwargs.get('update_fields')
+    if update_fields and 'is_custom_build_enabled' not in update_fields:
+        return
+    if instance.role == 'baker':
+        invalidate_custom_cake_bundle()
@@ -1,3 +1,293 @@
-from django.test import TestCase
+from unittest import skipUnless
+from django.core.cache import cache
+from users.models import User
+from utils.testing import (APIBudgetTestCase, APIClientTestCase, fake_redis, fakeredis, other_worker, seed_catalog,
+                           seed_custom_cake_options)
+from .caching import _local_bundle
+from .models import Category, CakeBase, Product, ProductImage, ProductVariant
 
-# Create your tests here.
+class CatalogQueryBudgetTests(APIBudgetTestCase):
+    """Public catalog endpoints must not run per-row queries, whatever the catalog size"""
+
+    def setUp(self):
+        super().setUp()
+        _local_bundle.update(version=None, data=None)
+        self.products = seed_catalog(5)
+        seed_custom_cake_options()
+
+    def grow_catalog(self):
+        seed_catalog(60)
+
+    def test_category_list(self):
+        self.assertScalesFlat(2, '/api/catalog/categories/', lambda: Category.objects.bulk_create(
+            [Category(name=f'Category {i}', slug=f'category-{i}') for i in range(30)]))
+
+    def test_category_detail(self):
+        category = self.products[0].category
+        self.assertRequestBudget(2, 'get', f'/api/catalog/categories/{category.pk}/')
+
+    def test_product_list(self):
+        self.assertScalesFlat(4, '/api/catalog/products/', self.grow_catalog)
+
+    def test_product_list_page(self):
+        response = self.assertScalesFlat(4, '/api/catalog/products/?limit=20', self.grow_catalog)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_product_detail(self):
+        self.assertRequestBudget(4, 'get', f'/api/catalog/products/{self.products[0].pk}/')
+
+    def test_variant_list(self):
+        self.assertScalesFlat(2, '/api/catalog/variants/', self.grow_catalog)
+
+    def test_variant_detail(self):
+        variant = ProductVariant.objects.first()
+        self.assertRequestBudget(2, 'get', f'/api/catalog/variants/{variant.pk}/')
+
+    def test_image_list(self):
+        self.assertScalesFlat(2, '/api/catalog/images/', self.grow_catalog)
+
+    def test_image_detail(self):
+        image = ProductImage.objects.first()
+        self.assertRequestBudget(2, 'get', f'/api/catalog/images/{image.pk}/')
+
+    def test_custom_cake_option_lists(self):
+        for url in ('cake-bases', 'cake-flavours', 'cake-shapes', 'cake-weights'):
+            with self.subTest(url=url):
+                self.assertRequestBudget(2, 'get', f'/api/catalog/{url}/')
+
+    def test_custom_cake_option_list_scales(self):
+        self.assertScalesFlat(2, '/api/catalog/cake-bases/', lambda: CakeBase.objects.bulk_create(
+            [CakeBase(name=f'Extra base {i}') for i in range(30)]))
+
+    def test_custom_cake_bundle(self):
+        # The catalog version, the baker's flag and one query per option table
+        self.assertScalesFlat(6, '/api/catalog/custom-cake/bundle/', self.grow_custom_cake_options)
+
+    def grow_custom_cake_options(self):
+        # bulk_create skips the signals that bump the catalog version, so drop the in-process copy too
+        seed_custom_cake_options(30)
+        _local_bundle.update(version=None, data=None)
+
+    def test_cached_product_list_only_reads_catalog_version(self):
+        self.client.get('/api/catalog/products/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/catalog/products/')
+
+class ProductDisplayFieldsTests(APIClientTestCase):
+    """min_price and primary_image_url follow every variant and image write"""
+
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(name='Cakes', slug='cakes')
+        self.product = Product.objects.create(category=category, name='Truffle')
+
+    def display_fields(self):
+        self.product.refresh_from_db()
+        return self.product.min_price, self.product.primary_image_url
+
+    def test_min_price_follows_variants(self):
+        large = ProductVariant.objects.create(product=self.product, label='1 kg', price=900)
+        self.assertEqual(self.display_fields()[0], 900)
+        small = ProductVariant.objects.create(product=self.product, label='500 g', price=500)
+        self.assertEqual(self.display_fields()[0], 500)
+
+        small.price = 1200
+        small.save()
+        self.assertEqual(self.display_fields()[0], 900)
+
+        large.delete()
+        self.assertEqual(self.display_fields()[0], 1200)
+        small.delete()
+        self.assertEqual(self.display_fields()[0], 0)
+
+    def test_primary_image_url_follows_images(self):
+        first = ProductImage.objects.create(product=self.product, image_url='https://img.example.com/first.jpg')
+        self.assertEqual(self.display_fields()[1], 'https://img.example.com/first.jpg')
+        # The primary image wins over older ones
+        primary = ProductImage.objects.create(product=self.product, image_url='https://img.example.com/primary.jpg',
+                                              is_primary=True)
+        self.assertEqual(self.display_fields()[1], 'https://img.example.com/primary.jpg')
+
+        primary.image_url = 'https://img.example.com/replaced.jpg'
+        primary.save()
+        self.assertEqual(self.display_fields()[1], 'https://img.example.com/replaced.jpg')
+
+        primary.delete()
+        self.assertEqual(self.display_fields()[1], 'https://img.example.com/first.jpg')
+        first.delete()
+        self.assertEqual(self.display_fields()[1], '')
+
+    def test_product_list_shows_refreshed_fields(self):
+        ProductVariant.objects.create(product=self.product, label='1 kg', price=900)
+        ProductImage.objects.create(product=self.product, image_url='https://img.example.com/first.jpg')
+        self.assertEqual(self.client.get('/api/catalog/products/').data[0]['price'], 900)
+        # The list is cached now, so the write has to retire it
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductVariant.objects.create(product=self.product, label='500 g', price=500)
+        product = self.client.get('/api/catalog/products/').data[0]
+        self.assertEqual((product['id'], product['price']), (self.product.pk, 500))
+        self.assertEqual(product['image'], 'https://img.example.com/first.jpg')
+
+class CatalogETagTests(APIClientTestCase):
+    """Catalog GETs are conditional on an ETag that changes with every catalog write"""
+
+    def setUp(self):
+        super().setUp()
+        self.product = seed_catalog(2)[0]
+        self.url = f'/api/catalog/products/{self.product.pk}/'
+
+    def test_matching_etag_gets_not_modified(self):
+        for url in (self.url, '/api/catalog/products/'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                # Once uncached and once from the cache; either way only the version is read
+                for _ in range(2):
+                    with self.assertNumQueries(1):
+                        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response['ETag'], etag)
+                    self.assertIn('max-age', response['Cache-Control'])
+                    self.assertFalse(response.content)
+
+    def test_etag_lists_and_wildcard(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"stale", {etag}').status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='*').status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_etag_differs_per_url(self):
+        other = self.client.get('/api/catalog/products/')['ETag']
+        self.assertNotEqual(self.client.get(self.url)['ETag'], other)
+
+    def test_etag_changes_after_a_catalog_write(self):
+        before = self.client.get(self.url)['ETag']
+        # Any catalog model counts, not just the product being read
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Breads', slug='breads')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=before)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], before)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+class CatalogCacheInvalidationTests(APIClientTestCase):
+    """A catalog write reaches the cached responses of every worker, not just the one that handled it"""
+
+    def setUp(self):
+        super().setUp()
+        self.product = seed_catalog(1)[0]
+        self.url = f'/api/catalog/products/{self.product.pk}/'
+
+    def rename_product(self, name):
+        self.product.name = name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+
+    def test_write_in_another_worker_retires_local_cache(self):
+        before = self.client.get(self.url)
+        with other_worker():
+            cache.clear()
+            self.rename_product('Renamed elsewhere')
+
+        after = self.client.get(self.url)
+        self.assertEqual(after.data['name'], 'Renamed elsewhere')
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        stale = self.client.get(self.url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(stale.status_code, 200)
+
+    @skipUnless(fakeredis, 'fakeredis is not installed')
+    def test_redis_cache_is_shared_and_invalidated(self):
+        with fake_redis():
+            cache.clear()
+            self.client.get(self.url)
+            with self.assertNumQueries(1):
+                cached = self.client.get(self.url)
+            self.assertEqual(cached.data['name'], self.product.name)
+
+            self.rename_product('Renamed')
+            self.assertEqual(self.client.get(self.url).data['name'], 'Renamed')
+
+class CustomCakeBundleTests(APIClientTestCase):
+    """The bundle follows option and baker changes made by any worker"""
+
+    def setUp(self):
+        super().setUp()
+        # The in-process copy outlives the test database rows it was built from
+        _local_bundle.update(version=None, data=None)
+        seed_custom_cake_options(2)
+        CakeBase.objects.create(name='Retired base', is_active=False)
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+
+    def get_bundle(self):
+        response = self.client.get('/api/catalog/custom-cake/bundle/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_bundle_lists_active_options_and_flag(self):
+        bundle = self.get_bundle()
+        self.assertEqual([base['name'] for base in bundle['base']], ['CakeBase 0', 'CakeBase 1'])
+        self.assertEqual(len(bundle['weight']), 2)
+        self.assertTrue(bundle['is_custom_build_enabled'])
+
+    def test_repeated_reads_only_check_catalog_version(self):
+        self.get_bundle()
+        with self.assertNumQueries(1):
+            self.get_bundle()
+
+    def test_option_added_in_another_worker(self):
+        self.get_bundle()
+        with other_worker(), self.captureOnCommitCallbacks(execute=True):
+            CakeBase.objects.create(name='Red velvet')
+        self.assertIn('Red velvet', [base['name'] for base in self.get_bundle()['base']])
+
+    def test_custom_build_disabled_in_another_worker(self):
+        self.get_bundle()
+        self.baker.is_custom_build_enabled = False
+        with other_worker(), self.captureOnCommitCallbacks(execute=True):
+            self.baker.save(update_fields=['is_custom_build_enabled'])
+        self.assertFalse(self.get_bundle()['is_custom_build_enabled'])
+
+class BakerCatalogQueryBudgetTests(APIBudgetTestCase):
+    """Baker product management endpoints"""
+
+    def setUp(self):
+        super().setUp()
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        self.authenticate(self.baker)
+        self.products = seed_catalog(5)
+
+    def test_product_list(self):
+        self.assertScalesFlat(4, '/api/catalog/baker/products/', lambda: seed_catalog(60))
+
+    def test_product_detail(self):
+        self.assertRequestBudget(4, 'get', f'/api/catalog/baker/products/{self.products[0].pk}/')
+
+    def test_product_create(self):
+        self.assertRequestBudget(16, 'post', '/api/catalog/baker/products/', {
+            'name': 'Chocolate Truffle',
+            'category': self.products[0].category_id,
+            'price': '650.00',
+            'image_url': 'https://img.example.com/truffle.jpg',
+        }, status_code=201)
+
+    def test_product_update(self):
+        self.assertRequestBudget(14, 'patch', f'/api/catalog/baker/products/{self.products[0].pk}/',
+                                 {'name': 'Renamed', 'price': '700.00'})
+
+    def test_product_add_variant(self):
+        self.assertRequestBudget(9, 'post', f'/api/catalog/baker/products/{self.products[0].pk}/variants/',
+                                 {'label': '2 kg', 'price': '1200.00'}, status_code=201)
+
+    def test_product_add_image(self):
+        self.assertRequestBudget(9, 'post', f'/api/catalog/baker/products/{self.products[0].pk}/images/',
+                                 {'image_url': 'https://img.example.com/extra.jpg'}, status_code=201)
+
+    def test_variant_list(self):
+        self.assertScalesFlat(2, '/api/catalog/baker/variants/', lambda: seed_catalog(60))
+
+    def test_image_list(self):
+        self.assertScalesFlat(2, '/api/catalog/baker/images/', lambda: seed_catalog(60))
+
+    def test_product_delete(self):
+        product = Product.objects.create(category=self.products[0].category, name='Short-lived')
+        self.assertRequestBudget(11, 'delete', f'/api/catalog/baker/products/{product.pk}/', status_code=204)
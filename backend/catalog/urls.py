@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .viewsets import CategoryViewSet, ProductViewSet, ProductVariantViewSet, ProductImageViewSet, CakeBaseViewSet, CakeFlavourViewSet, CakeShapeViewSet, CakeWeightViewSet
 from .baker_viewsets import BakerProductViewSet, BakerVariantViewSet, BakerImageViewSet
+from .views import CustomCakeBundleView
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
@@ -17,5 +18,6 @@ router.register(r'baker/variants', BakerVariantViewSet, basename='baker-variant'
 router.register(r'baker/images', BakerImageViewSet, basename='baker-image')
 
 urlpatterns = [
+    path('custom-cake/bundle/', CustomCakeBundleView.as_view(), name='custom-cake-bundle'),
     path('', include(router.urls)),
 ]
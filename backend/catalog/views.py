@@ -1,3 +1,11 @@
-from django.shortcuts import render
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .caching import get_custom_cake_bundle
 
-# Create your views here.
+class CustomCakeBundleView(APIView):
+    """Active cake bases, flavours, shapes and weights plus the baker's custom-build flag"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(get_custom_cake_bundle())
@@ -1,46 +1,49 @@
 from rest_framework import viewsets, permissions
+from utils.pagination import ProductCursorPagination
+from .caching import CatalogETagMixin
 from .models import Category, Product, ProductVariant, ProductImage, CakeBase, CakeFlavour, CakeShape, CakeWeight
 from .serializers import (
     CategorySerializer, ProductSerializer, ProductVariantSerializer, ProductImageSerializer,
     CakeBaseSerializer, CakeFlavourSerializer, CakeShapeSerializer, CakeWeightSerializer
 )
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CatalogETagMixin, viewsets.ModelViewSet):
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.filter(is_active=True)
+class ProductViewSet(CatalogETagMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images', 'variants')
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = ProductCursorPagination
 
-class ProductVariantViewSet(viewsets.ModelViewSet):
+class ProductVariantViewSet(CatalogETagMixin, viewsets.ModelViewSet):
     queryset = ProductVariant.objects.all()
     serializer_class = ProductVariantSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class ProductImageViewSet(viewsets.ModelViewSet):
+class ProductImageViewSet(CatalogETagMixin, viewsets.ModelViewSet):
     queryset = ProductImage.objects.all()
     serializer_class = ProductImageSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class CakeBaseViewSet(viewsets.ModelViewSet):
+class CakeBaseViewSet(CatalogETagMixin, viewsets.ModelViewSet):
     queryset = CakeBase.objects.filter(is_active=True)
     serializer_class = CakeBaseSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class CakeFlavourViewSet(viewsets.ModelViewSet):
+class CakeFlavourViewSet(CatalogETagMixin, viewsets.ModelViewSet):
     queryset = CakeFlavour.objects.filter(is_active=True)
     serializer_class = CakeFlavourSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class CakeShapeViewSet(viewsets.ModelViewSet):
+class CakeShapeViewSet(CatalogETagMixin, viewsets.ModelViewSet):
     queryset = CakeShape.objects.filter(is_active=True)
     serializer_class = CakeShapeSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class CakeWeightViewSet(viewsets.ModelViewSet):
+class CakeWeightViewSet(CatalogETagMixin, viewsets.ModelViewSet):
     queryset = CakeWeight.objects.filter(is_active=True)
     serializer_class = CakeWeightSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -1,3 +1,29 @@
-from django.test import TestCase
+from users.models import User
+from utils.testing import APIBudgetTestCase
+from .models import CustomCakeOption
 
-# Create your tests here.
+class CustomCakeOptionQueryBudgetTests(APIBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.authenticate(self.user)
+        self.options = self.seed_options(6)
+
+    def seed_options(self, count):
+        types = [choice for choice, _ in CustomCakeOption.OPTION_TYPE_CHOICES]
+        return CustomCakeOption.objects.bulk_create([
+            CustomCakeOption(type=types[i % len(types)], label=f'Option {i}', extra_price=10 * i)
+            for i in range(count)
+        ])
+
+    def test_options(self):
+        self.assertScalesFlat(2, '/api/coupons/custom-cake/options/', lambda: self.seed_options(60))
+
+    def test_price_does_not_grow_with_options(self):
+        small = self.assertRequestBudget(2, 'post', '/api/coupons/custom-cake/price/',
+                                         {'options': [self.options[0].pk]})
+        large = self.assertRequestBudget(2, 'post', '/api/coupons/custom-cake/price/',
+                                         {'options': [option.pk for option in self.options]})
+        self.assertEqual(small.query_count, large.query_count)
+        self.assertEqual(large.data['total_price'], '650.00')
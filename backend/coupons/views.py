@@ -1,8 +1,8 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from orders.pricing import CUSTOM_CAKE_BASE_PRICE
 from .models import CustomCakeOption
-from decimal import Decimal
 
 class CustomCakeOptionsView(APIView):
     """Get all custom cake options grouped by type"""
@@ -25,15 +25,16 @@ class CustomCakePriceView(APIView):
     """Calculate custom cake price based on selected options"""
     def post(self, request):
         option_ids = request.data.get('options', [])
-        base_price = Decimal('500.00')  # Base price for custom cake
+        base_price = CUSTOM_CAKE_BASE_PRICE  # Same base that order pricing charges
         
+        # One query for all options; unknown ids are ignored, repeated ids count each time
+        prices = {
+            str(option_id): extra_price
+            for option_id, extra_price in CustomCakeOption.objects.filter(id__in=option_ids).values_list('id', 'extra_price')
+        }
         total_price = base_price
         for option_id in option_ids:
-            try:
-                option = CustomCakeOption.objects.get(id=option_id)
-                total_price += option.extra_price
-            except CustomCakeOption.DoesNotExist:
-                pass
+            total_price += prices.get(str(option_id), 0)
         
         return Response({
             'base_price': str(base_price),
@@ -0,0 +1,101 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from orders.models import Order, OrderItem
+from .models import Ingredient, RecipeItem, StockMovement
+
+# Once an order reaches any of these it has been (or is being) baked
+CONSUMING_STATUSES = {'confirmed', 'in_kitchen', 'ready', 'out_for_delivery', 'completed'}
+
+def recipe_lookup(product_ids, variant_ids):
+    """
+    Recipe items for the given products and variants, in one query.
+    Returns {('variant', id) | ('product', id): [(ingredient_id, quantity_per_unit), ...]}.
+    """
+    lookup = defaultdict(list)
+    if not product_ids and not variant_ids:
+        return lookup
+    rows = RecipeItem.objects.filter(
+        Q(recipe__product_variant_id__in=variant_ids)
+        | Q(recipe__product_id__in=product_ids, recipe__product_variant__isnull=True)
+    ).values_list('recipe__product_id', 'recipe__product_variant_id', 'ingredient_id', 'quantity_per_unit')
+    for product_id, variant_id, ingredient_id, quantity in rows:
+        key = ('variant', variant_id) if variant_id else ('product', product_id)
+        lookup[key].append((ingredient_id, quantity))
+    return lookup
+
+def recipe_for(lookup, product_id, variant_id):
+    """A variant's own recipe wins over its product's"""
+    if variant_id and ('variant', variant_id) in lookup:
+        return lookup[('variant', variant_id)]
+    return lookup.get(('product', product_id), [])
+
+def ingredient_requirements(lines):
+    """Total ingredient quantities for (product_id, variant_id, quantity) lines"""
+    lines = list(lines)
+    lookup = recipe_lookup({line[0] for line in lines if line[0]}, {line[1] for line in lines if line[1]})
+    totals = defaultdict(Decimal)
+    for product_id, variant_id, quantity in lines:
+        for ingredient_id, per_unit in recipe_for(lookup, product_id, variant_id):
+            totals[ingredient_id] += per_unit * quantity
+    return totals
+
+def apply_stock_changes(changes):
+    """Add signed {ingredient_id: delta} to current_stock in one UPDATE, so concurrent writers can't lose updates"""
+    changes = {ingredient_id: delta for ingredient_id, delta in changes.items() if delta}
+    if not changes:
+        return
+    Ingredient.objects.filter(pk__in=changes).update(current_stock=F('current_stock') + Case(
+        *[When(pk=ingredient_id, then=Value(delta)) for ingredient_id, delta in changes.items()],
+        default=Value(Decimal('0')),
+        output_field=Ingredient._meta.get_field('current_stock'),
+    ))
+
+def outstanding_usage(order):
+    """Net stock still taken out for an order: {ingredient_id: negative quantity}"""
+    rows = (StockMovement.objects.filter(order=order).values('ingredient')
+            .annotate(net=Sum('quantity')).filter(~Q(net=0)))
+    return {row['ingredient']: row['net'] for row in rows}
+
+def record_movements(order, movements, movement_type, note):
+    StockMovement.objects.bulk_create([
+        StockMovement(ingredient_id=ingredient_id, type=movement_type, quantity=quantity, order=order, note=note)
+        for ingredient_id, quantity in movements.items() if quantity
+    ])
+    apply_stock_changes(movements)
+
+def sync_order_stock(order):
+    """
+    Consume the order's ingredients when it is confirmed and give them back
+    if it is cancelled (or sent back to pending).
+
+    The order row is locked first and its committed status read under the
+    lock, so concurrent status changes of the same order are serialised even
+    when the save that triggered this ran outside a transaction: the second
+    one sees the first one's usage and does nothing. Stock levels change
+    through F() expressions, so confirmations of different orders sharing
+    ingredients don't lose updates either.
+    """
+    with transaction.atomic(savepoint=False):
+        status = Order.objects.select_for_update().filter(pk=order.pk).values_list('status', flat=True).first()
+        if status is None:
+            return
+        outstanding = outstanding_usage(order)
+        if status in CONSUMING_STATUSES:
+            if outstanding:
+                return
+            lines = OrderItem.objects.filter(order=order).values_list('product_id', 'product_variant_id', 'quantity')
+            movements = {ingredient_id: -total for ingredient_id, total in ingredient_requirements(lines).items()}
+            record_movements(order, movements, 'usage', f'Order #{order.pk} confirmed')
+        elif outstanding:
+            # Give back exactly what was taken, even if the recipes changed since
+            movements = {ingredient_id: -net for ingredient_id, net in outstanding.items()}
+            record_movements(order, movements, 'reversal', f'Order #{order.pk} {status}')
+
+def release_order_stock(order):
+    """Give back what a deleted order still has taken out; its movements outlive it with order=NULL"""
+    outstanding = outstanding_usage(order)
+    if outstanding:
+        movements = {ingredient_id: -net for ingredient_id, net in outstanding.items()}
+        record_movements(order, movements, 'reversal', f'Order #{order.pk} deleted')
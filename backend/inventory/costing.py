@@ -0,0 +1,146 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+from catalog.models import Product, ProductVariant
+from orders.analytics import DEFAULT_RANGE_DAYS
+from orders.models import OrderItem
+from orders.rollups import sale_filter
+from utils.cache import get_or_build, invalidate_namespace, is_shared_cache
+from .ledger import end_of_day
+from .models import Ingredient, RecipeItem, StockMovement
+
+RECIPE_COST_NAMESPACE = 'inventory:recipe-costs'
+COST_PLACES = Decimal('0.0001')
+
+def build_recipe_costs():
+    """
+    Cost of one unit of every recipe, keyed like consumption.recipe_lookup:
+    {('variant' | 'product', id): Decimal}. One aggregate query.
+    """
+    line_cost = ExpressionWrapper(F('quantity_per_unit') * F('ingredient__unit_cost'),
+                                  output_field=DecimalField(max_digits=20, decimal_places=6))
+    rows = (RecipeItem.objects.values_list('recipe__product_id', 'recipe__product_variant_id')
+            .annotate(cost=Sum(line_cost)).order_by())
+    costs = {}
+    for product_id, variant_id, cost in rows:
+        key = ('variant', variant_id) if variant_id else ('product', product_id)
+        costs[key] = (costs.get(key, 0) + cost).quantize(COST_PLACES)
+    return costs
+
+def get_recipe_costs():
+    """
+    build_recipe_costs() through the shared cache; recipe and ingredient cost
+    changes invalidate it. A per-process cache would only be invalidated in
+    the worker that made the change, so without one the costs are rebuilt on
+    every call (one query).
+    """
+    if not is_shared_cache():
+        return build_recipe_costs()
+    return get_or_build(RECIPE_COST_NAMESPACE, ['all'], build_recipe_costs)
+
+def invalidate_recipe_costs():
+    invalidate_namespace(RECIPE_COST_NAMESPACE)
+
+def unit_cost_for(costs, product_id, variant_id):
+    """A variant's own recipe wins over its product's; None when neither has one"""
+    if variant_id and ('variant', variant_id) in costs:
+        return costs[('variant', variant_id)]
+    return costs.get(('product', product_id))
+
+def record_purchase(ingredient, quantity, unit_cost, note=''):
+    """Book a purchase: the movement, the stock and the ingredient's unit cost change together"""
+    with transaction.atomic():
+        movement = StockMovement.objects.create(ingredient=ingredient, type='purchase', quantity=quantity,
+                                                unit_cost=unit_cost, note=note)
+        Ingredient.objects.filter(pk=ingredient.pk).update(current_stock=F('current_stock') + quantity,
+                                                           unit_cost=unit_cost)
+        if unit_cost != ingredient.unit_cost:
+            invalidate_recipe_costs()
+    return movement
+
+def parse_margin_params(params):
+    """
+    Read from/to query params; the range defaults to the last
+    DEFAULT_RANGE_DAYS days. Returns ((start, end), error message or None).
+    """
+    try:
+        end = date.fromisoformat(params['to']) if params.get('to') else timezone.localdate()
+        start = (date.fromisoformat(params['from']) if params.get('from')
+                 else end - timedelta(days=DEFAULT_RANGE_DAYS - 1))
+    except ValueError:
+        return None, 'from and to must be dates in YYYY-MM-DD format'
+    if start > end:
+        return None, 'from must not be after to'
+    return (start, end), None
+
+def margin(revenue, cost):
+    if cost is None:
+        return None, None
+    profit = revenue - cost
+    return profit, (round(float(profit / revenue * 100), 2) if revenue else None)
+
+def build_margin_report(start, end):
+    """
+    Unit margins for every variant in the catalog, plus revenue, cost of
+    sales and gross margin for what sold in orders placed between start and
+    end (paid, not cancelled). Sales come from one aggregate query and are
+    costed against the cached recipe costs, so nothing is looked up per item.
+
+    Revenue is before order-level coupon discounts, and costs are today's
+    recipe costs rather than those on the day of sale.
+    """
+    costs = get_recipe_costs()
+    sold = {
+        (product_id, variant_id): (units, revenue)
+        for product_id, variant_id, units, revenue in
+        OrderItem.objects.filter(sale_filter('order__'), order__created_at__gte=end_of_day(start - timedelta(days=1)),
+                                 order__created_at__lt=end_of_day(end))
+        .values_list('product_id', 'product_variant_id')
+        .annotate(units=Sum('quantity'), revenue=Sum('subtotal')).order_by()
+    }
+
+    lines = {}
+    for variant in ProductVariant.objects.select_related('product').order_by('product__name', 'price'):
+        lines[(variant.product_id, variant.pk)] = (variant.product.name, variant.label, variant.price)
+    # Lines sold without a variant, or for variants deleted since
+    missing = {product_id for product_id, variant_id in sold if (product_id, variant_id) not in lines}
+    if missing:
+        names = dict(Product.objects.filter(pk__in=missing).values_list('pk', 'name'))
+        for product_id, variant_id in sold:
+            lines.setdefault((product_id, variant_id), (names.get(product_id, ''), None, None))
+
+    rows = []
+    totals = {'revenue': Decimal('0'), 'cost_of_sales': Decimal('0'), 'uncosted_revenue': Decimal('0')}
+    for (product_id, variant_id), (product_name, label, price) in lines.items():
+        unit_cost = unit_cost_for(costs, product_id, variant_id)
+        units, revenue = sold.get((product_id, variant_id), (0, Decimal('0')))
+        cost_of_sales = (unit_cost * units).quantize(Decimal('0.01')) if unit_cost is not None else None
+        unit_margin, unit_margin_pct = margin(price, unit_cost) if price is not None else (None, None)
+        gross_margin, gross_margin_pct = margin(revenue, cost_of_sales)
+        rows.append({
+            'product_id': product_id,
+            'product_name': product_name,
+            'variant_id': variant_id,
+            'variant_label': label,
+            'price': price,
+            'unit_cost': unit_cost,
+            'unit_margin': unit_margin,
+            'unit_margin_pct': unit_margin_pct,
+            'units_sold': units,
+            'revenue': revenue,
+            'cost_of_sales': cost_of_sales,
+            'gross_margin': gross_margin,
+            'gross_margin_pct': gross_margin_pct,
+        })
+        totals['revenue'] += revenue
+        if cost_of_sales is None:
+            totals['uncosted_revenue'] += revenue
+        else:
+            totals['cost_of_sales'] += cost_of_sales
+    rows.sort(key=lambda row: (-row['revenue'], row['product_name'], row['price'] or 0))
+
+    costed_revenue = totals['revenue'] - totals['uncosted_revenue']
+    totals['gross_margin'], totals['gross_margin_pct'] = margin(costed_revenue, totals['cost_of_sales'])
+    return {'from': start, 'to': end, **totals, 'variants': rows}
@@ -0,0 +1,138 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from orders.models import OrderItem
+from .consumption import CONSUMING_STATUSES, recipe_for, recipe_lookup
+from .models import Ingredient, ReorderSuggestion
+
+DEFAULT_HORIZON_DAYS = 14
+DEFAULT_HISTORY_DAYS = 365
+MOVING_AVERAGE_DAYS = 28
+# Weekday profiles weigh recent weeks more; a week this old counts half
+WEEKDAY_HALF_LIFE_WEEKS = 8
+# Each product keeps whichever model forecast the last two weeks of history better
+BACKTEST_DAYS = 14
+
+def load_quantities(start, end):
+    """
+    Units per (product, variant) per delivery day between start and end,
+    from non-cancelled orders. Returns (keys, units, consumed): two arrays of
+    shape (len(keys), days), the second counting only orders whose
+    ingredients have already been taken out of stock.
+    """
+    rows = list(
+        OrderItem.objects.filter(order__delivery_date__range=(start, end)).exclude(order__status='cancelled')
+        .values_list('order__delivery_date', 'product_id', 'product_variant_id')
+        .annotate(units=Sum('quantity'),
+                  consumed=Sum('quantity', filter=Q(order__status__in=CONSUMING_STATUSES)))
+        .order_by()
+    )
+    index = {key: i for i, key in enumerate(dict.fromkeys((row[1], row[2]) for row in rows))}
+    shape = (len(index), (end - start).days + 1)
+    units, consumed = np.zeros(shape), np.zeros(shape)
+    if rows:
+        series = np.fromiter((index[(row[1], row[2])] for row in rows), dtype=np.intp, count=len(rows))
+        days = np.fromiter(((row[0] - start).days for row in rows), dtype=np.intp, count=len(rows))
+        units[series, days] = np.fromiter((row[3] for row in rows), dtype=float, count=len(rows))
+        consumed[series, days] = np.fromiter((row[4] or 0 for row in rows), dtype=float, count=len(rows))
+    return list(index), units, consumed
+
+def weekday_forecast(history, first_weekday, horizon):
+    """Exponentially weighted mean per weekday, repeated over the horizon"""
+    days = history.shape[1]
+    age = np.arange(days)[::-1]
+    weights = 0.5 ** (age / (7 * WEEKDAY_HALF_LIFE_WEEKS))
+    weekdays = (first_weekday + np.arange(days)) % 7
+
+    profile = np.zeros((history.shape[0], 7))
+    for weekday in range(7):
+        mask = weekdays == weekday
+        if mask.any():
+            profile[:, weekday] = history[:, mask] @ weights[mask] / weights[mask].sum()
+    return profile[:, (first_weekday + days + np.arange(horizon)) % 7]
+
+def moving_average_forecast(history, horizon):
+    """Mean of the last MOVING_AVERAGE_DAYS days, flat over the horizon"""
+    mean = history[:, -MOVING_AVERAGE_DAYS:].mean(axis=1)
+    return np.repeat(mean[:, None], horizon, axis=1)
+
+def forecast(history, first_weekday, horizon):
+    """
+    Forecast every series with both models at once; each series takes the
+    one with the lower absolute error over the last BACKTEST_DAYS of history.
+    Returns (array of shape (series, horizon), mask of series on the weekday model).
+    """
+    use_weekday = np.zeros(history.shape[0], dtype=bool)
+    if history.shape[1] >= BACKTEST_DAYS * 3:
+        train, actual = history[:, :-BACKTEST_DAYS], history[:, -BACKTEST_DAYS:]
+        weekday_error = np.abs(weekday_forecast(train, first_weekday, BACKTEST_DAYS) - actual).sum(axis=1)
+        average_error = np.abs(moving_average_forecast(train, BACKTEST_DAYS) - actual).sum(axis=1)
+        use_weekday = weekday_error < average_error
+    predicted = np.where(use_weekday[:, None],
+                         weekday_forecast(history, first_weekday, horizon),
+                         moving_average_forecast(history, horizon))
+    return predicted, use_weekday
+
+def recipe_matrix(keys, ingredient_ids):
+    """Quantity of each ingredient per unit of each (product, variant) key: shape (keys, ingredients)"""
+    lookup = recipe_lookup({key[0] for key in keys}, {key[1] for key in keys if key[1]})
+    column = {ingredient_id: i for i, ingredient_id in enumerate(ingredient_ids)}
+    matrix = np.zeros((len(keys), len(ingredient_ids)))
+    for row, (product_id, variant_id) in enumerate(keys):
+        for ingredient_id, per_unit in recipe_for(lookup, product_id, variant_id):
+            matrix[row, column[ingredient_id]] += float(per_unit)
+    return matrix
+
+def to_decimal(value):
+    """Round up to the stock precision, so a suggestion never falls short by rounding"""
+    return Decimal(math.ceil(round(value * 100, 6))) / 100
+
+def run_forecast(start=None, horizon=DEFAULT_HORIZON_DAYS, history_days=DEFAULT_HISTORY_DAYS):
+    """
+    Forecast product demand for `horizon` days from `start` (default today),
+    project it through the recipes and replace the ReorderSuggestion table.
+
+    Orders already booked in the horizon count when they exceed the
+    forecast. Confirmed ones have already been deducted from current_stock,
+    so they are left out of what still has to be covered.
+    """
+    start = start or timezone.localdate()
+    history_start = start - timedelta(days=history_days)
+    keys, units, consumed = load_quantities(history_start, start + timedelta(days=horizon - 1))
+    predicted, use_weekday = forecast(units[:, :history_days], history_start.weekday(), horizon)
+    to_cover = np.maximum(predicted, units[:, history_days:]) - consumed[:, history_days:]
+
+    ingredients = list(Ingredient.objects.order_by('pk'))
+    matrix = recipe_matrix(keys, [ingredient.pk for ingredient in ingredients])
+    daily = to_cover.T @ matrix
+
+    generated_at = timezone.now()
+    suggestions = []
+    for column, ingredient in enumerate(ingredients):
+        demand = to_decimal(daily[:, column].sum())
+        suggestions.append(ReorderSuggestion(
+            ingredient=ingredient,
+            horizon_start=start,
+            horizon_days=horizon,
+            daily_demand=[round(float(value), 2) for value in daily[:, column]],
+            forecast_demand=demand,
+            current_stock=ingredient.current_stock,
+            # Keep the reorder level in hand once the horizon's demand is met
+            suggested_quantity=max(demand + ingredient.reorder_level - ingredient.current_stock, Decimal('0')),
+            generated_at=generated_at,
+        ))
+    with transaction.atomic():
+        ReorderSuggestion.objects.all().delete()
+        ReorderSuggestion.objects.bulk_create(suggestions)
+
+    return {
+        'horizon_start': start,
+        'products': len(keys),
+        'weekday_model': int(use_weekday.sum()),
+        'ingredients': len(suggestions),
+        'to_buy': sum(1 for suggestion in suggestions if suggestion.suggested_quantity),
+    }
@@ -0,0 +1,89 @@
+import operator
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import reduce
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+from .models import Ingredient, StockCheckpoint, StockMovement
+
+# A movement can commit shortly after its created_at; checkpoints stay this far
+# behind now so they never miss one that was still in flight
+CHECKPOINT_SETTLE = timedelta(minutes=5)
+
+def end_of_day(day):
+    """Balances "on" a date are taken at the close of that day"""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+def with_ledger_balances(ingredients, as_of=None):
+    """
+    Ingredients with `ledger_balance` set to their stock at as_of (default now):
+    the newest checkpoint before it plus the movements since. Two queries,
+    and the movement scan only covers the span since each checkpoint.
+    """
+    as_of = as_of or timezone.now()
+    latest = StockCheckpoint.objects.filter(ingredient=OuterRef('pk'), as_of__lte=as_of).order_by('-as_of')
+    ingredients = list(ingredients.annotate(
+        checkpoint_at=Subquery(latest.values('as_of')[:1]),
+        checkpoint_balance=Subquery(latest.values('balance')[:1]),
+    ))
+    if not ingredients:
+        return ingredients
+
+    # Checkpoints are usually taken for every ingredient at once, so this is one or two ranges
+    by_start = defaultdict(list)
+    for ingredient in ingredients:
+        ingredient.ledger_balance = ingredient.checkpoint_balance or Decimal('0')
+        by_start[ingredient.checkpoint_at].append(ingredient.pk)
+    since = reduce(operator.or_, [
+        Q(ingredient__in=ids, created_at__gte=start) if start else Q(ingredient__in=ids)
+        for start, ids in by_start.items()
+    ])
+    totals = dict(StockMovement.objects.filter(since, created_at__lt=as_of)
+                  .values_list('ingredient').annotate(total=Sum('quantity')).order_by())
+    for ingredient in ingredients:
+        ingredient.ledger_balance += totals.get(ingredient.pk, 0)
+    return ingredients
+
+def stock_as_of(as_of, ingredients=None):
+    """{ingredient_id: ledger balance} at a past (or present) moment"""
+    ingredients = Ingredient.objects.all() if ingredients is None else ingredients
+    return {ingredient.pk: ingredient.ledger_balance for ingredient in with_ledger_balances(ingredients, as_of)}
+
+def create_checkpoints(as_of=None):
+    """Record every ingredient's ledger balance at as_of (default: now less CHECKPOINT_SETTLE)"""
+    as_of = as_of or timezone.now() - CHECKPOINT_SETTLE
+    balances = stock_as_of(as_of)
+    StockCheckpoint.objects.bulk_create([
+        StockCheckpoint(ingredient_id=ingredient_id, as_of=as_of, balance=balance)
+        for ingredient_id, balance in balances.items()
+    ], ignore_conflicts=True)
+    return as_of, len(balances)
+
+def reconcile(fix=False):
+    """
+    Compare each ingredient's current_stock with its ledger balance.
+    Returns the ingredients that drifted, with `drift` = current_stock - ledger.
+
+    With fix, an adjustment movement brings the ledger in line with
+    current_stock (the figure the kitchen has been working from). The
+    ingredient rows are locked meanwhile, so a confirmation can't land
+    between reading the stock and reading the movements.
+    """
+    with transaction.atomic():
+        ingredients = Ingredient.objects.order_by('name')
+        if fix:
+            ingredients = ingredients.select_for_update()
+        drifted = []
+        for ingredient in with_ledger_balances(ingredients):
+            ingredient.drift = ingredient.current_stock - ingredient.ledger_balance
+            if ingredient.drift:
+                drifted.append(ingredient)
+        if fix:
+            StockMovement.objects.bulk_create([
+                StockMovement(ingredient=ingredient, type='adjustment', quantity=ingredient.drift,
+                              note='Reconciliation: ledger brought in line with current stock')
+                for ingredient in drifted
+            ])
+    return drifted
@@ -0,0 +1,29 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from inventory.forecasting import DEFAULT_HISTORY_DAYS, DEFAULT_HORIZON_DAYS, run_forecast
+
+class Command(BaseCommand):
+    help = (
+        'Forecast product demand from order history (weekday and moving-average '
+        'models), project it through the recipes and refresh the reorder '
+        'suggestions the baker app reads. Run it nightly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON_DAYS, help='Days to forecast')
+        parser.add_argument('--history', type=int, default=DEFAULT_HISTORY_DAYS, help='Days of history to learn from')
+        parser.add_argument('--start', type=date.fromisoformat,
+                            help='First forecast day (YYYY-MM-DD); default is today')
+
+    def handle(self, *args, **options):
+        if options['horizon'] < 1 or options['history'] < 7:
+            raise CommandError('--horizon must be at least 1 and --history at least 7')
+
+        started = time.perf_counter()
+        summary = run_forecast(options['start'], options['horizon'], options['history'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Forecast {summary['products']} products ({summary['weekday_model']} on the weekday model) "
+            f"from {summary['horizon_start']}; {summary['to_buy']} of {summary['ingredients']} ingredients "
+            f"need buying ({time.perf_counter() - started:.1f}s)"
+        ))
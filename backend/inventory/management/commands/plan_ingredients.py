@@ -0,0 +1,54 @@
+import json
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.utils.encoders import JSONEncoder
+from inventory.planning import DEFAULT_PLAN_DAYS, build_plan, parse_plan_params
+
+class Command(BaseCommand):
+    help = (
+        'Show how much of each ingredient the non-cancelled orders delivered in a '
+        'window need, against current stock and reorder levels, with shortfalls flagged.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=DEFAULT_PLAN_DAYS, help='Length of the window in days')
+        parser.add_argument('--from', dest='start', type=date.fromisoformat,
+                            help='First delivery date (YYYY-MM-DD); default is today')
+        parser.add_argument('--to', dest='end', type=date.fromisoformat,
+                            help='Last delivery date (YYYY-MM-DD); overrides --days')
+        parser.add_argument('--json', action='store_true', help='Print the full plan as JSON')
+
+    def handle(self, *args, **options):
+        params = {'days': options['days']}
+        if options['start']:
+            params['from'] = options['start'].isoformat()
+        if options['end']:
+            params['to'] = options['end'].isoformat()
+        window, error = parse_plan_params(params)
+        if error:
+            raise CommandError(error)
+
+        plan = build_plan(*window)
+        if options['json']:
+            self.stdout.write(json.dumps(plan, cls=JSONEncoder, indent=2))
+            return
+
+        self.stdout.write(f"{plan['orders']} orders ({plan['pending_orders']} pending) "
+                          f"for {plan['from']} to {plan['to']}")
+        row = '{:<24} {:>6} {:>10} {:>10} {:>10} {:>10} {:>10}  {}'
+        self.stdout.write(row.format('ingredient', 'unit', 'required', 'pending', 'in stock', 'projected',
+                                     'reorder at', ''))
+        for ingredient in plan['ingredients']:
+            if ingredient['shortfall']:
+                flag = self.style.ERROR(f"SHORT {ingredient['shortfall']} (runs out {ingredient['runs_out_on']})")
+            elif ingredient['below_reorder_level']:
+                flag = self.style.WARNING('REORDER')
+            else:
+                flag = ''
+            self.stdout.write(row.format(
+                ingredient['name'][:24], ingredient['unit'], ingredient['required'], ingredient['pending'],
+                ingredient['current_stock'], ingredient['projected_stock'], ingredient['reorder_level'], flag,
+            ))
+        if plan['units_without_recipe']:
+            self.stdout.write(self.style.WARNING(
+                f"{plan['units_without_recipe']} ordered units have no recipe and are not included"))
@@ -0,0 +1,44 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from inventory.ledger import create_checkpoints, end_of_day, reconcile, with_ledger_balances
+from inventory.models import Ingredient
+
+class Command(BaseCommand):
+    help = (
+        'Recompute every ingredient\'s stock from its latest checkpoint plus the '
+        'movements since, and report where current_stock has drifted from it. '
+        'Run it with --checkpoint on a schedule (e.g. nightly) so later balances '
+        'only need the movements since.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkpoint', action='store_true',
+                            help='Record a balance checkpoint for every ingredient afterwards')
+        parser.add_argument('--fix', action='store_true',
+                            help='Write adjustment movements so the ledger matches current_stock')
+        parser.add_argument('--as-of', type=date.fromisoformat,
+                            help='Only print ledger balances at the close of this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        if options['as_of']:
+            self.stdout.write(f"Stock at the close of {options['as_of']}:")
+            for ingredient in with_ledger_balances(Ingredient.objects.order_by('name'), end_of_day(options['as_of'])):
+                self.stdout.write(f'  {ingredient.name:<24} {ingredient.ledger_balance:>12} {ingredient.unit}')
+            return
+
+        drifted = reconcile(fix=options['fix'])
+        for ingredient in drifted:
+            self.stdout.write(self.style.WARNING(
+                f'  {ingredient.name:<24} current {ingredient.current_stock:>10}  '
+                f'ledger {ingredient.ledger_balance:>10}  drift {ingredient.drift:>+10} {ingredient.unit}'
+            ))
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('current_stock matches the ledger for every ingredient'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Recorded adjustments for {len(drifted)} ingredients'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{len(drifted)} ingredients drifted; rerun with --fix to adjust the ledger'))
+
+        if options['checkpoint']:
+            as_of, count = create_checkpoints()
+            self.stdout.write(self.style.SUCCESS(f'Checkpointed {count} ingredients as of {as_of:%Y-%m-%d %H:%M}'))
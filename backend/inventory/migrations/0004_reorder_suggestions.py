@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('horizon_start', models.DateField()),
+                ('horizon_days', models.PositiveSmallIntegerField()),
+                ('daily_demand', models.JSONField(default=list)),
+                ('forecast_demand', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('current_stock', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('suggested_quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('generated_at', models.DateTimeField()),
+                ('ingredient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestion', to='inventory.ingredient')),
+            ],
+        ),
+    ]
@@ -1,11 +1,14 @@
 from django.db import models
 from catalog.models import Product, ProductVariant
+from orders.models import Order
 
 class Ingredient(models.Model):
     name = models.CharField(max_length=255)
     unit = models.CharField(max_length=50)
     current_stock = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     reorder_level = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Price per unit paid on the latest purchase (see inventory.costing)
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=4, default=0)
     
     def __str__(self):
         return f"{self.name} ({self.unit})"
@@ -31,13 +34,62 @@ class StockMovement(models.Model):
         ('purchase', 'Purchase'),
         ('usage', 'Usage'),
         ('adjustment', 'Adjustment'),
+        ('reversal', 'Reversal'),
     ]
     
     ingredient = models.ForeignKey(Ingredient, related_name='movements', on_delete=models.CASCADE)
     type = models.CharField(max_length=20, choices=MOVEMENT_TYPE_CHOICES)
+    # Signed change to current_stock: purchases are positive, usage negative
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    # Price paid per unit, on purchases
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=4, null=True, blank=True)
+    # Set on usage written when an order is confirmed, and on its reversal if it is cancelled
+    order = models.ForeignKey(Order, null=True, blank=True, related_name='stock_movements', on_delete=models.SET_NULL)
     note = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            # Balances read "movements since the last checkpoint" per ingredient (see inventory.ledger)
+            models.Index(fields=['ingredient', 'created_at'], name='movement_ingr_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.type} - {self.ingredient.name} ({self.quantity})"
+
+class StockCheckpoint(models.Model):
+    """
+    An ingredient's ledger balance: the sum of its movements created before
+    `as_of`. Balances at any later time only need the movements since.
+    """
+    ingredient = models.ForeignKey(Ingredient, related_name='checkpoints', on_delete=models.CASCADE)
+    as_of = models.DateTimeField()
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ingredient', 'as_of'], name='unique_checkpoint_per_ingredient_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.ingredient.name} @ {self.as_of:%Y-%m-%d %H:%M}: {self.balance}"
+
+class ReorderSuggestion(models.Model):
+    """
+    Latest demand forecast and suggested purchase per ingredient, written by
+    `manage.py forecast_demand` (see inventory.forecasting) so the app can
+    read it without running the models.
+    """
+    ingredient = models.OneToOneField(Ingredient, related_name='reorder_suggestion', on_delete=models.CASCADE)
+    horizon_start = models.DateField()
+    horizon_days = models.PositiveSmallIntegerField()
+    # Forecast demand per day of the horizon
+    daily_demand = models.JSONField(default=list)
+    forecast_demand = models.DecimalField(max_digits=12, decimal_places=2)
+    current_stock = models.DecimalField(max_digits=10, decimal_places=2)
+    suggested_quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    generated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.ingredient.name}: buy {self.suggested_quantity}"
@@ -0,0 +1,113 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from orders.models import Order, OrderItem
+from .consumption import recipe_for, recipe_lookup
+from .models import Ingredient
+
+DEFAULT_PLAN_DAYS = 7
+MAX_PLAN_DAYS = 92
+
+def parse_plan_params(params):
+    """
+    Read from/to or days query params; the window defaults to the next
+    DEFAULT_PLAN_DAYS days from today. Returns ((start, end), error message or None).
+    """
+    try:
+        start = date.fromisoformat(params['from']) if params.get('from') else timezone.localdate()
+        end = date.fromisoformat(params['to']) if params.get('to') else None
+    except ValueError:
+        return None, 'from and to must be dates in YYYY-MM-DD format'
+    try:
+        days = int(params.get('days', DEFAULT_PLAN_DAYS))
+    except ValueError:
+        return None, 'days must be a whole number'
+
+    if end is None:
+        if days < 1:
+            return None, 'days must be at least 1'
+        end = start + timedelta(days=days - 1)
+    if start > end:
+        return None, 'from must not be after to'
+    if (end - start).days >= MAX_PLAN_DAYS:
+        return None, f'The window can be at most {MAX_PLAN_DAYS} days'
+    return (start, end), None
+
+def build_plan(start, end):
+    """
+    Ingredient requirements for non-cancelled orders delivered between start
+    and end. Orders are collapsed into (day, product, variant) unit totals
+    by the database, so the Python pass is over distinct lines rather than
+    orders, and every line is expanded through one recipe lookup.
+
+    Orders already confirmed have had their ingredients taken out of
+    current_stock (see inventory.consumption), so only pending orders are
+    projected against it.
+    """
+    orders = Order.objects.filter(delivery_date__range=(start, end)).exclude(status='cancelled')
+    lines = list(
+        OrderItem.objects.filter(order__in=orders)
+        .values_list('order__delivery_date', 'product_id', 'product_variant_id')
+        .annotate(units=Sum('quantity'), pending_units=Sum('quantity', filter=Q(order__status='pending')))
+        .order_by()
+    )
+    counts = orders.aggregate(total=Count('pk'), pending=Count('pk', filter=Q(status='pending')))
+    lookup = recipe_lookup({line[1] for line in lines}, {line[2] for line in lines if line[2]})
+
+    required = defaultdict(Decimal)
+    pending = defaultdict(Decimal)
+    by_day = defaultdict(lambda: defaultdict(Decimal))
+    pending_by_day = defaultdict(lambda: defaultdict(Decimal))
+    units_without_recipe = 0
+    for day, product_id, variant_id, units, pending_units in lines:
+        recipe = recipe_for(lookup, product_id, variant_id)
+        if not recipe:
+            units_without_recipe += units
+        for ingredient_id, per_unit in recipe:
+            required[ingredient_id] += per_unit * units
+            by_day[day][ingredient_id] += per_unit * units
+            if pending_units:
+                pending[ingredient_id] += per_unit * pending_units
+                pending_by_day[day][ingredient_id] += per_unit * pending_units
+
+    ingredients = []
+    for ingredient in Ingredient.objects.filter(pk__in=required):
+        # Walk the window a day at a time to find when pending orders exhaust the stock
+        stock, runs_out_on = ingredient.current_stock, None
+        for day in sorted(pending_by_day):
+            stock -= pending_by_day[day].get(ingredient.pk, 0)
+            if stock < 0 and runs_out_on is None:
+                runs_out_on = day
+
+        projected = ingredient.current_stock - pending[ingredient.pk]
+        ingredients.append({
+            'id': ingredient.pk,
+            'name': ingredient.name,
+            'unit': ingredient.unit,
+            'current_stock': ingredient.current_stock,
+            'reorder_level': ingredient.reorder_level,
+            'required': required[ingredient.pk],
+            'already_consumed': required[ingredient.pk] - pending[ingredient.pk],
+            'pending': pending[ingredient.pk],
+            'projected_stock': projected,
+            'shortfall': max(-projected, Decimal('0')),
+            'runs_out_on': runs_out_on,
+            'below_reorder_level': projected < ingredient.reorder_level,
+        })
+    ingredients.sort(key=lambda row: (not row['shortfall'], not row['below_reorder_level'], row['name']))
+
+    return {
+        'from': start,
+        'to': end,
+        'orders': counts['total'],
+        'pending_orders': counts['pending'],
+        'units_without_recipe': units_without_recipe,
+        'shortfalls': sum(1 for row in ingredients if row['shortfall']),
+        'ingredients': ingredients,
+        'days': [
+            {'date': day, 'ingredients': {ingredient_id: quantity for ingredient_id, quantity in sorted(needs.items())}}
+            for day, needs in sorted(by_day.items())
+        ],
+    }
@@ -0,0 +1,20 @@
+from decimal import Decimal
+from rest_framework import serializers
+from .models import Ingredient, ReorderSuggestion
+
+class ReorderSuggestionSerializer(serializers.ModelSerializer):
+    ingredient_name = serializers.CharField(source='ingredient.name', read_only=True)
+    unit = serializers.CharField(source='ingredient.unit', read_only=True)
+    reorder_level = serializers.DecimalField(source='ingredient.reorder_level', max_digits=10, decimal_places=2,
+                                             read_only=True)
+
+    class Meta:
+        model = ReorderSuggestion
+        fields = ['ingredient', 'ingredient_name', 'unit', 'horizon_start', 'horizon_days', 'daily_demand',
+                  'forecast_demand', 'current_stock', 'reorder_level', 'suggested_quantity', 'generated_at']
+
+class PurchaseSerializer(serializers.Serializer):
+    ingredient = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    unit_cost = serializers.DecimalField(max_digits=10, decimal_places=4, min_value=Decimal('0'))
+    note = serializers.CharField(required=False, allow_blank=True, default='')
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from orders.models import Order
+from .consumption import release_order_stock, sync_order_stock
+from .costing import invalidate_recipe_costs
+from .models import Ingredient, Recipe, RecipeItem
+
+# Stock moves in the same transaction as the status change that causes it (see inventory.consumption)
+
+@receiver(post_save, sender=Order)
+def consume_ingredients_on_status_change(sender, instance, created, **kwargs):
+    if created:
+        changed = instance.status != 'pending'
+    else:
+        changed = instance.status != getattr(instance, '_loaded', {}).get('status')
+    if changed:
+        sync_order_stock(instance)
+
+@receiver(pre_delete, sender=Order)
+def release_ingredients_on_delete(sender, instance, **kwargs):
+    release_order_stock(instance)
+
+# Cached recipe costs (see inventory.costing) depend on recipes, their items and ingredient costs
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeItem)
+@receiver(post_delete, sender=RecipeItem)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def refresh_recipe_costs(sender, **kwargs):
+    invalidate_recipe_costs()
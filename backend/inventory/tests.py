@@ -1,3 +1,413 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+from catalog.models import ProductVariant
+from orders.models import Order, OrderItem
+from users.models import User
+from utils.testing import APIBudgetTestCase, fake_redis, fakeredis, other_worker, seed_catalog, seed_orders
+from .costing import build_recipe_costs, get_recipe_costs, unit_cost_for
+from .forecasting import MOVING_AVERAGE_DAYS, forecast, run_forecast
+from .ledger import create_checkpoints, end_of_day, reconcile, stock_as_of
+from .models import Ingredient, Recipe, RecipeItem, ReorderSuggestion, StockCheckpoint, StockMovement
 
-# Create your tests here.
+class StockConsumptionTests(APIBudgetTestCase):
+    """Confirming an order takes its recipe ingredients out of stock; cancelling puts them back"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        self.authenticate(self.baker)
+        seed_catalog(3)
+        plain, special = ProductVariant.objects.order_by('pk')[:2]
+
+        self.flour = Ingredient.objects.create(name='Flour', unit='kg', current_stock=100)
+        self.butter = Ingredient.objects.create(name='Butter', unit='kg', current_stock=50)
+        self.cream = Ingredient.objects.create(name='Cream', unit='l', current_stock=20)
+        # The product's recipe, and a variant with its own recipe instead
+        product_recipe = Recipe.objects.create(product=plain.product, name='Base recipe')
+        self.flour_item = RecipeItem.objects.create(recipe=product_recipe, ingredient=self.flour, quantity_per_unit=2)
+        RecipeItem.objects.create(recipe=product_recipe, ingredient=self.butter, quantity_per_unit=1)
+        variant_recipe = Recipe.objects.create(product_variant=special, name='Special recipe')
+        RecipeItem.objects.create(recipe=variant_recipe, ingredient=self.flour, quantity_per_unit=3)
+        RecipeItem.objects.create(recipe=variant_recipe, ingredient=self.cream, quantity_per_unit=Decimal('0.5'))
+
+        # One of each variant
+        self.order = seed_orders(self.customer, 1, items_per_order=2)[0]
+
+    def set_status(self, status, order=None):
+        order = order or self.order
+        response = self.client.patch(f'/api/orders/{order.pk}/status/', {'status': status}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def assertStock(self, flour, butter, cream):
+        stock = dict(Ingredient.objects.values_list('name', 'current_stock'))
+        self.assertEqual(stock, {'Flour': Decimal(flour), 'Butter': Decimal(butter), 'Cream': Decimal(cream)})
+
+    def test_confirmation_consumes_recipe_ingredients(self):
+        self.set_status('confirmed')
+        self.assertStock('95', '49', '19.5')
+        movements = StockMovement.objects.filter(order=self.order)
+        self.assertEqual({movement.type for movement in movements}, {'usage'})
+        self.assertEqual(sorted(movement.quantity for movement in movements),
+                         [Decimal('-5'), Decimal('-1'), Decimal('-0.5')])
+
+    def test_later_statuses_do_not_consume_again(self):
+        for status in ('confirmed', 'in_kitchen', 'ready', 'completed'):
+            self.set_status(status)
+        self.assertStock('95', '49', '19.5')
+        self.assertEqual(StockMovement.objects.filter(order=self.order).count(), 3)
+
+    def test_cancellation_reverses_usage(self):
+        self.set_status('confirmed')
+        self.set_status('cancelled')
+        self.assertStock('100', '50', '20')
+        self.assertEqual(StockMovement.objects.filter(order=self.order, type='reversal').count(), 3)
+
+    def test_cancellation_returns_what_was_taken_after_recipe_change(self):
+        self.set_status('confirmed')
+        self.flour_item.quantity_per_unit = 10
+        self.flour_item.save()
+        self.set_status('cancelled')
+        self.assertStock('100', '50', '20')
+
+    def test_cancelling_unconfirmed_order_moves_no_stock(self):
+        self.set_status('cancelled')
+        self.assertStock('100', '50', '20')
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_confirmations_of_different_orders_add_up(self):
+        other = seed_orders(self.customer, 1, items_per_order=2)[0]
+        self.set_status('confirmed')
+        self.set_status('confirmed', other)
+        self.assertStock('90', '48', '19')
+
+    def test_order_update_cannot_change_status(self):
+        # Customers can edit their order, but status only moves through the baker-only action
+        self.authenticate(self.customer)
+        response = self.client.patch(f'/api/orders/{self.order.pk}/', {'status': 'confirmed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertStock('100', '50', '20')
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_stale_copies_of_an_order_consume_once(self):
+        first, second = Order.objects.get(pk=self.order.pk), Order.objects.get(pk=self.order.pk)
+        for copy in (first, second):
+            copy.status = 'confirmed'
+            copy.save()
+        self.assertStock('95', '49', '19.5')
+
+    def test_deleting_confirmed_order_returns_stock(self):
+        self.set_status('confirmed')
+        self.order.delete()
+        self.assertStock('100', '50', '20')
+        self.assertEqual(StockMovement.objects.filter(type='reversal', order__isnull=True).count(), 3)
+
+    def test_confirmation_does_not_grow_with_cart_size(self):
+        seed_catalog(10)
+        large = seed_orders(self.customer, 1, items_per_order=12)[0]
+        small = self.assertRequestBudget(19, 'patch', f'/api/orders/{self.order.pk}/status/', {'status': 'confirmed'})
+        large = self.assertRequestBudget(19, 'patch', f'/api/orders/{large.pk}/status/', {'status': 'confirmed'})
+        self.assertEqual(small.query_count, large.query_count)
+
+class IngredientPlanTests(APIBudgetTestCase):
+    """Requirements for upcoming deliveries, projected against stock"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        self.authenticate(self.baker)
+        seed_catalog(3)
+        self.variant = ProductVariant.objects.order_by('pk').first()
+
+        self.flour = Ingredient.objects.create(name='Flour', unit='kg', current_stock=5, reorder_level=1)
+        self.sugar = Ingredient.objects.create(name='Sugar', unit='kg', current_stock=10, reorder_level=8)
+        recipe = Recipe.objects.create(product=self.variant.product, name='Base recipe')
+        RecipeItem.objects.create(recipe=recipe, ingredient=self.flour, quantity_per_unit=2)
+        RecipeItem.objects.create(recipe=recipe, ingredient=self.sugar, quantity_per_unit=1)
+
+    def seed_orders_on(self, day, count, status='pending'):
+        orders = seed_orders(self.customer, count, items_per_order=1)
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(delivery_date=day, status=status)
+        return orders
+
+    def get_plan(self, query=''):
+        response = self.client.get(f'/api/inventory/requirements/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_requirements_and_shortfall(self):
+        today = date.today()
+        self.seed_orders_on(today, 1)
+        self.seed_orders_on(today + timedelta(days=2), 2)
+        self.seed_orders_on(today + timedelta(days=1), 4, status='cancelled')
+        self.seed_orders_on(today + timedelta(days=30), 5)
+
+        plan = self.get_plan()
+        self.assertEqual(plan['orders'], 3)
+        flour, sugar = plan['ingredients']
+        self.assertEqual((flour['name'], flour['required'], flour['projected_stock']), ('Flour', 6, -1))
+        self.assertEqual((flour['shortfall'], flour['runs_out_on']), (1, today + timedelta(days=2)))
+        self.assertEqual((sugar['name'], sugar['shortfall'], sugar['below_reorder_level']), ('Sugar', 0, True))
+        self.assertEqual([day['date'] for day in plan['days']], [today, today + timedelta(days=2)])
+
+    def test_confirmed_orders_are_not_counted_against_stock_twice(self):
+        today = date.today()
+        self.seed_orders_on(today, 2)
+        confirmed = self.seed_orders_on(today, 1)[0]
+        self.client.patch(f'/api/orders/{confirmed.pk}/status/', {'status': 'confirmed'}, format='json')
+
+        flour = self.get_plan()['ingredients'][0]
+        self.assertEqual((flour['current_stock'], flour['required'], flour['already_consumed']), (3, 6, 2))
+        self.assertEqual(flour['projected_stock'], -1)
+
+    def test_window_params(self):
+        self.seed_orders_on(date(2030, 1, 10), 1)
+        self.assertEqual(self.get_plan('?from=2030-01-01&days=10')['orders'], 1)
+        self.assertEqual(self.get_plan('?from=2030-01-01&to=2030-01-09')['orders'], 0)
+        for query in ('?from=2030-13-01', '?days=0', '?days=x', '?from=2030-02-01&to=2030-01-01', '?days=400'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/inventory/requirements/{query}').status_code, 400)
+
+    def test_customers_cannot_plan(self):
+        self.authenticate(self.customer)
+        self.assertRequestBudget(1, 'get', '/api/inventory/requirements/', status_code=403)
+
+    def test_plan_does_not_grow_with_orders(self):
+        self.seed_orders_on(date.today(), 5)
+        self.assertScalesFlat(5, '/api/inventory/requirements/',
+                              lambda: self.seed_orders_on(date.today() + timedelta(days=1), 200))
+
+class StockLedgerTests(APIBudgetTestCase):
+    """Balances are the latest checkpoint plus the movements since"""
+
+    def setUp(self):
+        super().setUp()
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        self.authenticate(self.baker)
+        self.flour = Ingredient.objects.create(name='Flour', unit='kg', current_stock=60)
+        self.day = lambda n: timezone.make_aware(datetime(2025, 1, n, 12))
+        self.opening = self.move(100, self.day(1), 'purchase')
+        self.move(-30, self.day(2))
+
+    def move(self, quantity, at, type='usage'):
+        movement = StockMovement.objects.create(ingredient=self.flour, type=type, quantity=quantity)
+        StockMovement.objects.filter(pk=movement.pk).update(created_at=at)
+        return movement
+
+    def test_balance_as_of(self):
+        self.assertEqual(stock_as_of(end_of_day(date(2024, 12, 31)))[self.flour.pk], 0)
+        self.assertEqual(stock_as_of(end_of_day(date(2025, 1, 1)))[self.flour.pk], 100)
+        self.assertEqual(stock_as_of(end_of_day(date(2025, 1, 2)))[self.flour.pk], 70)
+
+    def test_balance_after_checkpoint_only_reads_movements_since(self):
+        create_checkpoints(self.day(3))
+        self.move(-10, self.day(4))
+        # History before the checkpoint is no longer read
+        StockMovement.objects.filter(pk=self.opening.pk).update(quantity=1)
+        self.assertEqual(stock_as_of(end_of_day(date(2025, 1, 4)))[self.flour.pk], 60)
+        self.assertEqual(stock_as_of(self.day(3))[self.flour.pk], 70)
+        # Earlier dates still fall back to the movements
+        self.assertEqual(stock_as_of(end_of_day(date(2025, 1, 1)))[self.flour.pk], 1)
+
+    def test_checkpoints_are_idempotent(self):
+        create_checkpoints(self.day(3))
+        create_checkpoints(self.day(3))
+        self.assertEqual(StockCheckpoint.objects.get(ingredient=self.flour).balance, 70)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        drifted = reconcile()
+        self.assertEqual([(ingredient.name, ingredient.drift) for ingredient in drifted], [('Flour', -10)])
+        self.assertFalse(StockMovement.objects.filter(type='adjustment').exists())
+
+        reconcile(fix=True)
+        self.assertEqual(reconcile(), [])
+        self.flour.refresh_from_db()
+        self.assertEqual(self.flour.current_stock, 60)
+
+    def test_order_consumption_keeps_ledger_in_line(self):
+        reconcile(fix=True)
+        customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        seed_catalog(1)
+        variant = ProductVariant.objects.first()
+        recipe = Recipe.objects.create(product=variant.product, name='Base recipe')
+        RecipeItem.objects.create(recipe=recipe, ingredient=self.flour, quantity_per_unit=4)
+        order = seed_orders(customer, 1, items_per_order=1)[0]
+        for status in ('confirmed', 'cancelled', 'confirmed'):
+            self.client.patch(f'/api/orders/{order.pk}/status/', {'status': status}, format='json')
+        self.flour.refresh_from_db()
+        self.assertEqual(self.flour.current_stock, 56)
+        self.assertEqual(reconcile(), [])
+
+    def test_stock_endpoint(self):
+        response = self.client.get('/api/inventory/stock/')
+        row = response.data['ingredients'][0]
+        self.assertEqual((row['balance'], row['current_stock'], row['drift']), (70, 60, -10))
+        response = self.client.get('/api/inventory/stock/?as_of=2025-01-01')
+        self.assertEqual(response.data['ingredients'], [{'id': self.flour.pk, 'name': 'Flour', 'unit': 'kg',
+                                                         'balance': 100}])
+        self.assertEqual(self.client.get('/api/inventory/stock/?as_of=soon').status_code, 400)
+
+    def test_stock_endpoint_does_not_grow_with_history(self):
+        create_checkpoints(self.day(3))
+        self.assertScalesFlat(3, '/api/inventory/stock/', lambda: StockMovement.objects.bulk_create([
+            StockMovement(ingredient=ingredient, type='purchase', quantity=1)
+            for ingredient in Ingredient.objects.bulk_create(
+                [Ingredient(name=f'Ingredient {i}', unit='kg') for i in range(20)])
+            for _ in range(10)
+        ]))
+
+class DemandForecastTests(APIBudgetTestCase):
+    """Forecasts learn weekly patterns and turn into purchase suggestions"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        self.authenticate(self.baker)
+        seed_catalog(1)
+        self.variant = ProductVariant.objects.order_by('pk').first()
+        self.flour = Ingredient.objects.create(name='Flour', unit='kg', current_stock=10, reorder_level=5)
+        self.salt = Ingredient.objects.create(name='Salt', unit='kg', current_stock=100)
+        recipe = Recipe.objects.create(product_variant=self.variant, name='Recipe')
+        RecipeItem.objects.create(recipe=recipe, ingredient=self.flour, quantity_per_unit=Decimal('0.5'))
+        self.start = date(2025, 6, 2)  # a Monday
+
+    def test_weekday_model_wins_for_weekly_pattern(self):
+        days = 70
+        history = np.where((np.arange(days) % 7) == 5, 12.0, 2.0)[None, :]
+        predicted, use_weekday = forecast(history, first_weekday=0, horizon=7)
+        self.assertTrue(use_weekday[0])
+        np.testing.assert_allclose(predicted[0], [2, 2, 2, 2, 2, 12, 2])
+
+    def test_moving_average_wins_for_flat_demand(self):
+        history = np.random.default_rng(1).poisson(4, size=(1, 70)).astype(float)
+        predicted, use_weekday = forecast(history, first_weekday=0, horizon=3)
+        self.assertFalse(use_weekday[0])
+        self.assertAlmostEqual(predicted[0, 0], history[0, -MOVING_AVERAGE_DAYS:].mean())
+
+    def test_suggestions_project_demand_through_recipes(self):
+        # Four units every day for eight weeks before the forecast starts
+        orders = seed_orders(self.customer, 56, items_per_order=1)
+        OrderItem.objects.filter(order__in=orders).update(quantity=4)
+        for offset, order in enumerate(orders):
+            Order.objects.filter(pk=order.pk).update(delivery_date=self.start - timedelta(days=offset + 1))
+
+        summary = run_forecast(self.start, horizon=7, history_days=56)
+        self.assertEqual(summary['products'], 1)
+        flour = ReorderSuggestion.objects.get(ingredient=self.flour)
+        # 4 units x 0.5 kg x 7 days, plus the reorder level, less what is in stock
+        self.assertEqual(flour.forecast_demand, 14)
+        self.assertEqual(flour.suggested_quantity, 9)
+        self.assertEqual(flour.daily_demand, [2.0] * 7)
+        self.assertEqual(ReorderSuggestion.objects.get(ingredient=self.salt).suggested_quantity, 0)
+
+        response = self.assertRequestBudget(2, 'get', '/api/inventory/suggestions/')
+        self.assertEqual([row['ingredient_name'] for row in response.data], ['Flour', 'Salt'])
+
+    def test_booked_orders_above_forecast_count(self):
+        order = seed_orders(self.customer, 1, items_per_order=1)[0]
+        OrderItem.objects.filter(order=order).update(quantity=30)
+        Order.objects.filter(pk=order.pk).update(delivery_date=self.start + timedelta(days=1))
+        run_forecast(self.start, horizon=7, history_days=28)
+        self.assertEqual(ReorderSuggestion.objects.get(ingredient=self.flour).forecast_demand, 15)
+
+    def test_customers_cannot_read_suggestions(self):
+        self.authenticate(self.customer)
+        self.assertRequestBudget(1, 'get', '/api/inventory/suggestions/', status_code=403)
+
+class CostingTests(APIBudgetTestCase):
+    """Recipe costs roll up from ingredient costs; margins join them with sales"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        self.authenticate(self.baker)
+        seed_catalog(2)
+        self.plain, self.special = ProductVariant.objects.order_by('pk')[:2]
+
+        self.flour = Ingredient.objects.create(name='Flour', unit='kg', current_stock=10, unit_cost=2)
+        self.butter = Ingredient.objects.create(name='Butter', unit='kg', current_stock=5, unit_cost=10)
+        product_recipe = Recipe.objects.create(product=self.plain.product, name='Base recipe')
+        self.flour_item = RecipeItem.objects.create(recipe=product_recipe, ingredient=self.flour,
+                                                    quantity_per_unit=Decimal('0.5'))
+        RecipeItem.objects.create(recipe=product_recipe, ingredient=self.butter, quantity_per_unit=Decimal('0.1'))
+        variant_recipe = Recipe.objects.create(product_variant=self.special, name='Special recipe')
+        RecipeItem.objects.create(recipe=variant_recipe, ingredient=self.flour, quantity_per_unit=Decimal('1.5'))
+
+    def test_recipe_costs(self):
+        costs = build_recipe_costs()
+        self.assertEqual(unit_cost_for(costs, self.plain.product_id, self.plain.pk), 2)
+        self.assertEqual(unit_cost_for(costs, self.special.product_id, self.special.pk), 3)
+        other = ProductVariant.objects.exclude(product=self.plain.product).first()
+        self.assertIsNone(unit_cost_for(costs, other.product_id, other.pk))
+
+    def change_flour_quantity(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flour_item.quantity_per_unit = quantity
+            self.flour_item.save()
+
+    @skipUnless(fakeredis, 'fakeredis is not installed')
+    def test_costs_are_cached_until_a_recipe_changes(self):
+        with fake_redis():
+            cache.clear()
+            get_recipe_costs()
+            with self.assertNumQueries(0):
+                get_recipe_costs()
+            self.change_flour_quantity(1)
+            self.assertEqual(get_recipe_costs()[('product', self.plain.product_id)], 3)
+
+    def test_change_in_another_worker_is_seen_without_a_shared_cache(self):
+        self.assertEqual(get_recipe_costs()[('product', self.plain.product_id)], 2)
+        with other_worker():
+            cache.clear()
+            self.change_flour_quantity(1)
+        with self.assertNumQueries(1):
+            costs = get_recipe_costs()
+        self.assertEqual(costs[('product', self.plain.product_id)], 3)
+
+    def test_purchase_sets_stock_and_cost(self):
+        get_recipe_costs()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertRequestBudget(8, 'post', '/api/inventory/purchases/', {
+                'ingredient': self.flour.pk, 'quantity': '5', 'unit_cost': '4.0000', 'note': 'Weekly order',
+            }, status_code=201)
+        self.flour.refresh_from_db()
+        self.assertEqual((self.flour.current_stock, self.flour.unit_cost), (15, 4))
+        self.assertEqual(StockMovement.objects.get(type='purchase').unit_cost, 4)
+        self.assertEqual(get_recipe_costs()[('variant', self.special.pk)], 6)
+        # Stock and ledger moved together; only the opening stock set without a movement differs
+        self.assertEqual({ingredient.name: ingredient.drift for ingredient in reconcile()}, {'Flour': 10, 'Butter': 5})
+
+    def test_margin_report(self):
+        seed_orders(self.customer, 3, items_per_order=2)
+        seed_orders(self.customer, 2, items_per_order=2, payment_status='pending')
+        report = self.client.get('/api/inventory/margins/').data
+        rows = {row['variant_id']: row for row in report['variants']}
+
+        plain = rows[self.plain.pk]
+        self.assertEqual((plain['units_sold'], plain['revenue']), (3, self.plain.price * 3))
+        self.assertEqual((plain['unit_cost'], plain['cost_of_sales']), (2, 6))
+        self.assertEqual(plain['unit_margin'], self.plain.price - 2)
+        self.assertEqual(rows[self.special.pk]['cost_of_sales'], 9)
+        self.assertEqual(report['cost_of_sales'], 15)
+        self.assertEqual(report['gross_margin'], report['revenue'] - 15)
+        self.assertEqual(len(rows), ProductVariant.objects.count())
+
+    def test_margin_report_does_not_grow_with_catalog_or_sales(self):
+        def grow():
+            seed_catalog(20)
+            seed_orders(self.customer, 50, items_per_order=6)
+        self.assertScalesFlat(4, '/api/inventory/margins/', grow)
+
+    def test_margin_report_params_and_permissions(self):
+        self.assertEqual(self.client.get('/api/inventory/margins/?from=2025-02-01&to=2025-01-01').status_code, 400)
+        self.authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/inventory/margins/').status_code, 403)
+        self.assertEqual(self.client.post('/api/inventory/purchases/', {}).status_code, 403)
@@ -0,0 +1,12 @@
+from django.urls import path
+from .views import (
+    IngredientRequirementsView, IngredientStockView, MarginReportView, PurchaseView, ReorderSuggestionListView,
+)
+
+urlpatterns = [
+    path('requirements/', IngredientRequirementsView.as_view(), name='ingredient-requirements'),
+    path('stock/', IngredientStockView.as_view(), name='ingredient-stock'),
+    path('suggestions/', ReorderSuggestionListView.as_view(), name='reorder-suggestions'),
+    path('purchases/', PurchaseView.as_view(), name='ingredient-purchases'),
+    path('margins/', MarginReportView.as_view(), name='margin-report'),
+]
@@ -1,3 +1,105 @@
-from django.shortcuts import render
+from datetime import date
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .costing import build_margin_report, parse_margin_params, record_purchase
+from .ledger import end_of_day, with_ledger_balances
+from .models import Ingredient, ReorderSuggestion
+from .planning import build_plan, parse_plan_params
+from .serializers import PurchaseSerializer, ReorderSuggestionSerializer
 
-# Create your views here.
+class IngredientRequirementsView(APIView):
+    """Ingredients needed for upcoming deliveries against current stock (bakers only)"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'baker':
+            return Response({'error': 'Only bakers can view ingredient requirements'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        window, error = parse_plan_params(request.query_params)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(build_plan(*window))
+
+class IngredientStockView(APIView):
+    """
+    Ledger stock per ingredient (bakers only). With ?as_of=YYYY-MM-DD the
+    balances at the close of that day; otherwise today's, next to
+    current_stock and the drift between the two.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'baker':
+            return Response({'error': 'Only bakers can view stock'}, status=status.HTTP_403_FORBIDDEN)
+
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            try:
+                as_of = end_of_day(date.fromisoformat(as_of))
+            except ValueError:
+                return Response({'error': 'as_of must be a date in YYYY-MM-DD format'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        else:
+            as_of = timezone.now()
+
+        current = 'as_of' not in request.query_params
+        rows = []
+        for ingredient in with_ledger_balances(Ingredient.objects.order_by('name'), as_of):
+            row = {'id': ingredient.pk, 'name': ingredient.name, 'unit': ingredient.unit,
+                   'balance': ingredient.ledger_balance}
+            if current:
+                row['current_stock'] = ingredient.current_stock
+                row['drift'] = ingredient.current_stock - ingredient.ledger_balance
+            rows.append(row)
+        return Response({'as_of': as_of, 'ingredients': rows})
+
+class ReorderSuggestionListView(generics.ListAPIView):
+    """Suggested purchases from the last `manage.py forecast_demand` run, largest first (bakers only)"""
+    serializer_class = ReorderSuggestionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return (ReorderSuggestion.objects.select_related('ingredient')
+                .order_by('-suggested_quantity', 'ingredient__name'))
+
+    def list(self, request, *args, **kwargs):
+        if request.user.role != 'baker':
+            return Response({'error': 'Only bakers can view reorder suggestions'},
+                            status=status.HTTP_403_FORBIDDEN)
+        return super().list(request, *args, **kwargs)
+
+class PurchaseView(APIView):
+    """Book an ingredient purchase: adds to stock and sets the ingredient's unit cost (bakers only)"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != 'baker':
+            return Response({'error': 'Only bakers can record purchases'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = PurchaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        movement = record_purchase(**serializer.validated_data)
+        return Response({
+            'id': movement.pk,
+            'ingredient': movement.ingredient_id,
+            'quantity': movement.quantity,
+            'unit_cost': movement.unit_cost,
+            'note': movement.note,
+            'created_at': movement.created_at,
+        }, status=status.HTTP_201_CREATED)
+
+class MarginReportView(APIView):
+    """Recipe cost and margin per variant, with sales in a date range (bakers only)"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'baker':
+            return Response({'error': 'Only bakers can view margins'}, status=status.HTTP_403_FORBIDDEN)
+
+        window, error = parse_margin_params(request.query_params)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(build_margin_report(*window))
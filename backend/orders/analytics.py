@@ -0,0 +1,208 @@
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import models
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from utils.cache import get_or_build, invalidate_namespace, is_shared_cache
+from .models import DailyCustomerSalesRollup, DailyProductSalesRollup, DailySalesRollup
+
+GRANULARITIES = ('day', 'week', 'month')
+COMPARISONS = ('previous', 'year')
+
+# Default sales trend window when no range is asked for
+TREND_DAYS = 7
+# Default range length when only one end of it is given
+DEFAULT_RANGE_DAYS = 30
+# Longest range per granularity, so a trend is at most a few hundred buckets
+MAX_RANGE_DAYS = {'day': 366, 'week': 3 * 366, 'month': 10 * 366}
+
+ANALYTICS_NAMESPACE = 'orders:analytics'
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_bucket(day, granularity):
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+def shift_year_back(day):
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:
+        # 29 February
+        return day.replace(year=day.year - 1, day=28)
+
+def comparison_range(start, end, compare):
+    """The period a [start, end] range is compared against"""
+    if compare == 'year':
+        return shift_year_back(start), shift_year_back(end)
+    length = end - start
+    return start - length - timedelta(days=1), start - timedelta(days=1)
+
+def _dates(start, end):
+    query = models.Q()
+    if start:
+        query &= models.Q(date__gte=start)
+    if end:
+        query &= models.Q(date__lte=end)
+    return query
+
+def sales_trend(start, end, granularity):
+    """Revenue and paid orders per day/week/month, with empty periods filled in"""
+    rows = DailySalesRollup.objects.filter(_dates(start, end))
+    if granularity == 'week':
+        rows = rows.annotate(period=TruncWeek('date'))
+    elif granularity == 'month':
+        rows = rows.annotate(period=TruncMonth('date'))
+    else:
+        rows = rows.annotate(period=models.F('date'))
+    totals = {
+        row['period']: row
+        for row in rows.values('period').annotate(
+            period_revenue=models.Sum('revenue'),
+            paid_orders=models.Sum('paid_order_count'),
+        )
+    }
+
+    trend = []
+    period = bucket_start(start, granularity)
+    while period <= end:
+        row = totals.get(period, {})
+        revenue = row.get('period_revenue') or 0
+        trend.append({
+            'date': period,
+            'revenue': revenue,
+            # Name kept from the original daily-only trend
+            'daily_revenue': revenue,
+            'order_count': row.get('paid_orders') or 0,
+        })
+        period = next_bucket(period, granularity)
+    return trend
+
+def sales_totals(start, end):
+    totals = DailySalesRollup.objects.filter(_dates(start, end)).aggregate(
+        revenue=models.Sum('revenue'),
+        orders=models.Sum('order_count'),
+        paid_orders=models.Sum('paid_order_count'),
+    )
+    total_revenue = totals['revenue'] or 0
+    total_orders = totals['orders'] or 0
+    return {
+        'total_revenue': total_revenue,
+        'total_orders': total_orders,
+        'paid_orders': totals['paid_orders'] or 0,
+        'avg_order_value': total_revenue / total_orders if total_orders else 0,
+    }
+
+def top_products(start, end, limit=5):
+    return [
+        {'product__name': row['product__name'], 'total_sold': row['total_sold'], 'revenue': row['product_revenue']}
+        for row in DailyProductSalesRollup.objects.filter(_dates(start, end), quantity__gt=0)
+        .values('product__name')
+        .annotate(total_sold=models.Sum('quantity'), product_revenue=models.Sum('revenue'))
+        .order_by('-total_sold')[:limit]
+    ]
+
+def top_customers(start, end, limit=5):
+    return list(
+        DailyCustomerSalesRollup.objects.filter(_dates(start, end), order_count__gt=0)
+        .values('user__name', 'user__email')
+        .annotate(orders_placed=models.Sum('order_count'), total_spent=models.Sum('revenue'))
+        .order_by('-total_spent')[:limit]
+    )
+
+def percent_change(current, previous):
+    if not previous:
+        return None
+    return round(float((current - previous) / previous * 100), 2)
+
+def build_report(start=None, end=None, granularity='day', compare=None):
+    """
+    Dashboard figures for orders placed between `start` and `end` (inclusive).
+    Without a range the totals are all-time and the trend covers the last
+    TREND_DAYS days, as the dashboard always showed.
+    """
+    today = timezone.localdate()
+    trend_start = start or today - timedelta(days=TREND_DAYS)
+    trend_end = end or today
+
+    report = {
+        'from': start,
+        'to': end,
+        'granularity': granularity,
+        **sales_totals(start, end),
+        'sales_trend': sales_trend(trend_start, trend_end, granularity),
+        'top_products': top_products(start, end),
+        'top_customers': top_customers(start, end),
+    }
+
+    if compare:
+        previous_start, previous_end = comparison_range(start, end, compare)
+        previous = sales_totals(previous_start, previous_end)
+        report['comparison'] = {
+            'from': previous_start,
+            'to': previous_end,
+            **previous,
+            'sales_trend': sales_trend(previous_start, previous_end, granularity),
+            'revenue_change': percent_change(report['total_revenue'], previous['total_revenue']),
+            'orders_change': percent_change(report['total_orders'], previous['total_orders']),
+        }
+    return report
+
+def parse_report_params(params):
+    """
+    Read from/to/granularity/compare query params.
+    Returns (kwargs for build_report, error message or None).
+    """
+    try:
+        start = date.fromisoformat(params['from']) if params.get('from') else None
+        end = date.fromisoformat(params['to']) if params.get('to') else None
+    except ValueError:
+        return None, 'from and to must be dates in YYYY-MM-DD format'
+
+    granularity = params.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return None, f"granularity must be one of: {', '.join(GRANULARITIES)}"
+
+    if start or end:
+        end = end or timezone.localdate()
+        start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        if start > end:
+            return None, 'from must not be after to'
+        if (end - start).days >= MAX_RANGE_DAYS[granularity]:
+            return None, f'A {granularity} report can cover at most {MAX_RANGE_DAYS[granularity]} days'
+
+    compare = params.get('compare') or None
+    if compare and compare not in COMPARISONS:
+        return None, f"compare must be one of: {', '.join(COMPARISONS)}"
+    if compare and not start:
+        return None, 'compare needs a from/to range'
+
+    return {'start': start, 'end': end, 'granularity': granularity, 'compare': compare}, None
+
+def get_report(start=None, end=None, granularity='day', compare=None):
+    """
+    build_report() through the shared cache. Rollup writes invalidate the
+    namespace, so a cached report is never staler than the last committed
+    order change (or ANALYTICS_CACHE_TIMEOUT). A per-process cache would
+    only be invalidated in the worker that made the change, so without a
+    shared one the report is built on every call.
+    """
+    if not is_shared_cache():
+        return build_report(start, end, granularity, compare)
+    # Open-ended ranges depend on today's date
+    parts = [timezone.localdate(), start, end, granularity, compare]
+    return get_or_build(ANALYTICS_NAMESPACE, parts,
+                        lambda: build_report(start, end, granularity, compare),
+                        settings.ANALYTICS_CACHE_TIMEOUT)
+
+def invalidate_reports():
+    """Drop cached reports once the current transaction commits"""
+    invalidate_namespace(ANALYTICS_NAMESPACE)
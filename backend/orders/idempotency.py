@@ -0,0 +1,95 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+def request_fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    raw = f"{request.method}:{request.path}:{payload}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def in_progress():
+    return Response({'error': 'A request with this Idempotency-Key is already in progress'},
+                    status=status.HTTP_409_CONFLICT)
+
+def idempotent(view_method):
+    """
+    Make a viewset write replayable via the Idempotency-Key header.
+
+    The first request with a key is executed and its response stored for
+    IDEMPOTENCY_KEY_TTL. Retries with the same key and payload get the stored
+    response back (marked with Idempotent-Replayed) without running the write
+    or its side effects again. Requests without the header are unaffected.
+
+    While the first request runs, the key is only leased for
+    IDEMPOTENCY_LEASE_SECONDS: retries get 409 until then, after which a
+    retry may take the key over, so a process that died mid-write doesn't
+    lock the key for the whole TTL.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'error': 'Idempotency-Key must be at most 255 characters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        fingerprint = request_fingerprint(request)
+        lease_until = now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+
+        if record is None:
+            try:
+                record = IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    request_fingerprint=fingerprint,
+                    expires_at=lease_until,
+                )
+            except IntegrityError:
+                # Lost the race to a concurrent request with the same key
+                return in_progress()
+        elif record.expires_at <= now:
+            # A stored response past its TTL, or a lease whose request never finished:
+            # take the key over, unless a concurrent retry just did
+            if not IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).update(
+                    request_fingerprint=fingerprint, response_status=None, response_body=None,
+                    expires_at=lease_until):
+                return in_progress()
+        elif record.request_fingerprint != fingerprint:
+            return Response({'error': 'Idempotency-Key was already used for a different request'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        elif record.response_status is None:
+            return in_progress()
+        else:
+            response = Response(record.response_body, status=record.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        # Only the request holding the lease may finish or release the key
+        owned = IdempotencyKey.objects.filter(pk=record.pk, expires_at=lease_until)
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            owned.delete()
+            raise
+
+        if response.status_code >= 500:
+            # Let the client retry server errors for real
+            owned.delete()
+        else:
+            owned.update(response_status=response.status_code, response_body=response.data,
+                         expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL))
+        return response
+
+    return wrapper
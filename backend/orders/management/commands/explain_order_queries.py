@@ -0,0 +1,124 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from catalog.models import Category, Product, ProductVariant
+from orders.models import Order, OrderItem
+from users.models import User
+
+BATCH_SIZE = 1000
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway order history, run EXPLAIN on the hot order/analytics '
+        'queries and check that the planner uses the expected indexes. '
+        'Everything is rolled back unless --keep is passed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=20000)
+        parser.add_argument('--customers', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded rows instead of rolling back')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan for every query')
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            customer = self.seed(options['orders'], options['customers'], random.Random(options['seed']))
+            self.analyze()
+            for label, queryset, expected in self.get_checks(customer):
+                plan = queryset.explain()
+                used = [name for name in expected if name in plan]
+                if used:
+                    self.stdout.write(self.style.SUCCESS(f'OK   {label}: {", ".join(used)}'))
+                else:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'MISS {label}: expected one of {", ".join(expected)}'))
+                if options['verbose_plans'] or not used:
+                    self.stdout.write(plan)
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'{len(failures)} queries did not use their indexes: {", ".join(failures)}')
+
+    def get_checks(self, customer):
+        since = timezone.now() - timedelta(days=7)
+        return [
+            ('customer order list',
+             Order.objects.filter(user=customer).order_by('-created_at', '-id'),
+             ['order_user_created_idx']),
+            ('status filter',
+             Order.objects.filter(status='pending').order_by('-created_at', '-id'),
+             ['order_status_created_idx']),
+            ('baker order list page',
+             Order.objects.order_by('-created_at', '-id')[:20],
+             ['order_created_id_idx']),
+            ('paid sales trend',
+             Order.objects.filter(payment_status='paid', created_at__gte=since)
+             .annotate(date=TruncDate('created_at')).values('date')
+             .annotate(daily_revenue=models.Sum('final_amount')),
+             ['order_payment_created_idx']),
+            ('top products',
+             OrderItem.objects.filter(order__payment_status='paid').values('product__name')
+             .annotate(total_sold=models.Sum('quantity'), revenue=models.Sum('subtotal')),
+             ['order_payment_created_idx', 'orderitem_order_product_idx']),
+        ]
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            for model in (Order, OrderItem):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def seed(self, order_count, customer_count, rng):
+        self.stdout.write(f'Seeding {customer_count} customers and {order_count} orders...')
+        run = rng.randrange(10 ** 9)
+        users = User.objects.bulk_create([
+            User(email=f'explain-{run}-{i}@example.com', name=f'Explain Customer {i}')
+            for i in range(customer_count)
+        ], batch_size=BATCH_SIZE)
+        category = Category.objects.create(name=f'Explain {run}', slug=f'explain-{run}')
+        products = Product.objects.bulk_create([
+            Product(category=category, name=f'Explain Product {i}') for i in range(20)
+        ])
+        variants = ProductVariant.objects.bulk_create([
+            ProductVariant(product=product, label='Standard', price=Decimal(rng.randrange(200, 2000)))
+            for product in products
+        ])
+
+        statuses = [choice for choice, _ in Order.STATUS_CHOICES]
+        payment_statuses = [choice for choice, _ in Order.PAYMENT_STATUS_CHOICES]
+        orders = Order.objects.bulk_create([
+            Order(
+                user=rng.choice(users),
+                status=rng.choice(statuses),
+                payment_status=rng.choice(payment_statuses),
+                delivery_type='pickup',
+                delivery_date=date.today(),
+                delivery_slot='10:00-11:00 AM',
+            )
+            for _ in range(order_count)
+        ], batch_size=BATCH_SIZE)
+
+        # created_at is auto_now_add; spread the history over a year, newest last
+        ids = sorted(order.pk for order in orders)
+        now = timezone.now()
+        per_day = max(1, len(ids) // 365)
+        chunks = [ids[start:start + per_day] for start in range(0, len(ids), per_day)]
+        for index, chunk in enumerate(chunks):
+            days_ago = (len(chunks) - 1 - index) * 365 // len(chunks)
+            Order.objects.filter(pk__range=(chunk[0], chunk[-1])).update(created_at=now - timedelta(days=days_ago))
+
+        items = []
+        for order in orders:
+            for variant in rng.sample(variants, rng.randint(1, 3)):
+                quantity = rng.randint(1, 3)
+                items.append(OrderItem(order=order, product_id=variant.product_id, product_variant=variant,
+                                       quantity=quantity, unit_price=variant.price,
+                                       subtotal=variant.price * quantity))
+        OrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+        return users[0]
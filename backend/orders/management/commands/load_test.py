@@ -0,0 +1,60 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from utils.loadtest import run_load_test
+from utils.seeding import BENCHMARK_PASSWORD
+
+class Command(BaseCommand):
+    help = (
+        'Drive a running server with concurrent customer and baker virtual users '
+        'and report p50/p95/p99 latency, RPS and error rate per endpoint. '
+        'Seed the target first with seed_benchmark; the run places real orders '
+        'and moves real orders along, so never point it at production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the server under test')
+        parser.add_argument('--customers', type=int, default=8, help='Concurrent customer virtual users')
+        parser.add_argument('--bakers', type=int, default=2, help='Concurrent baker virtual users')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run for')
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help='Average pause in seconds between flow iterations of one user')
+        parser.add_argument('--baker-email', default='bench42-baker@example.com')
+        parser.add_argument('--baker-password', default=BENCHMARK_PASSWORD)
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the users\' product and order choices')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+        parser.add_argument('--output', help='JSON results file; default is loadtest-<timestamp>.json')
+
+    def handle(self, *args, **options):
+        if options['customers'] < 0 or options['bakers'] < 0 or options['customers'] + options['bakers'] == 0:
+            raise CommandError('Run at least one customer or baker virtual user')
+        if options['duration'] <= 0:
+            raise CommandError('--duration must be positive')
+
+        started_at = timezone.now()
+        self.stdout.write(f"Running {options['customers']} customers and {options['bakers']} bakers "
+                          f"against {options['url']} for {options['duration']:g}s...")
+        report = run_load_test(
+            options['url'], options['customers'], options['bakers'], options['duration'],
+            options['baker_email'], options['baker_password'],
+            think_time=options['think_time'], seed=options['seed'], timeout=options['timeout'],
+        )
+        report = {'started_at': started_at.isoformat(), **report}
+
+        self.print_table(report)
+        output = options['output'] or f"loadtest-{started_at:%Y%m%d-%H%M%S}.json"
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results saved to {output}'))
+
+    def print_table(self, report):
+        row = '{:<34} {:>7} {:>7} {:>8} {:>8} {:>8} {:>8} {:>7}'
+        self.stdout.write(row.format('endpoint', 'reqs', 'rps', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms', 'err %'))
+        rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+        for label, stats in rows:
+            line = row.format(label, stats['requests'], stats['rps'], *(
+                '-' if stats[key] is None else stats[key] for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+            ), round(stats['error_rate'] * 100, 1))
+            self.stdout.write(self.style.ERROR(line) if stats['errors'] else line)
+        for error in report['sample_errors']:
+            self.stdout.write(self.style.WARNING(f'  {error}'))
@@ -0,0 +1,23 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from orders.rollups import rebuild_rollups
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the daily sales rollups behind the analytics dashboard from '
+        'the orders table. Run once after deploying them, and whenever orders '
+        'were changed with bulk updates that bypass signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=date.fromisoformat,
+                            help='First order date to rebuild (YYYY-MM-DD); default is the beginning')
+        parser.add_argument('--to', dest='end', type=date.fromisoformat,
+                            help='Last order date to rebuild (YYYY-MM-DD); default is the latest')
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start and end and start > end:
+            raise CommandError('--from must not be after --to')
+        days = rebuild_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sales rollups for {days} days'))
@@ -0,0 +1,30 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from orders.outbox import process_batch
+from utils.push import poll_push_receipts
+
+class Command(BaseCommand):
+    help = 'Deliver queued order notifications (push and email) from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the due messages once and exit')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Outbox worker started')
+        next_receipt_poll = 0
+        while True:
+            if time.monotonic() >= next_receipt_poll:
+                poll_push_receipts()
+                next_receipt_poll = time.monotonic() + settings.EXPO_RECEIPT_POLL_INTERVAL
+
+            sent, failed = process_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Delivered {sent}, failed {failed}')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,47 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from utils.seeding import BENCHMARK_PASSWORD, BenchmarkSeeder
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large, realistic dataset (customers, catalog, coupons and a '
+        'year of orders) for load tests and query profiling. The same --seed '
+        'and --end-date always produce the same rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--coupons', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--days', type=int, default=365, help='Spread orders over this many days')
+        parser.add_argument('--end-date', type=date.fromisoformat,
+                            help='Date of the newest orders (YYYY-MM-DD); default is today')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete rows from a previous run with the same seed first')
+
+    def handle(self, *args, **options):
+        for name in ('customers', 'products', 'orders', 'days', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} must be at least 1')
+        if options['coupons'] < 0:
+            raise CommandError('--coupons must not be negative')
+
+        seeder = BenchmarkSeeder(seed=options['seed'], end_date=options['end_date'], days=options['days'],
+                                 batch_size=options['batch_size'], log=self.stdout.write)
+        if seeder.exists():
+            if not options['replace']:
+                raise CommandError(f'Data for seed {seeder.seed} already exists; pass --replace to recreate it')
+            self.stdout.write(f'Removing previous {seeder.tag} data...')
+            seeder.clear()
+
+        started = time.perf_counter()
+        counts = seeder.run(options['customers'], options['orders'], options['products'], options['coupons'])
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary} in {elapsed:.1f}s'))
+        self.stdout.write(f'Log in as {seeder.tag}-baker@example.com or {seeder.tag}-customer0@example.com '
+                          f'with password "{BENCHMARK_PASSWORD}"')
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DailySalesRollup = apps.get_model('orders', 'DailySalesRollup')
+    DailyProductSalesRollup = apps.get_model('orders', 'DailyProductSalesRollup')
+    DailyCustomerSalesRollup = apps.get_model('orders', 'DailyCustomerSalesRollup')
+    sale = Q(payment_status='paid') & ~Q(status='cancelled')
+
+    placed = Order.objects.annotate(date=TruncDate('created_at'))
+    DailySalesRollup.objects.bulk_create([
+        DailySalesRollup(date=row['date'], order_count=row['order_count'],
+                         paid_order_count=row['paid_order_count'], revenue=row['revenue'] or 0)
+        for row in placed.values('date').annotate(
+            order_count=Count('id'), paid_order_count=Count('id', filter=sale),
+            revenue=Sum('final_amount', filter=sale))
+    ], batch_size=1000)
+    DailyCustomerSalesRollup.objects.bulk_create([
+        DailyCustomerSalesRollup(date=row['date'], user_id=row['user'],
+                                 order_count=row['order_count'], revenue=row['revenue'])
+        for row in placed.filter(sale).values('date', 'user').annotate(
+            order_count=Count('id'), revenue=Sum('final_amount'))
+    ], batch_size=1000)
+    items = (OrderItem.objects.filter(order__payment_status='paid').exclude(order__status='cancelled')
+             .annotate(date=TruncDate('order__created_at')))
+    DailyProductSalesRollup.objects.bulk_create([
+        DailyProductSalesRollup(date=row['date'], product_id=row['product'],
+                                quantity=row['sold'], revenue=row['revenue'])
+        for row in items.values('date', 'product').annotate(
+            sold=Sum('quantity'), revenue=Sum('subtotal'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_catalogversion'),
+        ('orders', '0006_outboxmessage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('paid_order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyCustomerSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'user'), name='unique_customer_sales_per_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalog.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='unique_product_sales_per_day')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from users.models import User, Address
 from catalog.models import Product, ProductVariant
 
@@ -38,7 +40,37 @@ class Order(models.Model):
     payment_reference = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Matched to the hot access paths: customer order list, status filter,
+        # keyset pagination over (created_at, id) and paid-orders analytics.
+        # `manage.py explain_order_queries` checks the planner picks them up.
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='order_status_created_idx'),
+            models.Index(fields=['payment_status', '-created_at'], name='order_payment_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+            # Ingredient planning reads upcoming deliveries (inventory.planning)
+            models.Index(fields=['delivery_date', 'status'], name='order_delivery_status_idx'),
+        ]
     
+    # Remembered as loaded so orders.signals can tell what a save actually changed
+    TRACKED_FIELDS = ('status', 'payment_status', 'final_amount')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded = instance.get_tracked_values()
+        return instance
+
+    def get_tracked_values(self):
+        return {name: self.__dict__.get(name) for name in self.TRACKED_FIELDS}
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the old values by now
+        self._loaded = self.get_tracked_values()
+
     def __str__(self):
         return f"Order #{self.id} - {self.user.email}"
 
@@ -51,6 +83,120 @@ class OrderItem(models.Model):
     subtotal = models.DecimalField(max_digits=10, decimal_places=2)
     custom_cake_config = models.JSONField(null=True, blank=True)
     message_on_cake = models.CharField(max_length=500, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Covering index for per-product aggregation over a set of orders
+            models.Index(fields=['order', 'product', 'quantity', 'subtotal'],
+                         name='orderitem_order_product_idx'),
+        ]
     
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a write made with an Idempotency-Key header.
+    A retry with the same key replays the stored response instead of
+    executing the write (and its notifications) again. See orders.idempotency.
+    """
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    # Null while the original request is still being processed
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
+
+class OutboxMessage(models.Model):
+    """
+    Notification work recorded in the same transaction as the order change
+    and delivered later by `manage.py run_outbox_worker` (see orders.outbox).
+    """
+    EVENT_CHOICES = [
+        ('order_created', 'Order Created'),
+        ('order_status_changed', 'Order Status Changed'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    event = models.CharField(max_length=50, choices=EVENT_CHOICES)
+    order = models.ForeignKey(Order, related_name='outbox_messages', on_delete=models.CASCADE)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest time the worker may pick the message up (retry backoff / claim lease)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} for Order #{self.order_id} ({self.status})"
+
+class DailySalesRollup(models.Model):
+    """
+    Per-day order totals kept up to date by orders.signals as orders are
+    created, paid, refunded or cancelled (see orders.rollups), so analytics
+    reads a row per day instead of aggregating every order.
+    Dates are the local date the order was placed.
+    """
+    date = models.DateField(unique=True)
+    # Every order placed that day, whatever its status
+    order_count = models.PositiveIntegerField(default=0)
+    # Orders that are paid and not cancelled
+    paid_order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Sales on {self.date}"
+
+class DailyProductSalesRollup(models.Model):
+    """Quantity and revenue per product per day, over paid orders"""
+    date = models.DateField()
+    product = models.ForeignKey(Product, related_name='+', on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='unique_product_sales_per_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.date}"
+
+class DailyCustomerSalesRollup(models.Model):
+    """Paid orders and spend per customer per day"""
+    date = models.DateField()
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user'], name='unique_customer_sales_per_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} on {self.date}"
@@ -0,0 +1,181 @@
+import logging
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from utils.email import build_order_status_email
+from utils.mail import MailBatch
+from utils.push import PushDispatcher
+from .models import Order, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+def enqueue(event, order, **payload):
+    """Record notification work; call inside the transaction that changes the order"""
+    return OutboxMessage.objects.create(event=event, order=order, payload=payload)
+
+def enqueue_status_change(order, from_status):
+    """
+    Record a status change, coalescing bursts per order.
+
+    The message is held for OUTBOX_COALESCE_SECONDS; a further change within
+    that window folds into the same message and restarts the timer (up to
+    OUTBOX_COALESCE_MAX_SECONDS after the first change). The customer then
+    gets one email reflecting the latest status.
+    """
+    now = timezone.now()
+    pending = (OutboxMessage.objects
+               .filter(order=order, event='order_status_changed', status='pending', attempts=0)
+               .order_by('-id').first())
+    if pending is not None:
+        deadline = pending.created_at + timedelta(seconds=settings.OUTBOX_COALESCE_MAX_SECONDS)
+        available_at = min(now + timedelta(seconds=settings.OUTBOX_COALESCE_SECONDS), deadline)
+        payload = {**pending.payload, 'status': order.status}
+        # Only fold into the message if no worker has claimed it in the meantime
+        if OutboxMessage.objects.filter(pk=pending.pk, status='pending', attempts=0).update(
+                payload=payload, available_at=max(available_at, pending.available_at)):
+            return pending
+
+    return OutboxMessage.objects.create(
+        event='order_status_changed',
+        order=order,
+        payload={'from_status': from_status, 'status': order.status},
+        available_at=now + timedelta(seconds=settings.OUTBOX_COALESCE_SECONDS),
+    )
+
+class DeliveryBatch:
+    """
+    Side effects collected from one batch of outbox messages and sent together:
+    every push goes out through a single PushDispatcher and every email over
+    one pooled SMTP session.
+    """
+
+    def __init__(self):
+        self.push = PushDispatcher()
+        self.mail = MailBatch()
+        self.baker_tokens = []
+        self.orders = {}
+
+    def send(self):
+        """Send everything collected; returns ids of outbox messages to retry"""
+        return self.push.send() | self.mail.send()
+
+def baker_push_tokens():
+    from users.models import User
+
+    return list(User.objects.filter(role='baker')
+                .exclude(expo_push_token__isnull=True).exclude(expo_push_token='')
+                .values_list('expo_push_token', flat=True))
+
+def notify_bakers_of_new_order(message, batch):
+    # A retry only pushes to the bakers an earlier attempt didn't reach
+    delivered = set(message.payload.get('delivered_tokens', []))
+    for token in batch.baker_tokens:
+        if token in delivered:
+            continue
+        batch.push.add(
+            token,
+            title="New Order Received! 🎂",
+            message=f"Order #{message.order_id} has been placed.",
+            data={'order_id': message.order_id},
+            source=message.id,
+        )
+
+def notify_customer_of_status_change(message, batch):
+    order = batch.orders[message.order_id]
+    if order.status == message.payload.get('from_status'):
+        # The burst ended where it started (e.g. confirmed -> ready -> confirmed)
+        return
+    batch.mail.add(build_order_status_email(order), source=message.id)
+
+HANDLERS = {
+    'order_created': notify_bakers_of_new_order,
+    'order_status_changed': notify_customer_of_status_change,
+}
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at OUTBOX_MAX_BACKOFF seconds"""
+    delay = min(settings.OUTBOX_BASE_BACKOFF * 2 ** max(attempts - 1, 0), settings.OUTBOX_MAX_BACKOFF)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+def claim_batch(batch_size):
+    """
+    Lease up to batch_size due messages to this worker.
+    Leased messages whose worker died become due again once the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'processing'], available_at__lte=now)
+            .order_by('available_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboxMessage.objects.filter(pk__in=ids).update(
+            status='processing',
+            attempts=F('attempts') + 1,
+            available_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+        )
+    return list(OutboxMessage.objects.filter(pk__in=ids).order_by('available_at', 'id'))
+
+def mark_failed(message, error):
+    logger.warning("Outbox message %s (%s) failed on attempt %s: %s",
+                   message.id, message.event, message.attempts, error)
+    message.last_error = str(error)
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = 'failed'
+    else:
+        message.status = 'pending'
+        message.available_at = timezone.now() + retry_delay(message.attempts)
+    message.save(update_fields=['status', 'available_at', 'last_error', 'payload'])
+
+def mark_sent(message):
+    message.status = 'sent'
+    message.sent_at = timezone.now()
+    message.save(update_fields=['status', 'sent_at'])
+
+def process_batch(batch_size=None):
+    """Deliver one batch of due messages; returns (sent, failed)"""
+    messages = claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not messages:
+        return 0, 0
+
+    batch = DeliveryBatch()
+    if any(message.event == 'order_created' for message in messages):
+        batch.baker_tokens = baker_push_tokens()
+    status_order_ids = {message.order_id for message in messages if message.event == 'order_status_changed'}
+    if status_order_ids:
+        batch.orders = (Order.objects.select_related('user')
+                        .prefetch_related('items__product', 'items__product_variant')
+                        .in_bulk(status_order_ids))
+
+    handled, failed = [], 0
+    for message in messages:
+        handler = HANDLERS.get(message.event)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for outbox event '{message.event}'")
+            handler(message, batch)
+        except Exception as exc:
+            mark_failed(message, exc)
+            failed += 1
+        else:
+            handled.append(message)
+
+    retry = batch.send()
+    sent = 0
+    for message in handled:
+        if message.id in retry:
+            delivered = batch.push.delivered.get(message.id)
+            if delivered:
+                message.payload = {**message.payload, 'delivered_tokens': sorted(
+                    {*message.payload.get('delivered_tokens', []), *delivered})}
+            mark_failed(message, 'Delivery failed, see worker log')
+            failed += 1
+        else:
+            mark_sent(message)
+            sent += 1
+    return sent, failed
@@ -0,0 +1,219 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import serializers
+from catalog.models import Product, ProductVariant, CakeBase, CakeFlavour, CakeShape, CakeWeight
+from coupons.models import Coupon
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+# Added to final_amount for delivery orders, as quoted at checkout
+DELIVERY_FEE = Decimal('50.00')
+
+# Every custom cake starts here before its options are added; the same base
+# is quoted by CustomCakePriceView and the mobile custom-cake screen
+CUSTOM_CAKE_BASE_PRICE = Decimal('500.00')
+
+# custom_cake_config key -> option model, e.g. {"base": 1, "flavour": 3, "shape": 2, "weight": 4}
+CUSTOM_CAKE_OPTIONS = {
+    'base': CakeBase,
+    'flavour': CakeFlavour,
+    'shape': CakeShape,
+    'weight': CakeWeight,
+}
+
+def _item_error(index, message):
+    return serializers.ValidationError({'items': {index: message}})
+
+def _load_custom_cake_options(items):
+    """Fetch every cake option referenced by the cart, one query per option table"""
+    wanted = {key: set() for key in CUSTOM_CAKE_OPTIONS}
+    for item in items:
+        config = item.get('custom_cake_config')
+        if not isinstance(config, dict):
+            continue
+        for key in CUSTOM_CAKE_OPTIONS:
+            if config.get(key) is not None:
+                wanted[key].add(config[key])
+
+    options = {}
+    for key, model in CUSTOM_CAKE_OPTIONS.items():
+        ids = {value for value in wanted[key] if isinstance(value, int)}
+        options[key] = model.objects.filter(is_active=True).in_bulk(ids) if ids else {}
+    return options
+
+def price_custom_cake(config, options, index):
+    """CUSTOM_CAKE_BASE_PRICE plus the prices of the options selected in a custom_cake_config"""
+    if not isinstance(config, dict):
+        raise _item_error(index, 'custom_cake_config must be an object.')
+
+    unit_price = CUSTOM_CAKE_BASE_PRICE
+    selected = 0
+    for key in CUSTOM_CAKE_OPTIONS:
+        option_id = config.get(key)
+        if option_id is None:
+            continue
+        option = options[key].get(option_id) if isinstance(option_id, int) else None
+        if option is None:
+            raise _item_error(index, f'Unknown or inactive cake {key} {option_id}.')
+        unit_price += option.price
+        selected += 1
+
+    if not selected:
+        raise _item_error(index, 'custom_cake_config has no options selected.')
+    return unit_price
+
+def price_order_items(items, prefetch=True):
+    """
+    Price cart lines server-side.
+
+    `items` is a list of dicts with product_id / product_variant_id / quantity
+    and optionally custom_cake_config. Variants (with their products), bare
+    products and cake options are loaded in bulk, so the query count doesn't
+    depend on cart size. `prefetch` also loads what ProductSerializer needs to
+    render the lines. Every line needs a product or variant, custom cakes too,
+    since that is what an order item is stored against.
+
+    Returns (lines, total_amount) where each line is the input dict extended
+    with the resolved `product`, `product_variant`, `unit_price` and `subtotal`.
+    Raises serializers.ValidationError for unknown or mismatched references.
+    """
+    variant_ids = {item['product_variant_id'] for item in items if item.get('product_variant_id')}
+    product_ids = {
+        item['product_id'] for item in items
+        if item.get('product_id') and not item.get('product_variant_id')
+    }
+
+    variants = {}
+    if variant_ids:
+        queryset = ProductVariant.objects.select_related('product__category')
+        if prefetch:
+            queryset = queryset.prefetch_related('product__images', 'product__variants')
+        variants = queryset.in_bulk(variant_ids)
+    products = {}
+    if product_ids:
+        queryset = Product.objects.select_related('category').annotate(variant_count=Count('variants'))
+        if prefetch:
+            queryset = queryset.prefetch_related('images', 'variants')
+        products = queryset.in_bulk(product_ids)
+
+    has_custom = any(item.get('custom_cake_config') for item in items)
+    cake_options = _load_custom_cake_options(items) if has_custom else {}
+
+    lines = []
+    total_amount = ZERO
+    for index, item in enumerate(items):
+        variant_id = item.get('product_variant_id')
+        product_id = item.get('product_id')
+        config = item.get('custom_cake_config')
+        quantity = item.get('quantity', 1)
+
+        if quantity < 1:
+            raise _item_error(index, 'Quantity must be at least 1.')
+
+        product = variant = None
+        if variant_id:
+            variant = variants.get(variant_id)
+            if variant is None:
+                raise _item_error(index, f'Unknown product variant {variant_id}.')
+            if product_id and variant.product_id != product_id:
+                raise _item_error(index, 'Variant does not belong to product.')
+            product = variant.product
+        elif product_id:
+            product = products.get(product_id)
+            if product is None:
+                raise _item_error(index, f'Unknown product {product_id}.')
+
+        if product is None:
+            raise _item_error(index, 'A product or variant is required.')
+
+        if config:
+            unit_price = price_custom_cake(config, cake_options, index)
+        elif variant is not None:
+            unit_price = variant.price
+        elif product.variant_count:
+            raise _item_error(index, f'Choose a variant of product {product.pk}.')
+        elif not product.min_price:
+            raise _item_error(index, f'Product {product.pk} has no price.')
+        else:
+            unit_price = product.min_price
+
+        subtotal = unit_price * quantity
+        total_amount += subtotal
+        lines.append({
+            **item,
+            'product': product,
+            'product_variant': variant,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'subtotal': subtotal,
+        })
+
+    return lines, total_amount
+
+def apply_coupon(code, user, total_amount, lock=False):
+    """
+    Validate a coupon code against its rules and return (coupon, discount_amount).
+
+    Usage counts are annotated onto the coupon lookup, so a preview validates
+    with a single query. Pass lock=True inside a transaction to serialize concurrent
+    checkouts racing for the last use of a coupon.
+    """
+    if not code:
+        return None, ZERO
+
+    queryset = Coupon.objects.filter(code__iexact=str(code).strip(), is_active=True)
+    if lock:
+        # Row lock first; aggregate counts can't be combined with FOR UPDATE
+        coupon = queryset.select_for_update().first()
+        if coupon:
+            coupon.total_uses = coupon.usages.count()
+            coupon.user_uses = coupon.usages.filter(user=user).count()
+    else:
+        coupon = queryset.annotate(
+            total_uses=Count('usages'),
+            user_uses=Count('usages', filter=Q(usages__user=user)),
+        ).first()
+
+    if coupon is None:
+        raise serializers.ValidationError({'coupon_code': 'Invalid coupon code.'})
+
+    today = timezone.localdate()
+    if not coupon.start_date <= today <= coupon.end_date:
+        raise serializers.ValidationError({'coupon_code': 'This coupon is not valid today.'})
+    if total_amount < coupon.min_order_amount:
+        raise serializers.ValidationError(
+            {'coupon_code': f'Minimum order amount for this coupon is ₹{coupon.min_order_amount}.'}
+        )
+    if coupon.max_uses is not None and coupon.total_uses >= coupon.max_uses:
+        raise serializers.ValidationError({'coupon_code': 'This coupon has been fully redeemed.'})
+    if coupon.user_uses >= coupon.max_uses_per_user:
+        raise serializers.ValidationError({'coupon_code': 'You have already used this coupon.'})
+
+    if coupon.discount_type == 'percentage':
+        discount = (total_amount * coupon.discount_value / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+    else:
+        discount = coupon.discount_value
+    return coupon, min(discount, total_amount)
+
+def delivery_fee(delivery_type):
+    return DELIVERY_FEE if delivery_type == 'delivery' else ZERO
+
+def quote_order(items, user, coupon_code=None, delivery_type=None, prefetch=True, lock_coupon=False):
+    """
+    Price a cart, apply an optional coupon and add the delivery fee.
+    Used by both the preview endpoint and order creation so they always agree.
+    Coupons discount the items only; final_amount includes the fee.
+    """
+    lines, total_amount = price_order_items(items, prefetch=prefetch)
+    coupon, discount_amount = apply_coupon(coupon_code, user, total_amount, lock=lock_coupon)
+    fee = delivery_fee(delivery_type)
+    return {
+        'lines': lines,
+        'coupon': coupon,
+        'total_amount': total_amount,
+        'discount_amount': discount_amount,
+        'delivery_fee': fee,
+        'final_amount': total_amount - discount_amount + fee,
+    }
@@ -0,0 +1,152 @@
+import operator
+from datetime import datetime, time, timedelta
+from functools import reduce
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .analytics import invalidate_reports
+from .models import DailyCustomerSalesRollup, DailyProductSalesRollup, DailySalesRollup, Order, OrderItem
+
+BATCH_SIZE = 1000
+
+def sale_filter(prefix=''):
+    """Orders that count towards revenue: paid and not since cancelled"""
+    return Q(**{f'{prefix}payment_status': 'paid'}) & ~Q(**{f'{prefix}status': 'cancelled'})
+
+def counts_as_sale(values):
+    return values.get('payment_status') == 'paid' and values.get('status') != 'cancelled'
+
+def _add(model, key_fields, rows):
+    """
+    Add deltas to rollup rows, creating missing rows at zero first.
+    `rows` maps a tuple of key_fields values to {column: delta}.
+    """
+    if not rows:
+        return
+    model.objects.bulk_create([model(**dict(zip(key_fields, key))) for key in rows], ignore_conflicts=True)
+
+    # One UPDATE for all rows, however many products an order has
+    matches = {key: Q(**dict(zip(key_fields, key))) for key in rows}
+    columns = {column for deltas in rows.values() for column in deltas}
+    model.objects.filter(reduce(operator.or_, matches.values())).update(**{
+        column: F(column) + Case(
+            *[When(matches[key], then=Value(deltas[column])) for key, deltas in rows.items() if column in deltas],
+            default=Value(0),
+            output_field=model._meta.get_field(column),
+        )
+        for column in columns
+    })
+
+def _apply_sale(order, day, sign, amount, products=True):
+    _add(DailySalesRollup, ('date',), {
+        (day,): {'paid_order_count': sign, 'revenue': sign * amount},
+    })
+    _add(DailyCustomerSalesRollup, ('date', 'user_id'), {
+        (day, order.user_id): {'order_count': sign, 'revenue': sign * amount},
+    })
+    if products:
+        _apply_product_sale(order, day, sign)
+
+def _apply_product_sale(order, day, sign):
+    products = (OrderItem.objects.filter(order=order).values('product')
+                .annotate(sold=Sum('quantity'), revenue=Sum('subtotal')))
+    _add(DailyProductSalesRollup, ('date', 'product_id'), {
+        (day, row['product']): {'quantity': sign * row['sold'], 'revenue': sign * row['revenue']}
+        for row in products
+    })
+
+def record_order_save(order, created, previous):
+    """
+    Apply a saved order's effect on the rollups. Called from post_save, so it
+    runs in the same transaction as the change; `previous` holds the tracked
+    values the order was loaded with.
+
+    A new order has no items yet when it is first saved, so its product
+    rollups are left to record_order_items() once they are inserted.
+    """
+    day = timezone.localdate(order.created_at)
+    if created:
+        _add(DailySalesRollup, ('date',), {(day,): {'order_count': 1}})
+        invalidate_reports()
+
+    old_amount = previous.get('final_amount') if not created and counts_as_sale(previous) else None
+    new_amount = order.final_amount if counts_as_sale(order.get_tracked_values()) else None
+    if old_amount == new_amount:
+        # Not a sale before or after, or a sale whose amount didn't change
+        return
+    invalidate_reports()
+    if old_amount is not None:
+        _apply_sale(order, day, -1, old_amount)
+    if new_amount is not None:
+        _apply_sale(order, day, 1, new_amount, products=not created)
+
+def record_order_items(order):
+    """
+    Add a new order's items to the product rollups if it was created as a
+    sale. Call in the creating transaction, after the items are inserted.
+    """
+    if counts_as_sale(order.get_tracked_values()):
+        _apply_product_sale(order, timezone.localdate(order.created_at), 1)
+
+def record_order_delete(order):
+    """Take a deleted order back out of the rollups; called from pre_delete while its items still exist"""
+    day = timezone.localdate(order.created_at)
+    _add(DailySalesRollup, ('date',), {(day,): {'order_count': -1}})
+    invalidate_reports()
+    stored = getattr(order, '_loaded', None) or order.get_tracked_values()
+    if counts_as_sale(stored):
+        _apply_sale(order, day, -1, stored['final_amount'])
+
+def rebuild_rollups(start=None, end=None):
+    """
+    Recompute the rollups from scratch for orders placed between the `start`
+    and `end` dates (inclusive, either may be None for open-ended).
+    Returns the number of daily sales rows written.
+    """
+    dates, placed_at = Q(), {}
+    if start:
+        dates &= Q(date__gte=start)
+        placed_at['created_at__gte'] = timezone.make_aware(datetime.combine(start, time.min))
+    if end:
+        dates &= Q(date__lte=end)
+        placed_at['created_at__lt'] = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+
+    with transaction.atomic():
+        for model in (DailySalesRollup, DailyProductSalesRollup, DailyCustomerSalesRollup):
+            model.objects.filter(dates).delete()
+
+        placed = Order.objects.filter(**placed_at).annotate(date=TruncDate('created_at'))
+        days = DailySalesRollup.objects.bulk_create([
+            DailySalesRollup(date=row['date'], order_count=row['order_count'],
+                             paid_order_count=row['paid_order_count'], revenue=row['revenue'] or 0)
+            for row in placed.values('date').annotate(
+                order_count=Count('id'),
+                paid_order_count=Count('id', filter=sale_filter()),
+                revenue=Sum('final_amount', filter=sale_filter()),
+            )
+        ], batch_size=BATCH_SIZE)
+
+        DailyCustomerSalesRollup.objects.bulk_create([
+            DailyCustomerSalesRollup(date=row['date'], user_id=row['user'],
+                                     order_count=row['order_count'], revenue=row['revenue'])
+            for row in placed.filter(sale_filter()).values('date', 'user').annotate(
+                order_count=Count('id'),
+                revenue=Sum('final_amount'),
+            )
+        ], batch_size=BATCH_SIZE)
+
+        items = (OrderItem.objects
+                 .filter(sale_filter('order__'), **{f'order__{lookup}': value for lookup, value in placed_at.items()})
+                 .annotate(date=TruncDate('order__created_at')))
+        DailyProductSalesRollup.objects.bulk_create([
+            DailyProductSalesRollup(date=row['date'], product_id=row['product'],
+                                    quantity=row['sold'], revenue=row['revenue'])
+            for row in items.values('date', 'product').annotate(
+                sold=Sum('quantity'),
+                revenue=Sum('subtotal'),
+            )
+        ], batch_size=BATCH_SIZE)
+        invalidate_reports()
+
+    return len(days)
@@ -1,8 +1,22 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Order, OrderItem
+from .pricing import quote_order
+from .rollups import record_order_items
+from coupons.models import CouponUsage
+from users.models import User
 from users.serializers import AddressSerializer, UserSerializer
 from catalog.serializers import ProductSerializer, ProductVariantSerializer
 
+class OrderItemListSerializer(serializers.ListSerializer):
+    def get_attribute(self, instance):
+        # Items just created with the order are handed over in the context
+        # (see OrderViewSet.create) instead of being read back
+        created = self.context.get('created_items')
+        if created is not None and created['order'] == instance.pk:
+            return created['items']
+        return super().get_attribute(instance)
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_variant = ProductVariantSerializer(read_only=True)
@@ -13,7 +27,9 @@ class OrderItemSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = ['id', 'product', 'product_id', 'product_variant', 'product_variant_id', 
                   'quantity', 'unit_price', 'subtotal', 'custom_cake_config', 'message_on_cake']
-        read_only_fields = ['id', 'subtotal']
+        # Prices are always computed server-side (see orders.pricing)
+        read_only_fields = ['id', 'unit_price', 'subtotal']
+        list_serializer_class = OrderItemListSerializer
 
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
@@ -26,32 +42,92 @@ class OrderSerializer(serializers.ModelSerializer):
                   'delivery_address_detail', 'delivery_date', 'delivery_slot', 
                   'total_amount', 'discount_amount', 'final_amount', 'payment_status', 
                   'payment_reference', 'created_at', 'updated_at', 'items']
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        # Status and payment only change through the baker-only status and
+        # payment-status actions, and amounts only through orders.pricing
+        read_only_fields = ['id', 'user', 'status', 'total_amount', 'discount_amount', 'final_amount',
+                            'payment_status', 'created_at', 'updated_at']
+
+class OrderCustomerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'email', 'phone', 'place']
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    Compact representation for order lists.
+    Expects items prefetched with their product (see OrderViewSet.get_queryset).
+    """
+    user = OrderCustomerSerializer(read_only=True)
+    item_count = serializers.SerializerMethodField()
+    product_names = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Order
+        fields = ['id', 'user', 'status', 'payment_status', 'delivery_type', 'delivery_date',
+                  'delivery_slot', 'total_amount', 'discount_amount', 'final_amount',
+                  'created_at', 'item_count', 'product_names']
+        read_only_fields = fields
+
+    def get_item_count(self, obj):
+        return len(obj.items.all())
+
+    def get_product_names(self, obj):
+        return [item.product.name for item in obj.items.all()]
 
 class OrderCreateSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
+    coupon_code = serializers.CharField(write_only=True, required=False, allow_blank=True)
     
     class Meta:
         model = Order
         fields = ['delivery_type', 'delivery_address', 'delivery_date', 'delivery_slot', 
                   'total_amount', 'discount_amount', 'final_amount', 'payment_status', 
-                  'payment_reference', 'items']
+                  'payment_reference', 'items', 'coupon_code']
+        # Totals sent by the client are ignored and recomputed from the catalog
+        read_only_fields = ['total_amount', 'discount_amount', 'final_amount']
         extra_kwargs = {
             'delivery_address': {'required': False, 'allow_null': True},
             'payment_reference': {'required': False, 'allow_blank': True},
         }
+
+    def validate_items(self, value):
+        if not value:
+            raise serializers.ValidationError('An order needs at least one item.')
+        return value
     
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            # Calculate subtotal if not present (it's read-only in serializer)
-            if 'subtotal' not in item_data:
-                quantity = item_data.get('quantity', 1)
-                unit_price = item_data.get('unit_price', 0)
-                item_data['subtotal'] = quantity * unit_price
-            
-            OrderItem.objects.create(order=order, **item_data)
-        
+        coupon_code = validated_data.pop('coupon_code', None)
+
+        with transaction.atomic():
+            # Same engine as OrderViewSet.preview, so the charged totals match the preview
+            quote = quote_order(items_data, validated_data['user'], coupon_code=coupon_code,
+                                delivery_type=validated_data['delivery_type'], lock_coupon=True)
+            lines = quote['lines']
+            order = Order.objects.create(
+                total_amount=quote['total_amount'],
+                discount_amount=quote['discount_amount'],
+                final_amount=quote['final_amount'],
+                **validated_data
+            )
+            items = OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=line['product'],
+                    product_variant=line['product_variant'],
+                    quantity=line['quantity'],
+                    unit_price=line['unit_price'],
+                    subtotal=line['subtotal'],
+                    custom_cake_config=line.get('custom_cake_config'),
+                    message_on_cake=line.get('message_on_cake'),
+                )
+                for line in lines
+            ])
+            if quote['coupon']:
+                CouponUsage.objects.create(coupon=quote['coupon'], user=order.user, order=order)
+            # post_save ran before the items existed
+            record_order_items(order)
+
+        # Carry their already loaded products, so the response needn't read them back
+        self.created_items = items
         return order
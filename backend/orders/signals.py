@@ -1,31 +1,30 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 from .models import Order
-from users.models import User
-from utils.notifications import send_push_notification
-import threading
+from .outbox import enqueue, enqueue_status_change
+from .rollups import record_order_delete, record_order_save
+
+# Notifications are only recorded here; `manage.py run_outbox_worker` delivers them,
+# so request latency doesn't depend on Expo or SMTP.
 
 @receiver(post_save, sender=Order)
 def notify_bakers_on_new_order(sender, instance, created, **kwargs):
     if created:
-        bakers = User.objects.filter(role='baker').exclude(expo_push_token__isnull=True).exclude(expo_push_token='')
-        for baker in bakers:
-            send_push_notification(
-                token=baker.expo_push_token,
-                title="New Order Received! 🎂",
-                message=f"Order #{instance.id} has been placed.",
-                data={'order_id': instance.id}
-            )
+        enqueue('order_created', instance)
             
 @receiver(post_save, sender=Order)
 def notify_customer_on_status_change(sender, instance, created, **kwargs):
-    if not created:
-        # Send email in a separate thread to avoid Gunicorn timeouts
-        def send_async_email():
-            try:
-                from utils.email import send_order_status_email
-                send_order_status_email(instance)
-            except Exception as e:
-                print(f"Async Email Error: {e}")
+    previous_status = getattr(instance, '_loaded', {}).get('status')
+    # Payment-only and other saves that leave the status alone notify nobody
+    if not created and instance.status != previous_status:
+        enqueue_status_change(instance, previous_status)
+
+# The analytics rollups change in the same transaction as the order (see orders.rollups)
+
+@receiver(post_save, sender=Order)
+def update_sales_rollups(sender, instance, created, **kwargs):
+    record_order_save(instance, created, getattr(instance, '_loaded', {}))
 
-        threading.Thread(target=send_async_email).start()
+@receiver(pre_delete, sender=Order)
+def remove_from_sales_rollups(sender, instance, **kwargs):
+    record_order_delete(instance)
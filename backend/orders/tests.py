@@ -1,3 +1,904 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+from unittest import mock, skipUnless
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+from django.utils import timezone
+from exponent_server_sdk import PushReceipt, PushTicket as ExpoTicket
+from catalog.models import CakeBase, CakeFlavour, CakeShape, CakeWeight, Product, ProductVariant
+from coupons.models import Coupon, CustomCakeOption
+from users.models import PushTicket, User
+from utils.loadtest import ORDER_STATUS_FLOW, Recorder, percentile
+from utils.mail import MailBatch, reset_mail_connection, send_messages
+from utils.push import poll_push_receipts
+from utils.seeding import BenchmarkSeeder
+from utils.testing import (APIBudgetTestCase, APIClientTestCase, fake_redis, fakeredis, other_worker, seed_catalog,
+                           seed_orders)
+from .models import (DailyCustomerSalesRollup, DailyProductSalesRollup, DailySalesRollup, IdempotencyKey, Order,
+                     OutboxMessage)
+from .outbox import claim_batch, process_batch, retry_delay
+from .rollups import rebuild_rollups
 
-# Create your tests here.
+class OrderQueryBudgetTests(APIBudgetTestCase):
+    """Order endpoints must not run per-order or per-item queries"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        seed_catalog(10)
+        self.orders = seed_orders(self.customer, 5)
+        self.variants = list(ProductVariant.objects.select_related('product')[:8])
+
+    def grow_orders(self):
+        seed_orders(self.customer, 100, items_per_order=3)
+
+    def order_payload(self, lines):
+        return {
+            'delivery_type': 'pickup',
+            'delivery_date': (date.today() + timedelta(days=2)).isoformat(),
+            'delivery_slot': '10:00-11:00 AM',
+            'items': [
+                {'product_id': variant.product_id, 'product_variant_id': variant.pk, 'quantity': 2}
+                for variant in self.variants[:lines]
+            ],
+        }
+
+    def test_customer_order_list(self):
+        self.authenticate(self.customer)
+        self.assertScalesFlat(3, '/api/orders/', self.grow_orders)
+
+    def test_customer_order_list_full(self):
+        self.authenticate(self.customer)
+        self.assertScalesFlat(8, '/api/orders/?view=full', self.grow_orders)
+
+    def test_baker_order_list_page(self):
+        self.authenticate(self.baker)
+        response = self.assertScalesFlat(3, '/api/orders/?limit=20', self.grow_orders)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_baker_order_list_by_status(self):
+        self.authenticate(self.baker)
+        self.assertScalesFlat(3, '/api/orders/?status=pending', self.grow_orders)
+
+    def test_order_detail(self):
+        self.authenticate(self.customer)
+        self.assertRequestBudget(8, 'get', f'/api/orders/{self.orders[0].pk}/')
+
+    def test_order_create_does_not_grow_with_cart_size(self):
+        self.authenticate(self.customer)
+        small = self.assertRequestBudget(12, 'post', '/api/orders/', self.order_payload(1), status_code=201)
+        large = self.assertRequestBudget(12, 'post', '/api/orders/', self.order_payload(8), status_code=201)
+        self.assertEqual(small.query_count, large.query_count)
+        # The response carries the items just created, with their products
+        self.assertEqual([item['product']['id'] for item in large.data['items']],
+                         [variant.product_id for variant in self.variants[:8]])
+
+    def test_order_preview_does_not_grow_with_cart_size(self):
+        self.authenticate(self.customer)
+        small = self.assertRequestBudget(3, 'post', '/api/orders/preview/', self.order_payload(1))
+        large = self.assertRequestBudget(3, 'post', '/api/orders/preview/', self.order_payload(8))
+        self.assertEqual(small.query_count, large.query_count)
+
+    def test_update_status(self):
+        # Confirming an order also locks it and takes its ingredients out of stock (see inventory.consumption)
+        self.authenticate(self.baker)
+        self.assertRequestBudget(17, 'patch', f'/api/orders/{self.orders[0].pk}/status/', {'status': 'confirmed'})
+
+    def test_update_payment_status_does_not_grow_with_cart_size(self):
+        # Marking an order paid updates the per-product sales rollups
+        self.authenticate(self.baker)
+        small = seed_orders(self.customer, 1, items_per_order=1, payment_status='pending')[0]
+        large = seed_orders(self.customer, 1, items_per_order=8, payment_status='pending')[0]
+        small_response = self.assertRequestBudget(
+            18, 'patch', f'/api/orders/{small.pk}/payment-status/', {'payment_status': 'paid'})
+        large_response = self.assertRequestBudget(
+            18, 'patch', f'/api/orders/{large.pk}/payment-status/', {'payment_status': 'paid'})
+        self.assertEqual(small_response.query_count, large_response.query_count)
+
+    def test_order_update_does_not_grow_with_cart_size(self):
+        self.authenticate(self.customer)
+        small = seed_orders(self.customer, 1, items_per_order=1)[0]
+        large = seed_orders(self.customer, 1, items_per_order=8)[0]
+        small_response = self.assertRequestBudget(
+            16, 'patch', f'/api/orders/{small.pk}/', {'delivery_slot': '12:00-01:00 PM'})
+        large_response = self.assertRequestBudget(
+            16, 'patch', f'/api/orders/{large.pk}/', {'delivery_slot': '12:00-01:00 PM'})
+        self.assertEqual(small_response.query_count, large_response.query_count)
+        self.assertEqual(large_response.data['delivery_slot'], '12:00-01:00 PM')
+
+    def test_order_delete_does_not_grow_with_cart_size(self):
+        # A paid order leaves the sales rollups and returns its stock (see inventory.consumption)
+        self.authenticate(self.baker)
+        small = seed_orders(self.customer, 1, items_per_order=1)[0]
+        large = seed_orders(self.customer, 1, items_per_order=8)[0]
+        small_response = self.assertRequestBudget(23, 'delete', f'/api/orders/{small.pk}/', status_code=204)
+        large_response = self.assertRequestBudget(23, 'delete', f'/api/orders/{large.pk}/', status_code=204)
+        self.assertEqual(small_response.query_count, large_response.query_count)
+        self.assertFalse(Order.objects.filter(pk__in=[small.pk, large.pk]).exists())
+
+    def test_analytics(self):
+        self.authenticate(self.baker)
+        self.assertScalesFlat(5, '/api/orders/analytics/', self.grow_orders)
+
+    def test_analytics_range(self):
+        self.authenticate(self.baker)
+        start = (date.today() - timedelta(days=365)).isoformat()
+        self.assertScalesFlat(
+            7, f'/api/orders/analytics/?from={start}&granularity=month&compare=previous', self.grow_orders)
+
+class OrderPaginationTests(APIClientTestCase):
+    """Keyset cursors walk the order list both ways without skipping or repeating rows"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.authenticate(self.customer)
+        orders = seed_orders(self.customer, 7)
+        now = timezone.now()
+        for i, order in enumerate(orders):
+            order.created_at = now - timedelta(hours=i % 3)
+        Order.objects.bulk_update(orders, ['created_at'])
+        self.expected = list(Order.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [order['id'] for order in response.data['results']]
+
+    def test_next_and_previous_cursors(self):
+        pages, url = [], '/api/orders/?limit=3'
+        while url:
+            data, ids = self.get_page(url)
+            pages.append(ids)
+            url = data['next']
+        self.assertEqual([len(ids) for ids in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        # Walking back from the last page gives the same pages in reverse
+        back = []
+        while data['previous']:
+            data, ids = self.get_page(data['previous'])
+            back.append(ids)
+        self.assertEqual(back, pages[-2::-1])
+        self.assertIsNone(data['previous'])
+
+    def test_created_at_ties_are_broken_by_id(self):
+        Order.objects.update(created_at=timezone.now())
+        seen, url = [], '/api/orders/?limit=2'
+        while url:
+            data, ids = self.get_page(url)
+            seen += ids
+            url = data['next']
+        self.assertEqual(seen, sorted(self.expected, reverse=True))
+
+    def test_plain_list_without_limit_or_cursor(self):
+        response = self.client.get('/api/orders/')
+        self.assertEqual([order['id'] for order in response.data], self.expected)
+
+    def test_limit_is_clamped_and_bad_cursor_rejected(self):
+        self.assertEqual(len(self.get_page('/api/orders/?limit=0')[1]), 1)
+        self.assertEqual(self.get_page('/api/orders/?limit=abc')[1], self.expected)
+        self.assertEqual(self.client.get('/api/orders/?cursor=not-a-cursor').status_code, 404)
+
+class AnalyticsReportTests(APIClientTestCase):
+    """Analytics ranges, their granularity and comparison periods"""
+
+    PLACED = ['2025-03-03', '2026-01-05', '2026-01-07', '2026-02-10', '2026-02-10', '2026-02-25', '2026-03-03']
+
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.authenticate(User.objects.create_user(email='baker@example.com', password='secret',
+                                                   name='Baker', role='baker'))
+        orders = seed_orders(customer, len(self.PLACED))
+        for order, day in zip(orders, self.PLACED):
+            order.created_at = timezone.make_aware(datetime.combine(date.fromisoformat(day), time(12)))
+        Order.objects.bulk_update(orders, ['created_at'])
+        rebuild_rollups()
+        self.amount = orders[0].final_amount
+
+    def get_report(self, query, status_code=200):
+        response = self.client.get(f'/api/orders/analytics/?{query}')
+        self.assertEqual(response.status_code, status_code, response.data)
+        return response.data
+
+    def trend(self, trend):
+        return [(str(row['date']), row['revenue'] / self.amount, row['order_count']) for row in trend]
+
+    def test_month_buckets(self):
+        report = self.get_report('from=2026-01-01&to=2026-03-31&granularity=month')
+        self.assertEqual(self.trend(report['sales_trend']),
+                         [('2026-01-01', 2, 2), ('2026-02-01', 3, 3), ('2026-03-01', 1, 1)])
+        self.assertEqual((report['total_orders'], report['total_revenue']), (6, 6 * self.amount))
+
+    def test_week_buckets_start_on_monday(self):
+        # The first bucket is labelled by its Monday but only counts days in the range
+        report = self.get_report('from=2026-01-07&to=2026-01-13&granularity=week')
+        self.assertEqual(self.trend(report['sales_trend']), [('2026-01-05', 1, 1), ('2026-01-12', 0, 0)])
+
+    def test_day_buckets_fill_empty_days(self):
+        report = self.get_report('from=2026-02-09&to=2026-02-11')
+        self.assertEqual(self.trend(report['sales_trend']),
+                         [('2026-02-09', 0, 0), ('2026-02-10', 2, 2), ('2026-02-11', 0, 0)])
+
+    def test_compare_with_previous_period(self):
+        comparison = self.get_report('from=2026-02-01&to=2026-02-28&compare=previous')['comparison']
+        self.assertEqual((str(comparison['from']), str(comparison['to'])), ('2026-01-04', '2026-01-31'))
+        self.assertEqual(comparison['total_revenue'], 2 * self.amount)
+        self.assertEqual((comparison['revenue_change'], comparison['orders_change']), (50.0, 50.0))
+        self.assertEqual(len(comparison['sales_trend']), 28)
+
+    def test_compare_with_previous_year(self):
+        comparison = self.get_report('from=2026-03-01&to=2026-03-10&granularity=week&compare=year')['comparison']
+        self.assertEqual((str(comparison['from']), str(comparison['to'])), ('2025-03-01', '2025-03-10'))
+        self.assertEqual(self.trend(comparison['sales_trend']),
+                         [('2025-02-24', 0, 0), ('2025-03-03', 1, 1), ('2025-03-10', 0, 0)])
+        self.assertEqual(comparison['revenue_change'], 0.0)
+
+    def test_range_is_capped_per_granularity(self):
+        self.get_report('from=2025-03-04&to=2026-03-04')
+        self.assertIn('at most 366 days', self.get_report('from=2025-03-03&to=2026-03-04', 400)['error'])
+        self.get_report('from=2024-01-01&to=2026-03-04&granularity=week')
+        self.assertIn('at most 1098 days', self.get_report('from=2020-01-01&to=2026-03-04&granularity=week', 400)['error'])
+        self.get_report('from=2020-01-01&to=2026-03-04&granularity=month')
+        self.get_report('from=2000-01-01&to=2026-03-04&granularity=month', 400)
+
+    def cancel_an_order(self):
+        order = Order.objects.filter(created_at__date=date(2026, 2, 10)).first()
+        order.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+    def test_change_in_another_worker_is_seen_without_a_shared_cache(self):
+        query = 'from=2026-01-01&to=2026-03-31'
+        self.assertEqual(self.get_report(query)['total_revenue'], 6 * self.amount)
+        with other_worker():
+            cache.clear()
+            self.cancel_an_order()
+        self.assertEqual(self.get_report(query)['total_revenue'], 5 * self.amount)
+
+    @skipUnless(fakeredis, 'fakeredis is not installed')
+    def test_redis_cache_is_shared_and_invalidated(self):
+        query = 'from=2026-01-01&to=2026-03-31'
+        with fake_redis():
+            cache.clear()
+            self.get_report(query)
+            with self.assertNumQueries(1):
+                self.assertEqual(self.get_report(query)['total_revenue'], 6 * self.amount)
+            self.cancel_an_order()
+            self.assertEqual(self.get_report(query)['total_revenue'], 5 * self.amount)
+
+    def test_invalid_params(self):
+        for query in ('from=2026-13-01', 'from=2026-03-02&to=2026-03-01', 'granularity=year',
+                      'from=2026-03-01&compare=decade', 'compare=previous'):
+            with self.subTest(query=query):
+                self.assertIn('error', self.get_report(query, 400))
+
+class OrderPricingTests(APIClientTestCase):
+    """Orders are priced from the catalog, whatever totals the client sends"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.authenticate(self.customer)
+        self.product = seed_catalog(2)[0]
+        # 100 and 200
+        self.small, self.large = self.product.variants.order_by('price')
+
+    def payload(self, items, **extra):
+        return {
+            'delivery_type': 'pickup',
+            'delivery_date': (date.today() + timedelta(days=2)).isoformat(),
+            'delivery_slot': '10:00-11:00 AM',
+            'items': items,
+            **extra,
+        }
+
+    def line(self, variant, quantity=1):
+        return {'product_id': variant.product_id, 'product_variant_id': variant.pk, 'quantity': quantity}
+
+    def test_client_totals_are_ignored(self):
+        payload = self.payload([self.line(self.small, 2), self.line(self.large)],
+                               total_amount='1.00', discount_amount='0.00', final_amount='1.00')
+        response = self.client.post('/api/orders/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertEqual((order.total_amount, order.final_amount), (Decimal('400.00'), Decimal('400.00')))
+        self.assertEqual(sorted(item.unit_price for item in order.items.all()), [Decimal('100'), Decimal('200')])
+
+    def test_delivery_fee_is_charged_and_previewed(self):
+        payload = self.payload([self.line(self.large)], delivery_type='delivery')
+        preview = self.client.post('/api/orders/preview/', payload, format='json')
+        self.assertEqual((preview.data['delivery_fee'], preview.data['final_amount']), ('50.00', '250.00'))
+
+        created = self.client.post('/api/orders/', payload, format='json')
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual((created.data['total_amount'], created.data['final_amount']), ('200.00', '250.00'))
+
+    def test_pickup_has_no_delivery_fee(self):
+        preview = self.client.post('/api/orders/preview/', self.payload([self.line(self.large)]), format='json')
+        self.assertEqual((preview.data['delivery_fee'], preview.data['final_amount']), ('0.00', '200.00'))
+
+    def assertRejected(self, item):
+        response = self.client.post('/api/orders/', self.payload([item]), format='json')
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertIn('items', response.data)
+        self.assertFalse(Order.objects.filter(user=self.customer).exists())
+
+    def test_unknown_variant_is_rejected(self):
+        self.assertRejected({'product_id': self.product.pk, 'product_variant_id': 999999, 'quantity': 1})
+
+    def test_variant_of_another_product_is_rejected(self):
+        other = ProductVariant.objects.exclude(product=self.product).first()
+        self.assertRejected({'product_id': self.product.pk, 'product_variant_id': other.pk, 'quantity': 1})
+
+    def test_bare_product_with_variants_is_rejected(self):
+        self.assertRejected({'product_id': self.product.pk, 'quantity': 1})
+
+    def test_bare_product_without_price_is_rejected(self):
+        product = Product.objects.create(category=self.product.category, name='Unpriced')
+        self.assertRejected({'product_id': product.pk, 'quantity': 1})
+
+class CustomCakePricingTests(APIClientTestCase):
+    """Preview and order creation charge what the custom-cake price endpoint quotes"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.authenticate(self.customer)
+        self.product = seed_catalog(1)[0]
+        options = [
+            ('base', CakeBase.objects.create(name='Sponge', price=100)),
+            ('flavour', CakeFlavour.objects.create(name='Chocolate', price=150)),
+            ('shape', CakeShape.objects.create(name='Heart', price=50)),
+            ('weight', CakeWeight.objects.create(label='1 kg', price=300)),
+        ]
+        self.config = {key: option.pk for key, option in options}
+        self.option_ids = [
+            CustomCakeOption.objects.create(type=key, label=str(option), extra_price=option.price).pk
+            for key, option in options
+        ]
+
+    def payload(self):
+        return {
+            'delivery_type': 'pickup',
+            'delivery_date': (date.today() + timedelta(days=2)).isoformat(),
+            'delivery_slot': '10:00-11:00 AM',
+            'items': [{'product_id': self.product.pk, 'quantity': 2, 'custom_cake_config': self.config}],
+        }
+
+    def test_preview_and_order_match_custom_cake_price(self):
+        quoted = self.client.post('/api/coupons/custom-cake/price/', {'options': self.option_ids}, format='json')
+        self.assertEqual(quoted.data['total_price'], '1100.00')
+
+        preview = self.client.post('/api/orders/preview/', self.payload(), format='json')
+        self.assertEqual(preview.data['items'][0]['unit_price'], quoted.data['total_price'])
+
+        created = self.client.post('/api/orders/', self.payload(), format='json')
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(Decimal(created.data['final_amount']), 2 * Decimal(quoted.data['total_price']))
+        self.assertEqual(created.data['items'][0]['unit_price'], quoted.data['total_price'])
+
+    def test_preview_and_order_agree_on_a_cake_without_product(self):
+        payload = self.payload()
+        del payload['items'][0]['product_id']
+        preview = self.client.post('/api/orders/preview/', payload, format='json')
+        created = self.client.post('/api/orders/', payload, format='json')
+        self.assertEqual((preview.status_code, created.status_code), (400, 400))
+        self.assertEqual(preview.data, created.data)
+        self.assertIn('A product or variant is required.', str(preview.data))
+        self.assertFalse(Order.objects.exists())
+
+class BenchmarkSeederTests(APIClientTestCase):
+    """seed_benchmark runs are backdated and can be cleared without touching other runs"""
+
+    def seed(self, seed):
+        seeder = BenchmarkSeeder(seed=seed, end_date=date(2025, 6, 30), days=60, batch_size=50)
+        seeder.run(customers=5, orders=40, products=4, coupons=3)
+        return seeder
+
+    def test_orders_keep_their_placed_dates(self):
+        self.seed(42)
+        created = Order.objects.values_list('created_at__date', flat=True)
+        self.assertTrue(all(date(2025, 5, 1) <= day <= date(2025, 6, 30) for day in created))
+        self.assertTrue(Order._meta.get_field('created_at').auto_now_add)
+
+    def test_clear_leaves_other_seeds_alone(self):
+        self.seed(42)
+        self.seed(420)
+        BenchmarkSeeder(seed=42).clear()
+        self.assertEqual(Coupon.objects.filter(code__startswith='BENCH420-').count(), 3)
+        self.assertEqual(Order.objects.count(), 40)
+        self.assertFalse(Coupon.objects.filter(code__startswith='BENCH42-').exists())
+
+class FakePushClient:
+    """Stands in for the Expo client: records each request and answers per token"""
+    max_message_count = 2
+
+    def __init__(self, errors=None, receipts=None):
+        self.errors = errors or {}
+        self.receipts = receipts or {}
+        self.requests = []
+
+    def publish_multiple(self, messages):
+        self.requests.append([message.to for message in messages])
+        return [
+            ExpoTicket(push_message=message, status='error', message='failed',
+                       details={'error': self.errors[message.to]}, id=None)
+            if message.to in self.errors else
+            ExpoTicket(push_message=message, status='ok', message='', details=None, id=f'ticket-{message.to}')
+            for message in messages
+        ]
+
+    def check_receipts_multiple(self, tickets):
+        return [
+            PushReceipt(id=ticket.id, status='error', message='gone', details={'error': self.receipts[ticket.id]})
+            if ticket.id in self.receipts else PushReceipt(id=ticket.id, status='ok', message='', details=None)
+            for ticket in tickets
+        ]
+
+class OutboxPushTests(APIClientTestCase):
+    """New-order pushes to bakers: chunking, partial retries, token pruning and receipts"""
+
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.tokens = [f'ExponentPushToken[baker-{i}]' for i in range(5)]
+        for i, token in enumerate(self.tokens):
+            User.objects.create_user(email=f'baker{i}@example.com', password='secret', name=f'Baker {i}',
+                                     role='baker', expo_push_token=token)
+        order = seed_orders(customer, 1)[0]
+        self.message = OutboxMessage.objects.create(event='order_created', order=order)
+
+    def deliver(self, client):
+        with mock.patch('utils.push.get_push_client', return_value=client):
+            return process_batch()
+
+    def test_pushes_go_out_in_chunks(self):
+        client = FakePushClient()
+        self.assertEqual(self.deliver(client), (1, 0))
+        self.assertEqual([len(request) for request in client.requests], [2, 2, 1])
+        self.assertEqual(PushTicket.objects.count(), 5)
+
+    def test_retry_only_pushes_to_failed_tokens(self):
+        failing = self.tokens[3]
+        self.assertEqual(self.deliver(FakePushClient(errors={failing: 'MessageRateExceeded'})), (0, 1))
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, 'pending')
+        self.assertEqual(set(self.message.payload['delivered_tokens']), set(self.tokens) - {failing})
+
+        OutboxMessage.objects.filter(pk=self.message.pk).update(available_at=timezone.now())
+        client = FakePushClient()
+        self.assertEqual(self.deliver(client), (1, 0))
+        self.assertEqual(client.requests, [[failing]])
+
+    def test_unregistered_tokens_are_pruned(self):
+        gone = self.tokens[0]
+        self.assertEqual(self.deliver(FakePushClient(errors={gone: 'DeviceNotRegistered'})), (1, 0))
+        self.assertFalse(User.objects.filter(expo_push_token=gone).exists())
+
+    def test_receipts_prune_unregistered_devices(self):
+        self.deliver(FakePushClient())
+        PushTicket.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        client = FakePushClient(receipts={f'ticket-{self.tokens[1]}': 'DeviceNotRegistered'})
+        with mock.patch('utils.push.get_push_client', return_value=client):
+            self.assertEqual(poll_push_receipts(), 5)
+        self.assertFalse(User.objects.filter(expo_push_token=self.tokens[1]).exists())
+        self.assertEqual(User.objects.exclude(expo_push_token=None).filter(role='baker').count(), 4)
+        self.assertFalse(PushTicket.objects.exists())
+
+class CountingEmailBackend(BaseEmailBackend):
+    """Stands in for SMTP: counts sessions and sends, and fails on demand"""
+
+    instances = []
+    # Recipients every send to is refused for
+    refused = set()
+    # How many more sends fail as if the server hung up
+    drops = 0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.is_open = False
+        self.opened = self.closed = 0
+        self.sent = []
+        CountingEmailBackend.instances.append(self)
+
+    def open(self):
+        if not self.is_open:
+            self.is_open = True
+            self.opened += 1
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            self.closed += 1
+
+    def send_messages(self, messages):
+        if CountingEmailBackend.drops:
+            CountingEmailBackend.drops -= 1
+            raise SMTPServerDisconnected('Connection unexpectedly closed')
+        for message in messages:
+            if set(message.to) & CountingEmailBackend.refused:
+                raise SMTPRecipientsRefused({address: (550, b'No such user') for address in message.to})
+        self.sent.extend(messages)
+        return len(messages)
+
+@override_settings(EMAIL_BACKEND='orders.tests.CountingEmailBackend', EMAIL_BATCH_SIZE=3)
+class MailConnectionTests(SimpleTestCase):
+    """utils.mail keeps one SMTP session per worker thread, recycles it and retries once"""
+
+    def setUp(self):
+        reset_mail_connection()
+        CountingEmailBackend.instances = []
+        CountingEmailBackend.refused = set()
+        CountingEmailBackend.drops = 0
+        self.addCleanup(reset_mail_connection)
+
+    def emails(self, *recipients):
+        return [EmailMessage(subject='Order update', body='Hello', to=[recipient]) for recipient in recipients]
+
+    def sessions(self):
+        backends = CountingEmailBackend.instances
+        return sum(backend.opened for backend in backends), sum(backend.closed for backend in backends)
+
+    def sent_to(self):
+        return [message.to[0] for backend in CountingEmailBackend.instances for message in backend.sent]
+
+    def test_session_is_reused_across_calls(self):
+        self.assertEqual(send_messages(self.emails('a@example.com')), [])
+        self.assertEqual(send_messages(self.emails('b@example.com')), [])
+        self.assertEqual(len(CountingEmailBackend.instances), 1)
+        self.assertEqual(self.sessions(), (1, 0))
+        self.assertEqual(self.sent_to(), ['a@example.com', 'b@example.com'])
+
+    def test_session_is_recycled_every_batch_size_messages(self):
+        send_messages(self.emails(*[f'{i}@example.com' for i in range(7)]))
+        # Closed after the 3rd and 6th messages, the 7th opens a third session
+        self.assertEqual(self.sessions(), (3, 2))
+        self.assertEqual(len(self.sent_to()), 7)
+
+    def test_reconnects_once_after_a_dropped_session(self):
+        send_messages(self.emails('a@example.com'))
+        CountingEmailBackend.drops = 1
+        self.assertEqual(send_messages(self.emails('b@example.com')), [])
+        self.assertEqual(self.sessions(), (2, 1))
+        self.assertEqual(self.sent_to(), ['a@example.com', 'b@example.com'])
+
+    def test_gives_up_after_one_reconnect(self):
+        CountingEmailBackend.drops = 3
+        emails = self.emails('a@example.com')
+        with self.assertLogs('utils.mail', 'ERROR'):
+            self.assertEqual(send_messages(emails), emails)
+        # Two attempts, no more
+        self.assertEqual(CountingEmailBackend.drops, 1)
+        # The next message still goes out, after its own reconnect
+        self.assertEqual(send_messages(self.emails('b@example.com')), [])
+        self.assertEqual(self.sent_to(), ['b@example.com'])
+
+    def test_batch_reports_the_sources_that_failed(self):
+        CountingEmailBackend.refused = {'gone@example.com'}
+        batch = MailBatch()
+        ok, gone, untracked = self.emails('a@example.com', 'gone@example.com', 'c@example.com')
+        batch.add(ok, source=1)
+        batch.add(gone, source=2)
+        batch.add(untracked)
+        batch.add(None, source=3)
+        self.assertEqual(len(batch), 3)
+        with self.assertLogs('utils.mail', 'ERROR'):
+            self.assertEqual(batch.send(), {2})
+        self.assertEqual(self.sent_to(), ['a@example.com', 'c@example.com'])
+        # Flushed: nothing is sent twice
+        self.assertEqual(batch.send(), set())
+
+class SalesRollupTests(APIClientTestCase):
+    """Incremental rollups match a full rebuild after every kind of order change"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        # One 100 variant from each of three products
+        self.variants = [product.variants.order_by('price').first() for product in seed_catalog(3)]
+
+    def create_order(self, payment_status='pending'):
+        self.authenticate(self.customer)
+        response = self.client.post('/api/orders/', {
+            'delivery_type': 'pickup',
+            'delivery_date': (date.today() + timedelta(days=2)).isoformat(),
+            'delivery_slot': '10:00-11:00 AM',
+            'payment_status': payment_status,
+            'items': [{'product_id': variant.product_id, 'product_variant_id': variant.pk, 'quantity': 2}
+                      for variant in self.variants],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Order.objects.get(pk=response.data['id'])
+
+    def set_order(self, order, field, value):
+        self.authenticate(self.baker)
+        url = f'/api/orders/{order.pk}/{field.replace("_", "-")}/'
+        self.assertEqual(self.client.patch(url, {field: value}, format='json').status_code, 200)
+
+    def snapshot(self):
+        """Every non-empty rollup row, without ids or timestamps"""
+        return (
+            sorted(DailySalesRollup.objects.exclude(order_count=0)
+                   .values_list('date', 'order_count', 'paid_order_count', 'revenue')),
+            sorted(DailyProductSalesRollup.objects.exclude(quantity=0)
+                   .values_list('date', 'product_id', 'quantity', 'revenue')),
+            sorted(DailyCustomerSalesRollup.objects.exclude(order_count=0)
+                   .values_list('date', 'user_id', 'order_count', 'revenue')),
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.snapshot())
+        return incremental
+
+    def test_order_created_paid(self):
+        self.create_order(payment_status='paid')
+        days, products, customers = self.assertMatchesRebuild()
+        self.assertEqual([row[2:] for row in products], [(2, Decimal('200'))] * 3)
+        self.assertEqual(days[0][1:], (1, 1, Decimal('600')))
+
+    def test_paid_then_refunded(self):
+        order = self.create_order()
+        self.set_order(order, 'payment_status', 'paid')
+        _, products, _ = self.assertMatchesRebuild()
+        self.assertEqual(len(products), 3)
+        self.set_order(order, 'payment_status', 'refunded')
+        days, products, customers = self.assertMatchesRebuild()
+        self.assertEqual((days[0][1:3], products, customers), ((1, 0), [], []))
+
+    def test_paid_then_cancelled(self):
+        order = self.create_order(payment_status='paid')
+        self.set_order(order, 'status', 'cancelled')
+        days, products, _ = self.assertMatchesRebuild()
+        self.assertEqual((days[0][1:3], products), ((1, 0), []))
+
+    def test_paid_order_deleted(self):
+        self.create_order(payment_status='paid')
+        order = self.create_order(payment_status='paid')
+        order.delete()
+        days, products, customers = self.assertMatchesRebuild()
+        self.assertEqual((days[0][1:3], len(products), customers[0][2]), ((1, 1), 3, 1))
+
+class IdempotencyKeyTests(APIClientTestCase):
+    """Order creation with an Idempotency-Key: replay, conflicts, leases and expiry"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.authenticate(self.customer)
+        self.variant = seed_catalog(1)[0].variants.first()
+
+    def create(self, quantity=1, key='checkout-1'):
+        return self.client.post('/api/orders/', {
+            'delivery_type': 'pickup',
+            'delivery_date': (date.today() + timedelta(days=2)).isoformat(),
+            'delivery_slot': '10:00-11:00 AM',
+            'items': [{'product_id': self.variant.product_id, 'product_variant_id': self.variant.pk,
+                       'quantity': quantity}],
+        }, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_stored_response(self):
+        first, retry = self.create(), self.create()
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_another_payload_is_rejected(self):
+        self.create()
+        self.assertEqual(self.create(quantity=3).status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_retry_while_in_progress_conflicts(self):
+        self.create()
+        IdempotencyKey.objects.update(response_status=None, response_body=None,
+                                      expires_at=timezone.now() + timedelta(seconds=30))
+        self.assertEqual(self.create().status_code, 409)
+
+    def test_abandoned_lease_is_taken_over(self):
+        # The first request died mid-write, leaving its lease behind
+        self.create()
+        Order.objects.all().delete()
+        IdempotencyKey.objects.update(response_status=None, response_body=None,
+                                      expires_at=timezone.now() - timedelta(seconds=1))
+        retry = self.create()
+        self.assertEqual(retry.status_code, 201)
+        self.assertFalse(retry.has_header('Idempotent-Replayed'))
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.response_status, 201)
+        self.assertGreater(record.expires_at, timezone.now() + timedelta(hours=1))
+
+    def test_expired_key_runs_the_request_again(self):
+        first = self.create()
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        again = self.create()
+        self.assertNotEqual(again.data['id'], first.data['id'])
+        self.assertEqual(Order.objects.count(), 2)
+
+@override_settings(OUTBOX_LEASE_SECONDS=300, OUTBOX_BASE_BACKOFF=10, OUTBOX_MAX_BACKOFF=60, OUTBOX_MAX_ATTEMPTS=3)
+class OutboxDeliveryTests(APIClientTestCase):
+    """Outbox leasing, retry backoff and giving up"""
+
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.order = seed_orders(customer, 1)[0]
+
+    def make_due(self):
+        OutboxMessage.objects.update(available_at=timezone.now())
+
+    def test_claimed_messages_are_leased(self):
+        message = OutboxMessage.objects.create(event='order_created', order=self.order)
+        claimed = claim_batch(10)
+        self.assertEqual([(m.pk, m.status, m.attempts) for m in claimed], [(message.pk, 'processing', 1)])
+        self.assertGreater(claimed[0].available_at, timezone.now() + timedelta(seconds=290))
+        # Nobody else gets it while the lease holds
+        self.assertEqual(claim_batch(10), [])
+
+        # The worker died: the lease runs out and the message is claimed again
+        self.make_due()
+        self.assertEqual([(m.pk, m.attempts) for m in claim_batch(10)], [(message.pk, 2)])
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        with mock.patch('orders.outbox.random.uniform', return_value=1):
+            delays = [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3, 4, 10)]
+        self.assertEqual(delays, [10, 20, 40, 60, 60])
+
+    def test_failed_message_is_rescheduled_with_backoff(self):
+        message = OutboxMessage.objects.create(event='no_such_event', order=self.order)
+        self.assertEqual(process_batch(), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('pending', 1))
+        self.assertIn('no_such_event', message.last_error)
+        wait = (message.available_at - timezone.now()).total_seconds()
+        self.assertTrue(7 <= wait <= 12, wait)
+        # Not due yet
+        self.assertEqual(process_batch(), (0, 0))
+
+    def test_gives_up_after_max_attempts(self):
+        message = OutboxMessage.objects.create(event='no_such_event', order=self.order)
+        for _ in range(3):
+            self.make_due()
+            process_batch()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('failed', 3))
+        self.make_due()
+        self.assertEqual(process_batch(), (0, 0))
+
+@override_settings(OUTBOX_COALESCE_SECONDS=60, OUTBOX_COALESCE_MAX_SECONDS=300)
+class StatusChangeCoalescingTests(APIClientTestCase):
+    """A burst of status changes sends the customer one email with the latest status"""
+
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.order = Order.objects.get(pk=seed_orders(customer, 1)[0].pk)
+
+    def set_status(self, *statuses):
+        for status in statuses:
+            self.order.status = status
+            self.order.save()
+
+    def status_messages(self):
+        return OutboxMessage.objects.filter(event='order_status_changed').order_by('pk')
+
+    def deliver(self):
+        OutboxMessage.objects.update(available_at=timezone.now())
+        process_batch()
+
+    def test_changes_within_the_window_coalesce(self):
+        self.set_status('confirmed')
+        first = self.status_messages().get()
+        self.set_status('in_kitchen', 'ready', 'out_for_delivery')
+
+        message = self.status_messages().get()
+        self.assertEqual(message.payload, {'from_status': 'pending', 'status': 'out_for_delivery'})
+        # Each change restarts the timer
+        self.assertGreaterEqual(message.available_at, first.available_at)
+        self.assertGreater(message.available_at, timezone.now() + timedelta(seconds=50))
+
+        self.deliver()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['customer@example.com'])
+        self.assertIn('OUT FOR DELIVERY', mail.outbox[0].body)
+
+    def test_timer_is_capped_after_the_first_change(self):
+        self.set_status('confirmed')
+        # As if the burst began 280 seconds ago and has been extended since
+        started = timezone.now() - timedelta(seconds=280)
+        self.status_messages().update(created_at=started, available_at=started + timedelta(seconds=250))
+        self.set_status('in_kitchen')
+        self.assertEqual(self.status_messages().get().available_at, started + timedelta(seconds=300))
+
+    def test_change_after_the_message_is_claimed_starts_a_new_one(self):
+        self.set_status('confirmed')
+        self.status_messages().update(status='processing', attempts=1)
+        self.set_status('ready')
+        self.assertEqual([message.payload for message in self.status_messages()], [
+            {'from_status': 'pending', 'status': 'confirmed'},
+            {'from_status': 'confirmed', 'status': 'ready'},
+        ])
+
+    def test_burst_ending_where_it_started_sends_nothing(self):
+        self.set_status('confirmed', 'pending')
+        self.deliver()
+        self.assertEqual(self.status_messages().get().status, 'sent')
+        self.assertEqual(mail.outbox, [])
+
+class LoadTestReportTests(SimpleTestCase):
+    """Latency percentiles and rates reported by manage.py load_test"""
+
+    def test_percentile_is_nearest_rank(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([7], 99), 7)
+        values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+        self.assertEqual([percentile(values, pct) for pct in (0, 10, 50, 51, 95, 99, 100)], [1, 1, 5, 6, 10, 10, 10])
+        self.assertEqual([percentile([10, 20, 30, 40], pct) for pct in (25, 50, 75, 76)], [10, 20, 30, 40])
+
+    def test_recorder_rates(self):
+        recorder = Recorder()
+        for elapsed in (0.1, 0.3, 0.2, 0.4):
+            recorder.add('GET /a', elapsed, ok=True)
+        recorder.add('GET /b', 1.0, ok=False)
+        recorder.add('GET /b', 0.5, ok=True)
+
+        endpoints, total = recorder.report(duration=2)
+        self.assertEqual(endpoints['GET /a'], {
+            'requests': 4, 'errors': 0, 'error_rate': 0, 'rps': 2.0, 'mean_ms': 250.0,
+            'p50_ms': 200.0, 'p95_ms': 400.0, 'p99_ms': 400.0, 'max_ms': 400.0,
+        })
+        self.assertEqual((endpoints['GET /b']['error_rate'], endpoints['GET /b']['rps']), (0.5, 1.0))
+        self.assertEqual((total['requests'], total['errors'], total['error_rate'], total['rps']), (6, 1, 0.1667, 3.0))
+
+    def test_empty_summary(self):
+        summary = Recorder().summary([], 0, 0)
+        self.assertEqual((summary['requests'], summary['error_rate'], summary['rps'], summary['p99_ms']), (0, 0, 0, None))
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoadTestSmokeTests(LiveServerTestCase):
+    """manage.py load_test drives the customer and baker flows against a live server without errors"""
+
+    def setUp(self):
+        User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+        customer = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        seed_catalog(3)
+        # Something in every queue the baker can move along
+        orders = seed_orders(customer, len(ORDER_STATUS_FLOW) - 1)
+        for order, status in zip(orders, ORDER_STATUS_FLOW):
+            order.status = status
+        Order.objects.bulk_update(orders, ['status'])
+
+    def test_smoke_run(self):
+        handle, output = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, output)
+        call_command('load_test', url=self.live_server_url, customers=1, bakers=1, duration=1,
+                     baker_email='baker@example.com', baker_password='secret', output=output,
+                     stdout=io.StringIO())
+        with open(output) as f:
+            report = json.load(f)
+
+        self.assertEqual(report['sample_errors'], [])
+        self.assertEqual(report['total']['errors'], 0)
+        for label in ('POST /api/users/register/', 'POST /api/users/login/', 'GET /api/catalog/products/',
+                      'POST /api/orders/preview/', 'POST /api/orders/', 'GET /api/orders/?status=',
+                      'PATCH /api/orders/{id}/status/', 'GET /api/orders/analytics/'):
+            with self.subTest(label=label):
+                stats = report['endpoints'][label]
+                self.assertGreater(stats['requests'], 0)
+                for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                    self.assertIsNotNone(stats[key])
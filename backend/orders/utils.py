@@ -1,8 +1,11 @@
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from django.conf import settings
+from utils.email import render
+from utils.mail import send_messages
 import os
 
-def send_order_emails(order):
+def build_order_emails(order):
+    """Customer confirmation and baker alert for a new order"""
     customer = order.user
     items = order.items.all()
 
@@ -15,84 +18,39 @@ def send_order_emails(order):
         )
 
     items_text = "\n".join(item_lines)
+    context = {'order': order, 'customer': customer, 'items_text': items_text}
+    messages = []
 
     # Customer Email
-    customer_subject = f"Order Confirmed: Order #{order.id} at Ronoos BakeHub"
-    customer_message = f"""
-Hi {customer.name},  
-
-Your order has been confirmed! 🎉  
-
-Thank you for choosing Ronoos BakeHub. We have received your order and it is now being processed.
-
-Order ID: {order.id}
-Current Status: {order.status.capitalize()}
-
-Items:
-{items_text}
-
-Total Amount: ₹{order.final_amount}
-
-Delivery Type: {order.delivery_type}
-Delivery Date: {order.delivery_date}
-Delivery Slot: {order.delivery_slot}
-
-We will update you once your order moves to the next stage.
-
-Thank you for supporting us 🙏  
-— Ronoos BakeHub
-"""
-
-    # Send to Customer
     if customer.email:
-        try:
-            send_mail(
-                subject=customer_subject,
-                message=customer_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[customer.email],
-                fail_silently=False,
-            )
-            print(f"Email sent to customer: {customer.email}")
-        except Exception as e:
-            print(f"Failed to send email to customer: {e}")
+        messages.append(EmailMessage(
+            subject=render('confirmation_subject', **context),
+            body=render('confirmation_customer', **context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[customer.email],
+        ))
 
     # Baker Email
     baker_email = os.environ.get('EMAIL_HOST_USER') # Send to the admin email
-    
+
     if baker_email and customer.email == baker_email:
         print(f"WARNING: Customer email ({customer.email}) is the same as Baker email. You will receive both emails in the same inbox.")
 
     if baker_email:
-        baker_subject = "New bakery order received"
-        baker_message = f"""
-New Order Alert 🚨
-
-Order ID: {order.id}
-Customer Name: {customer.name}
-Customer Phone: {customer.phone}
-Customer Email: {customer.email}
+        messages.append(EmailMessage(
+            subject=render('confirmation_baker_subject', **context),
+            body=render('confirmation_baker', **context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[baker_email],
+        ))
 
-Delivery Type: {order.delivery_type}
-Delivery Date: {order.delivery_date}
-Delivery Slot: {order.delivery_slot}
+    return messages
 
-Items:
-{items_text}
-
-Total: ₹{order.final_amount}
-
-Please check the baker dashboard to manage this order.
-"""
-
-        try:
-            send_mail(
-                subject=baker_subject,
-                message=baker_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[baker_email],
-                fail_silently=False,
-            )
-            print(f"Email sent to baker: {baker_email}")
-        except Exception as e:
-            print(f"Failed to send email to baker: {e}")
+def send_order_emails(order):
+    messages = build_order_emails(order)
+    failed = send_messages(messages)
+    for message in messages:
+        if message in failed:
+            print(f"Failed to send email to: {', '.join(message.to)}")
+        else:
+            print(f"Email sent to: {', '.join(message.to)}")
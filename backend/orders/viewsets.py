@@ -2,15 +2,19 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db import models
+from django.db import models, transaction
+from .analytics import get_report, parse_report_params
 from .models import Order, OrderItem
-from .serializers import OrderSerializer, OrderCreateSerializer
-from catalog.models import Product, ProductVariant
+from .idempotency import idempotent
+from .pricing import quote_order
+from .serializers import OrderSerializer, OrderCreateSerializer, OrderSummarySerializer, OrderItemSerializer
+from utils.pagination import OrderCursorPagination
 
 class OrderViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'post', 'patch', 'delete', 'head', 'options']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = OrderCursorPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -23,79 +27,97 @@ class OrderViewSet(viewsets.ModelViewSet):
         if status_param:
             queryset = queryset.filter(status=status_param)
             
-        return queryset.prefetch_related('items', 'items__product', 'items__product_variant')
+        queryset = queryset.order_by(*self.ordering).select_related('user')
+        if self.get_view_mode() == 'summary':
+            return queryset.prefetch_related(
+                models.Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+            )
+        return queryset.select_related('delivery_address').prefetch_related(
+            'items__product__images', 'items__product__variants', 'items__product__category',
+            'items__product_variant',
+        )
+
+    def get_view_mode(self):
+        """`summary` for lists and `full` for everything else, unless ?view= overrides it"""
+        view = self.request.query_params.get('view')
+        if view in ('summary', 'full'):
+            return view
+        return 'summary' if self.action == 'list' else 'full'
     
     def get_serializer_class(self):
         if self.action == 'create':
             return OrderCreateSerializer
+        if self.get_view_mode() == 'summary':
+            return OrderSummarySerializer
         return OrderSerializer
     
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         
         # Return the full order details using OrderSerializer
-        # We need to fetch the instance again or use the one from perform_create if it returned it
-        # Since perform_create in DRF doesn't return, we rely on serializer.instance
-        headers = self.get_success_headers(serializer.data)
-        
-        # Use the read serializer for the response
-        read_serializer = OrderSerializer(serializer.instance)
-        return Response(read_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        # Since perform_create in DRF doesn't return, we rely on serializer.instance,
+        # and hand over the items just created so they aren't read back
+        read_serializer = OrderSerializer(serializer.instance, context={
+            'created_items': {'order': serializer.instance.pk, 'items': serializer.created_items},
+        })
+        data = read_serializer.data
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
-    
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        # DRF's update() drops the prefetched items after saving, which made the
+        # response query per item; read the order back with its prefetches instead
+        return Response(self.get_serializer(self.get_object()).data)
+
     @action(detail=False, methods=['post'])
     def preview(self, request):
         """Calculate order totals with optional coupon"""
-        items = request.data.get('items', [])
-        coupon_code = request.data.get('coupon_code')
-        
-        total_amount = 0
+        items = OrderItemSerializer(data=request.data.get('items', []), many=True)
+        items.is_valid(raise_exception=True)
+
+        quote = quote_order(
+            items.validated_data,
+            request.user,
+            coupon_code=request.data.get('coupon_code'),
+            delivery_type=request.data.get('delivery_type'),
+            prefetch=False,
+        )
+
         line_items = []
-        
-        for item in items:
-            product_id = item.get('product_id')
-            variant_id = item.get('product_variant_id')
-            quantity = item.get('quantity', 1)
-            
-            if variant_id:
-                variant = ProductVariant.objects.get(id=variant_id)
-                unit_price = variant.price
-                product_name = f"{variant.product.name} - {variant.label}"
-            elif product_id:
-                product = Product.objects.get(id=product_id)
-                # For custom cakes, calculate price based on custom_config
-                unit_price = 0  # TODO: Implement custom cake price calculation
-                product_name = product.name
+        for line in quote['lines']:
+            if line['product_variant']:
+                product_name = f"{line['product'].name} - {line['product_variant'].label}"
             else:
-                continue
-            
-            subtotal = unit_price * quantity
-            total_amount += subtotal
-            
+                product_name = line['product'].name
+
             line_items.append({
                 'product_name': product_name,
-                'quantity': quantity,
-                'unit_price': str(unit_price),
-                'subtotal': str(subtotal)
+                'quantity': line['quantity'],
+                'unit_price': str(line['unit_price']),
+                'subtotal': str(line['subtotal'])
             })
         
-        discount_amount = 0
-        # TODO: Implement coupon validation
-        
-        final_amount = total_amount - discount_amount
-        
         return Response({
             'items': line_items,
-            'total_amount': str(total_amount),
-            'discount_amount': str(discount_amount),
-            'final_amount': str(final_amount)
+            'coupon_code': quote['coupon'].code if quote['coupon'] else None,
+            'total_amount': str(quote['total_amount']),
+            'discount_amount': str(quote['discount_amount']),
+            'delivery_fee': str(quote['delivery_fee']),
+            'final_amount': str(quote['final_amount'])
         })
     
     @action(detail=True, methods=['patch'], url_path='status')
+    @idempotent
     def update_status(self, request, pk=None):
         """Update order status (baker only)"""
         if request.user.role != 'baker':
@@ -112,13 +134,16 @@ class OrderViewSet(viewsets.ModelViewSet):
         if new_status not in valid_statuses:
             return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
         
-        order.status = new_status
-        order.save()
+        # The outbox row written by the post_save signal commits with the status change
+        with transaction.atomic():
+            order.status = new_status
+            order.save()
         
         serializer = self.get_serializer(order)
         return Response(serializer.data)
 
     @action(detail=True, methods=['patch'], url_path='payment-status')
+    @idempotent
     def update_payment_status(self, request, pk=None):
         """Update payment status (baker only)"""
         if request.user.role != 'baker':
@@ -133,8 +158,9 @@ class OrderViewSet(viewsets.ModelViewSet):
         if new_status not in valid_statuses:
             return Response({'error': 'Invalid payment status'}, status=status.HTTP_400_BAD_REQUEST)
         
-        order.payment_status = new_status
-        order.save()
+        with transaction.atomic():
+            order.payment_status = new_status
+            order.save()
         
         serializer = self.get_serializer(order)
         return Response(serializer.data)
@@ -147,59 +173,10 @@ class AnalyticsViewSet(viewsets.ViewSet):
             return Response({'error': 'Only bakers can view analytics'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        orders = Order.objects.all()
-        
-        # Key Metrics
-        total_revenue = orders.filter(payment_status='paid').aggregate(
-            total=models.Sum('final_amount'))['total'] or 0
-        
-        total_orders = orders.count()
-        
-        avg_order_value = 0
-        if total_orders > 0:
-            avg_order_value = total_revenue / total_orders
-            
-        # Sales Trend (Last 7 days)
-        from django.utils import timezone
-        from datetime import timedelta
-        from django.db.models.functions import TruncDate
-        
-        last_7_days = timezone.now() - timedelta(days=7)
-        sales_trend = orders.filter(
-            created_at__gte=last_7_days, 
-            payment_status='paid'
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            daily_revenue=models.Sum('final_amount'),
-            order_count=models.Count('id')
-        ).order_by('date')
-        
-        # Top Products
-        top_products = OrderItem.objects.filter(
-            order__payment_status='paid'
-        ).values(
-            'product__name'
-        ).annotate(
-            total_sold=models.Sum('quantity'),
-            revenue=models.Sum('subtotal')
-        ).order_by('-total_sold')[:5]
-        
-        # Frequent Buyers
-        top_customers = orders.filter(
-            payment_status='paid'
-        ).values(
-            'user__name', 'user__email'
-        ).annotate(
-            orders_placed=models.Count('id'),
-            total_spent=models.Sum('final_amount')
-        ).order_by('-total_spent')[:5]
-        
-        return Response({
-            'total_revenue': total_revenue,
-            'total_orders': total_orders,
-            'avg_order_value': avg_order_value,
-            'sales_trend': sales_trend,
-            'top_products': top_products,
-            'top_customers': top_customers
-        })
+        params, error = parse_report_params(request.query_params)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Built from the daily rollups kept by orders.rollups and cached until
+        # the next order change; `manage.py rebuild_sales_rollups` backfills them
+        return Response(get_report(**params))
@@ -60,6 +60,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Inactive unless SQL_PROFILING_ENABLED is set
+    'utils.profiling.QueryProfilingMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -186,6 +188,80 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Cache
+# Redis (shared by every worker process) when REDIS_URL is set, local memory otherwise.
+# Keys are namespaced and invalidated by version (see utils.cache)
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 60 * 60))
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'ronoos',
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'ronoos',
+            'KEY_PREFIX': 'ronoos',
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
+
+# Per-request SQL profiling (see utils.profiling). Sampled requests get a
+# Server-Timing header and a JSON log line with query count, DB and serializer time
+SQL_PROFILING_ENABLED = os.environ.get('SQL_PROFILING_ENABLED', 'False') == 'True'
+SQL_PROFILING_SAMPLE_RATE = float(os.environ.get('SQL_PROFILING_SAMPLE_RATE', 1.0))
+# Sampled requests running more queries than this are logged as warnings
+SQL_PROFILING_QUERY_WARNING = int(os.environ.get('SQL_PROFILING_QUERY_WARNING', 20))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'utils.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Seconds clients may reuse a catalog response before revalidating its ETag
+CATALOG_CACHE_MAX_AGE = int(os.environ.get('CATALOG_CACHE_MAX_AGE', 60))
+
+# Seconds a stored Idempotency-Key response is replayed for (see orders.idempotency)
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+# Seconds a key stays locked by a request still in progress; a retry after that takes it over
+IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', 60))
+
+# Upper bound on how long a cached analytics report lives (see orders.analytics);
+# order changes invalidate it sooner
+ANALYTICS_CACHE_TIMEOUT = int(os.environ.get('ANALYTICS_CACHE_TIMEOUT', 15 * 60))
+
+# Notification outbox worker (see orders.outbox)
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_BASE_BACKOFF = int(os.environ.get('OUTBOX_BASE_BACKOFF', 10))
+OUTBOX_MAX_BACKOFF = int(os.environ.get('OUTBOX_MAX_BACKOFF', 60 * 60))
+OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', 5 * 60))
+# Status changes to one order within this window collapse into one customer email
+OUTBOX_COALESCE_SECONDS = int(os.environ.get('OUTBOX_COALESCE_SECONDS', 60))
+OUTBOX_COALESCE_MAX_SECONDS = int(os.environ.get('OUTBOX_COALESCE_MAX_SECONDS', 5 * 60))
+
+# Expo push delivery (see utils.push); point EXPO_PUSH_HOST at a stub server for local testing
+EXPO_PUSH_HOST = os.environ.get('EXPO_PUSH_HOST', 'https://exp.host')
+EXPO_ACCESS_TOKEN = os.environ.get('EXPO_ACCESS_TOKEN')
+EXPO_PUSH_CHUNK_SIZE = int(os.environ.get('EXPO_PUSH_CHUNK_SIZE', 100))
+# Seconds to wait on each Expo request before giving up and retrying later
+EXPO_PUSH_TIMEOUT = int(os.environ.get('EXPO_PUSH_TIMEOUT', 10))
+EXPO_RECEIPT_DELAY = int(os.environ.get('EXPO_RECEIPT_DELAY', 15 * 60))
+EXPO_RECEIPT_POLL_INTERVAL = int(os.environ.get('EXPO_RECEIPT_POLL_INTERVAL', 60))
+
 # Simple JWT settings (optional defaults)
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -197,12 +273,19 @@ SIMPLE_JWT = {
 CORS_ALLOW_ALL_ORIGINS = os.environ.get('CORS_ALLOW_ALL_ORIGINS', 'True') == 'True'
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(' ')
 CSRF_TRUSTED_ORIGINS = os.environ.get('CSRF_TRUSTED_ORIGINS', 'http://localhost:3000').split(' ')
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Email Configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# EMAIL_HOST/EMAIL_PORT/EMAIL_USE_TLS can point at a local debugging server,
+# e.g. `python -m aiosmtpd -n -l localhost:1025` with EMAIL_PORT=1025 EMAIL_USE_TLS=False
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = f"Ronoos BakeHub <{EMAIL_HOST_USER}>"
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 30))
+# Messages sent over one pooled SMTP session before it is recycled (see utils.mail)
+EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
@@ -13,6 +13,7 @@ urlpatterns = [
     path('api/catalog/', include('catalog.urls')),
     path('api/orders/', include('orders.urls')),
     path('api/coupons/', include('coupons.urls')),
+    path('api/inventory/', include('inventory.urls')),
     path('api/health/', health_check, name='health_check'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
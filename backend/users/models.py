@@ -61,3 +61,12 @@ class Address(models.Model):
 
     def __str__(self):
         return f"{self.line1}, {self.city}"
+
+class PushTicket(models.Model):
+    """Expo push ticket waiting for its delivery receipt (see utils.push)"""
+    ticket_id = models.CharField(max_length=100, unique=True)
+    token = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.ticket_id
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from utils.cache import invalidate_namespace
+from .models import User
+from .views import BAKER_SETTINGS_NAMESPACE
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def refresh_baker_settings(sender, instance, **kwargs):
+    # Logins only touch last_login, which the settings response doesn't need refreshing for
+    if kwargs.get('update_fields') == frozenset(['last_login']):
+        return
+    if instance.role == 'baker':
+        invalidate_namespace(BAKER_SETTINGS_NAMESPACE)
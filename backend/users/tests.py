@@ -1,3 +1,89 @@
-from django.test import TestCase
+from unittest import skipUnless
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from utils.testing import APIBudgetTestCase, APIClientTestCase, fake_redis, fakeredis, other_worker
+from .models import Address, User
 
-# Create your tests here.
+# Password hashing is deliberately slow and isn't what the latency budget is guarding
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserQueryBudgetTests(APIBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='customer@example.com', password='secret', name='Customer')
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+
+    def test_register(self):
+        self.assertRequestBudget(2, 'post', '/api/users/register/', {
+            'email': 'new@example.com', 'password': 'secret', 'name': 'New Customer',
+        }, status_code=201)
+
+    def test_login(self):
+        self.assertRequestBudget(2, 'post', '/api/users/login/',
+                                 {'email': 'customer@example.com', 'password': 'secret'})
+
+    def test_token_refresh(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.assertRequestBudget(2, 'post', '/api/users/token/refresh/', {'refresh': str(refresh)})
+
+    def test_logout(self):
+        self.authenticate(self.user)
+        refresh = RefreshToken.for_user(self.user)
+        self.assertRequestBudget(8, 'post', '/api/users/logout/', {'refresh': str(refresh)}, status_code=205)
+
+    def test_me(self):
+        self.authenticate(self.user)
+        self.assertRequestBudget(1, 'get', '/api/users/me/')
+
+    def test_me_update(self):
+        self.authenticate(self.user)
+        self.assertRequestBudget(2, 'patch', '/api/users/me/', {'phone': '9999999999'})
+
+    def test_address_list(self):
+        self.authenticate(self.user)
+        self.assertScalesFlat(2, '/api/users/addresses/', lambda: Address.objects.bulk_create([
+            Address(user=self.user, line1=f'{i} Baker Street', city='Kochi', state='Kerala', pincode='682001')
+            for i in range(50)
+        ]))
+
+    def test_address_create(self):
+        self.authenticate(self.user)
+        self.assertRequestBudget(3, 'post', '/api/users/addresses/', {
+            'line1': '1 Baker Street', 'city': 'Kochi', 'state': 'Kerala', 'pincode': '682001', 'is_default': True,
+        }, status_code=201)
+
+    def test_baker_settings(self):
+        self.assertRequestBudget(1, 'get', '/api/users/baker-settings/')
+
+class BakerSettingsCacheTests(APIClientTestCase):
+    """A baker's settings change reaches every worker"""
+
+    def setUp(self):
+        super().setUp()
+        self.baker = User.objects.create_user(email='baker@example.com', password='secret', name='Baker', role='baker')
+
+    def custom_build_enabled(self):
+        return self.client.get('/api/users/baker-settings/').data['is_custom_build_enabled']
+
+    def toggle_custom_build(self):
+        self.baker.is_custom_build_enabled = not self.baker.is_custom_build_enabled
+        with self.captureOnCommitCallbacks(execute=True):
+            self.baker.save()
+
+    def test_change_in_another_worker_is_seen_without_a_shared_cache(self):
+        before = self.custom_build_enabled()
+        with other_worker():
+            cache.clear()
+            self.toggle_custom_build()
+        self.assertEqual(self.custom_build_enabled(), not before)
+
+    @skipUnless(fakeredis, 'fakeredis is not installed')
+    def test_redis_cache_is_shared_and_invalidated(self):
+        with fake_redis():
+            cache.clear()
+            before = self.custom_build_enabled()
+            with self.assertNumQueries(0):
+                self.custom_build_enabled()
+            self.toggle_custom_build()
+            self.assertEqual(self.custom_build_enabled(), not before)
@@ -2,9 +2,12 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
+from utils.cache import cache_response
 from .serializers import UserSerializer
 from .models import User
 
+BAKER_SETTINGS_NAMESPACE = 'users:baker-settings'
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -61,6 +64,12 @@ class BakerSettingsView(generics.RetrieveAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
 
+    # Read on every custom-cake screen open; users.signals drops it when a baker changes.
+    # Only cached in Redis: a per-process cache would miss changes made by other workers
+    @cache_response(BAKER_SETTINGS_NAMESPACE)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_object(self):
         # Return the most recently joined baker (assuming the active user is the latest one during testing)
         return User.objects.filter(role='baker').order_by('-date_joined').first()
@@ -0,0 +1,115 @@
+import hashlib
+import uuid
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+# CACHES is Redis when REDIS_URL is set and per-process local memory otherwise
+# (see settings). Keys are grouped into namespaces, each with a version token;
+# rotating the token invalidates every key in the namespace at once, and the
+# orphaned entries simply expire.
+#
+# A per-process cache only rotates the token in the process that made the
+# change, so data other workers must see fresh either carries a version read
+# from the database in its key, or isn't cached unless is_shared_cache().
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+def is_shared_cache():
+    """Whether every worker process reads and writes the same cache"""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+def namespace_version(namespace):
+    """Current version token of a namespace, created on first use"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+def namespaced_key(namespace, *parts):
+    return ':'.join([namespace, namespace_version(namespace), *map(str, parts)])
+
+def invalidate_namespace(*namespaces):
+    """
+    Rotate the version of each namespace once the current transaction commits,
+    so readers can't cache data from before the change under the new version.
+    """
+    transaction.on_commit(lambda: cache.set_many(
+        {_version_key(namespace): uuid.uuid4().hex[:12] for namespace in namespaces}, None
+    ))
+
+def get_or_build(namespace, parts, build, timeout=DEFAULT_TIMEOUT):
+    """Cached value for `parts` in `namespace`, calling build() on a miss"""
+    key = namespaced_key(namespace, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+def get_cache_role(request):
+    user = request.user
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    return getattr(user, 'role', None) or 'user'
+
+def cache_response(namespace, timeout=DEFAULT_TIMEOUT, per_user=False, version=None):
+    """
+    Cache successful GET responses of a DRF view method (list, retrieve, get)
+    in `namespace`, keyed by the caller's role, the absolute URL and the
+    renderer. Pass per_user=True when the response depends on who is asking,
+    not just their role. invalidate_namespace(namespace) drops them all.
+
+    `version`, a callable taking the request, adds a database-backed version
+    to the key, so a write seen by any process retires the cached responses
+    of every process, shared cache or not. Without one, responses are only
+    cached when is_shared_cache().
+
+    Response headers are stored with the data, and a stored ETag is honoured
+    for If-None-Match, so cache hits don't touch the database at all.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not (version or is_shared_cache()):
+                return method(self, request, *args, **kwargs)
+
+            url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+            parts = ['response', get_cache_role(request), request.accepted_renderer.format, url]
+            if version:
+                parts.append(version(request))
+            if per_user:
+                parts.append(request.user.pk)
+            key = namespaced_key(namespace, *parts)
+
+            cached = cache.get(key)
+            if cached is None:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK and not response.exception:
+                    # Content-Type is set again when the response is rendered
+                    headers = {name: value for name, value in response.items() if name.lower() != 'content-type'}
+                    cache.set(key, (response.data, headers), timeout)
+                return response
+
+            data, headers = cached
+            etag = headers.get('ETag')
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag and (etag in if_none_match or '*' in if_none_match):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            return Response(data, headers=headers)
+        return wrapper
+    return decorator
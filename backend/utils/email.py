@@ -1,101 +1,164 @@
-from django.core.mail import send_mail
+from functools import lru_cache
 from django.conf import settings
+from django.core.mail import EmailMessage
+from django.template import Context, Engine
+from .mail import send_messages
 
-def send_order_status_email(order):
-    """
-    Sends an email to the customer when the order status changes.
-    """
-    if not order.user or not order.user.email:
-        print(f"Skipping email for Order #{order.id}: No customer email found.")
-        return
-
-    subject = f"Update on your Order #{order.id} - Ronoos BakeHub"
-    
-    # Get product names
-    items = order.items.all()
-    item_list = []
-    print(f"Preparing email for Order #{order.id}. Found {items.count()} items.")
-    
-    for item in items:
-        # Try to get name safely
-        try:
-             # Force refresh if needed or check IDs
-             product_name = "Unknown Item"
-             if item.product_variant:
-                 product_name = f"{item.product.name} ({item.product_variant.label})"
-             elif item.product:
-                 product_name = item.product.name
-             
-             item_list.append(f"{product_name} x{item.quantity}")
-        except Exception as e:
-            print(f"Error processing item {item.id} for email: {e}")
-            item_list.append(f"Item #{item.id} x{item.quantity}")
+# Plain-text bodies, compiled once per process (see get_template)
+_engine = Engine(autoescape=False)
 
-    if not item_list:
-        product_summary = "your items"
-    else:
-        product_summary = ", ".join(item_list)
-    
-    print(f"Generated product summary: {product_summary}")
-    
-    if order.status == 'confirmed':
-        message = f"""
-Dear {order.user.name},
+TEMPLATES = {
+    'status_subject': "Update on your Order #{{ order.id }} - Ronoos BakeHub",
+    'status_confirmed': """
+Dear {{ order.user.name }},
 
-Great news! Your order including {product_summary} has been ACCEPTED by the builder.
+Great news! Your order including {{ product_summary }} has been ACCEPTED by the builder.
 
 We are now preparing your delicious items.
-Total Amount: ₹{order.final_amount}
+Total Amount: ₹{{ order.final_amount }}
 
 You can track your order status in the Ronoos BakeHub app.
 
 Thank you for choosing us!
 Ronoos BakeHub Team
-        """
-    elif order.status == 'cancelled':
-        message = f"""
-Dear {order.user.name},
+        """,
+    'status_cancelled': """
+Dear {{ order.user.name }},
 
-We regret to inform you that your order for {product_summary} has been CANCELLED (Rejected).
+We regret to inform you that your order for {{ product_summary }} has been CANCELLED (Rejected).
 
 If you have already made a payment, a refund will be processed shortly.
 
 We apologize for the inconvenience.
 
 Ronoos BakeHub Team
-        """
-    elif order.status == 'out_for_delivery':
-        message = f"""
-Dear {order.user.name},
+        """,
+    'status_out_for_delivery': """
+Dear {{ order.user.name }},
 
-Your order ({product_summary}) is now OUT FOR DELIVERY! 🚚
+Your order ({{ product_summary }}) is now OUT FOR DELIVERY! 🚚
 
 Get ready for some sweetness!
 
 Ronoos BakeHub Team
-        """
-    elif order.status == 'completed':
-         message = f"""
-Dear {order.user.name},
+        """,
+    'status_completed': """
+Dear {{ order.user.name }},
 
-Your order ({product_summary}) has been DELIVERED.
+Your order ({{ product_summary }}) has been DELIVERED.
 
 We hope you enjoy your treats! Please rate your experience in the app.
 
 Ronoos BakeHub Team
-        """
-    else:
-        # For other statuses, we might not send an email or just a generic one
+        """,
+    'confirmation_subject': "Order Confirmed: Order #{{ order.id }} at Ronoos BakeHub",
+    'confirmation_customer': """
+Hi {{ customer.name }},
+
+Your order has been confirmed! 🎉
+
+Thank you for choosing Ronoos BakeHub. We have received your order and it is now being processed.
+
+Order ID: {{ order.id }}
+Current Status: {{ order.status|capfirst }}
+
+Items:
+{{ items_text }}
+
+Total Amount: ₹{{ order.final_amount }}
+
+Delivery Type: {{ order.delivery_type }}
+Delivery Date: {{ order.delivery_date }}
+Delivery Slot: {{ order.delivery_slot }}
+
+We will update you once your order moves to the next stage.
+
+Thank you for supporting us 🙏
+— Ronoos BakeHub
+""",
+    'confirmation_baker_subject': "New bakery order received",
+    'confirmation_baker': """
+New Order Alert 🚨
+
+Order ID: {{ order.id }}
+Customer Name: {{ customer.name }}
+Customer Phone: {{ customer.phone }}
+Customer Email: {{ customer.email }}
+
+Delivery Type: {{ order.delivery_type }}
+Delivery Date: {{ order.delivery_date }}
+Delivery Slot: {{ order.delivery_slot }}
+
+Items:
+{{ items_text }}
+
+Total: ₹{{ order.final_amount }}
+
+Please check the baker dashboard to manage this order.
+""",
+}
+
+# Statuses that trigger a customer email
+STATUS_EMAILS = ('confirmed', 'cancelled', 'out_for_delivery', 'completed')
+
+@lru_cache(maxsize=None)
+def get_template(name):
+    return _engine.from_string(TEMPLATES[name])
+
+def render(name, **context):
+    return get_template(name).render(Context(context))
+
+def get_product_summary(order):
+    item_list = []
+    for item in order.items.all():
+        # Try to get name safely
+        try:
+            product_name = "Unknown Item"
+            if item.product_variant:
+                product_name = f"{item.product.name} ({item.product_variant.label})"
+            elif item.product:
+                product_name = item.product.name
+
+            item_list.append(f"{product_name} x{item.quantity}")
+        except Exception as e:
+            print(f"Error processing item {item.id} for email: {e}")
+            item_list.append(f"Item #{item.id} x{item.quantity}")
+
+    if not item_list:
+        return "your items"
+    return ", ".join(item_list)
+
+def build_order_status_email(order):
+    """
+    The customer email for the order's current status,
+    or None if the status doesn't warrant one.
+    """
+    if not order.user or not order.user.email:
+        print(f"Skipping email for Order #{order.id}: No customer email found.")
+        return None
+    if order.status not in STATUS_EMAILS:
+        # For other statuses, we don't send an email
+        return None
+
+    return EmailMessage(
+        subject=render('status_subject', order=order),
+        body=render(f'status_{order.status}', order=order, product_summary=get_product_summary(order)),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[order.user.email],
+    )
+
+def send_order_status_email(order, fail_silently=True):
+    """
+    Sends an email to the customer when the order status changes.
+    With fail_silently=False, SMTP errors are raised so the caller can retry.
+    """
+    message = build_order_status_email(order)
+    if message is None:
         return
 
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.user.email],
-            fail_silently=False,
-        )
+    if send_messages([message]):
+        print(f"Failed to send email for Order #{order.id}")
+        if not fail_silently:
+            raise RuntimeError(f"Failed to send status email for Order #{order.id}")
+    else:
         print(f"Email sent to {order.user.email} for Order #{order.id} ({order.status})")
-    except Exception as e:
-        print(f"Failed to send email for Order #{order.id}: {e}")
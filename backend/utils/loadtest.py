@@ -0,0 +1,204 @@
+import math
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+import requests
+
+ORDER_STATUS_FLOW = ['pending', 'confirmed', 'in_kitchen', 'ready', 'out_for_delivery', 'completed']
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+class Recorder:
+    """Thread-safe latency and error samples, grouped by endpoint label"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, label, elapsed, ok):
+        with self.lock:
+            self.samples[label].append(elapsed)
+            if not ok:
+                self.errors[label] += 1
+
+    def summary(self, latencies, errors, duration):
+        latencies = sorted(latencies)
+        ms = lambda seconds: round(seconds * 1000, 1) if seconds is not None else None
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'error_rate': round(errors / len(latencies), 4) if latencies else 0,
+            'rps': round(len(latencies) / duration, 2) if duration else 0,
+            'mean_ms': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50_ms': ms(percentile(latencies, 50)),
+            'p95_ms': ms(percentile(latencies, 95)),
+            'p99_ms': ms(percentile(latencies, 99)),
+            'max_ms': ms(latencies[-1]) if latencies else None,
+        }
+
+    def report(self, duration):
+        with self.lock:
+            samples = {label: list(values) for label, values in self.samples.items()}
+            errors = dict(self.errors)
+        endpoints = {
+            label: self.summary(values, errors.get(label, 0), duration)
+            for label, values in sorted(samples.items())
+        }
+        everything = [value for values in samples.values() for value in values]
+        return endpoints, self.summary(everything, sum(errors.values()), duration)
+
+class FlowError(Exception):
+    """A step a flow depends on failed; the virtual user starts its next iteration"""
+
+class VirtualUser:
+    """One simulated client with its own HTTP session and JWT"""
+
+    def __init__(self, base_url, recorder, rng, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.rng = rng
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def call(self, label, method, path, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.recorder.add(label, time.perf_counter() - started, False)
+            raise FlowError(label)
+        ok = response.status_code in expect
+        self.recorder.add(label, time.perf_counter() - started, ok)
+        if not ok:
+            raise FlowError(f'{label}: HTTP {response.status_code}')
+        return response.json() if response.content else None
+
+    def login(self, email, password):
+        tokens = self.call('POST /api/users/login/', 'post', '/api/users/login/',
+                           json={'email': email, 'password': password})
+        self.session.headers['Authorization'] = f"Bearer {tokens['access']}"
+
+    def setup(self):
+        pass
+
+    def iteration(self):
+        raise NotImplementedError
+
+class CustomerUser(VirtualUser):
+    """Registers once, then logs in, browses the catalog, previews and places an order"""
+
+    def __init__(self, *args, password='loadtest', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.email = f'loadtest-{uuid.uuid4().hex[:12]}@example.com'
+        self.password = password
+
+    def setup(self):
+        self.call('POST /api/users/register/', 'post', '/api/users/register/', expect=(201,),
+                  json={'email': self.email, 'password': self.password, 'name': 'Load Test Customer'})
+
+    def iteration(self):
+        self.session.headers.pop('Authorization', None)
+        self.login(self.email, self.password)
+        self.call('GET /api/catalog/categories/', 'get', '/api/catalog/categories/')
+        page = self.call('GET /api/catalog/products/', 'get', '/api/catalog/products/?limit=20')
+        products = [product for product in page['results'] if product['variants']]
+        if not products:
+            raise FlowError('no products with variants to order')
+        product = self.rng.choice(products)
+        self.call('GET /api/catalog/products/{id}/', 'get', f"/api/catalog/products/{product['id']}/")
+
+        lines = [
+            {'product_id': product['id'], 'product_variant_id': variant['id'], 'quantity': self.rng.randint(1, 2)}
+            for product in self.rng.sample(products, min(len(products), self.rng.randint(1, 3)))
+            for variant in [self.rng.choice(product['variants'])]
+        ]
+        self.call('POST /api/orders/preview/', 'post', '/api/orders/preview/', json={'items': lines})
+        self.call('POST /api/orders/', 'post', '/api/orders/', expect=(201,), json={
+            'items': lines,
+            'delivery_type': 'pickup',
+            'delivery_date': (date.today() + timedelta(days=3)).isoformat(),
+            'delivery_slot': '10:00-11:00 AM',
+        })
+
+class BakerUser(VirtualUser):
+    """Logs in once, then works the order queue and opens the analytics dashboard"""
+
+    def __init__(self, *args, email, password, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.email = email
+        self.password = password
+
+    def setup(self):
+        self.login(self.email, self.password)
+
+    def iteration(self):
+        self.call('GET /api/orders/', 'get', '/api/orders/?limit=20')
+        status = self.rng.choice(ORDER_STATUS_FLOW[:-1])
+        queue = self.call('GET /api/orders/?status=', 'get', f'/api/orders/?status={status}&limit=20')
+        if queue['results']:
+            order = self.rng.choice(queue['results'])
+            next_status = ORDER_STATUS_FLOW[ORDER_STATUS_FLOW.index(status) + 1]
+            self.call('PATCH /api/orders/{id}/status/', 'patch', f"/api/orders/{order['id']}/status/",
+                      json={'status': next_status})
+        self.call('GET /api/orders/analytics/', 'get', '/api/orders/analytics/')
+
+def run_virtual_user(user, deadline, think_time, errors):
+    try:
+        user.setup()
+    except FlowError as exc:
+        errors.append(f'{type(user).__name__} setup: {exc}')
+        return
+    while time.monotonic() < deadline:
+        try:
+            user.iteration()
+        except FlowError as exc:
+            errors.append(str(exc))
+        if think_time:
+            time.sleep(user.rng.uniform(0, think_time * 2))
+
+def run_load_test(base_url, customers, bakers, duration, baker_email, baker_password,
+                  think_time=0.0, seed=None, timeout=30):
+    """
+    Runs `customers` + `bakers` concurrent virtual users against `base_url`
+    for `duration` seconds and returns the per-endpoint latency report.
+    """
+    recorder = Recorder()
+    rng = random.Random(seed)
+    users = [CustomerUser(base_url, recorder, random.Random(rng.random()), timeout=timeout)
+             for _ in range(customers)]
+    users += [BakerUser(base_url, recorder, random.Random(rng.random()), timeout=timeout,
+                        email=baker_email, password=baker_password)
+              for _ in range(bakers)]
+
+    errors = []
+    started = time.monotonic()
+    deadline = started + duration
+    threads = [threading.Thread(target=run_virtual_user, args=(user, deadline, think_time, errors), daemon=True)
+               for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    endpoints, total = recorder.report(elapsed)
+    return {
+        'base_url': base_url,
+        'customers': customers,
+        'bakers': bakers,
+        'duration_s': round(elapsed, 2),
+        'think_time_s': think_time,
+        'total': total,
+        'endpoints': endpoints,
+        # The first few distinct failures, to tell a broken flow from a slow one
+        'sample_errors': list(dict.fromkeys(errors))[:10],
+    }
@@ -0,0 +1,87 @@
+import logging
+import threading
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+def get_mail_connection():
+    """
+    Reusable, already-open mail connection for this worker thread.
+    Opening a TLS SMTP session costs seconds against Gmail, so it is
+    paid once and the session kept for subsequent messages.
+    """
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        connection = get_connection(fail_silently=False, timeout=settings.EMAIL_TIMEOUT)
+        _local.connection = connection
+    connection.open()
+    return connection
+
+def reset_mail_connection():
+    """Drop the cached connection, e.g. after the server hung up"""
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    _local.sent = 0
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+def send_messages(messages):
+    """
+    Send EmailMessages over the pooled connection. The SMTP session is kept
+    between calls and recycled every EMAIL_BATCH_SIZE messages. Returns the
+    messages that could not be sent after one reconnect attempt.
+    """
+    failed = []
+    for message in messages:
+        # One message per send_messages() call over the shared session,
+        # so a single bad recipient doesn't hide which others went out
+        for attempt in (1, 2):
+            try:
+                get_mail_connection().send_messages([message])
+            except Exception as exc:
+                reset_mail_connection()
+                if attempt == 2:
+                    logger.error("Failed to send email to %s: %s", ', '.join(message.to), exc)
+                    failed.append(message)
+                continue
+
+            _local.sent = getattr(_local, 'sent', 0) + 1
+            if _local.sent >= settings.EMAIL_BATCH_SIZE:
+                reset_mail_connection()
+            break
+    return failed
+
+class MailBatch:
+    """
+    Collects outgoing emails and sends them together over one SMTP session.
+    Each message may carry a `source`; send() returns the sources to retry.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.sources = []
+
+    def __len__(self):
+        return len(self.messages)
+
+    def add(self, message, source=None):
+        if message is not None:
+            self.messages.append(message)
+            self.sources.append(source)
+
+    def send(self):
+        if not self.messages:
+            return set()
+        messages, sources = self.messages, self.sources
+        self.messages, self.sources = [], []
+
+        failed = {id(message) for message in send_messages(messages)}
+        retry = {source for message, source in zip(messages, sources) if id(message) in failed}
+        retry.discard(None)
+        return retry
@@ -1,16 +1,17 @@
-from exponent_server_sdk import PushClient
-from exponent_server_sdk import PushMessage
+from .push import PushDispatcher
 import logging
 
 logger = logging.getLogger(__name__)
 
-def send_push_notification(token, title, message, data=None):
-    try:
-        response = PushClient().publish(
-            PushMessage(to=token,
-                        body=message,
-                        title=title,
-                        data=data)
-        )
-    except Exception as exc:
-        logger.error(f"Encountered some other error: {exc}")
+def send_push_notification(token, title, message, data=None, fail_silently=True):
+    """
+    Send a single push right away. Fan-outs should use utils.push.PushDispatcher
+    (as the outbox worker does) so they go out in chunks.
+    """
+    dispatcher = PushDispatcher()
+    dispatcher.add(token, title, message, data=data, source=token)
+    failed = dispatcher.send()
+    if failed:
+        logger.error(f"Push notification to {token} failed")
+        if not fail_silently:
+            raise RuntimeError(f"Push notification to {token} failed")
@@ -0,0 +1,143 @@
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Profile of the request being handled, if it was sampled
+_current = ContextVar('request_profile', default=None)
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def record_query(self, sql, params, duration):
+        self.queries.append((sql, repr(params)))
+        self.db_time += duration
+
+    def duplicates(self):
+        """
+        Statements run more than once, most repeated first. The SQL text has
+        placeholders for parameters, so the same query for different rows
+        (the N+1 pattern) counts as a repeat too.
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+    def exact_duplicates(self):
+        """Identical statements with identical parameters: pure waste"""
+        return sum(count - 1 for count in Counter(self.queries).values() if count > 1)
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, params, time.perf_counter() - start)
+
+_serializers_patched = False
+
+def _patch_serializers():
+    """
+    Time BaseSerializer.data, which every Serializer and ListSerializer
+    goes through. Only the outermost call is counted, and queries run
+    lazily while serializing are included.
+    """
+    global _serializers_patched
+    if _serializers_patched:
+        return
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+
+    def timed_data(serializer):
+        profile = _current.get()
+        if profile is None:
+            return data.fget(serializer)
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serializer_depth -= 1
+            if not profile.serializer_depth:
+                profile.serializer_time += time.perf_counter() - start
+
+    BaseSerializer.data = property(timed_data)
+    _serializers_patched = True
+
+class QueryProfilingMiddleware:
+    """
+    Opt-in per-request SQL profiling, enabled with SQL_PROFILING_ENABLED.
+
+    For a SQL_PROFILING_SAMPLE_RATE fraction of requests it records the query
+    count, DB time, serializer time and repeated queries. These are returned
+    in a Server-Timing header (visible in browser dev tools) and logged as one
+    JSON line per request. Requests with repeated queries or more than
+    SQL_PROFILING_QUERY_WARNING queries are logged at WARNING.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SQL_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _patch_serializers()
+
+    def __call__(self, request):
+        if random.random() >= settings.SQL_PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Wrappers sit on the connection handles, so this also covers
+                # connections that are only opened later in the request
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_time = time.perf_counter() - start
+
+        duplicates = profile.duplicates()
+        timings = [
+            f'db;dur={profile.db_time * 1000:.1f};desc="{len(profile.queries)} queries"',
+            f'serializer;dur={profile.serializer_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ]
+        if duplicates:
+            timings.append(f'dup;desc="{sum(count - 1 for _, count in duplicates)} repeated queries"')
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join([existing, *timings] if existing else timings)
+
+        record = {
+            'event': 'request_profile',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': len(profile.queries),
+            'db_ms': round(profile.db_time * 1000, 2),
+            'serializer_ms': round(profile.serializer_time * 1000, 2),
+            'total_ms': round(total_time * 1000, 2),
+            'exact_duplicates': profile.exact_duplicates(),
+            'repeated': [{'sql': sql[:300], 'count': count} for sql, count in duplicates[:5]],
+        }
+        noisy = duplicates or len(profile.queries) > settings.SQL_PROFILING_QUERY_WARNING
+        logger.log(logging.WARNING if noisy else logging.INFO, json.dumps(record))
+        return response
+
@@ -0,0 +1,152 @@
+from collections import defaultdict
+from datetime import timedelta
+import logging
+import requests
+from django.conf import settings
+from django.utils import timezone
+from exponent_server_sdk import PushClient, PushMessage, PushTicket as ExpoTicket, PushReceipt as ExpoReceipt
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+def get_push_client():
+    """
+    Process-wide Expo client sharing one pooled HTTP session.
+    EXPO_PUSH_HOST can point it at a local stub server.
+    """
+    global _client
+    if _client is None:
+        session = requests.Session()
+        session.headers.update({
+            'accept': 'application/json',
+            'accept-encoding': 'gzip, deflate',
+            'content-type': 'application/json',
+        })
+        if settings.EXPO_ACCESS_TOKEN:
+            session.headers['Authorization'] = f'Bearer {settings.EXPO_ACCESS_TOKEN}'
+        # A hung Expo call must not hold up the outbox worker
+        _client = PushClient(host=settings.EXPO_PUSH_HOST, session=session, timeout=settings.EXPO_PUSH_TIMEOUT,
+                             max_message_count=settings.EXPO_PUSH_CHUNK_SIZE)
+    return _client
+
+def prune_tokens(tokens):
+    """Forget push tokens Expo reports as DeviceNotRegistered"""
+    from users.models import User
+
+    tokens = set(tokens)
+    if tokens:
+        pruned = User.objects.filter(expo_push_token__in=tokens).update(expo_push_token=None)
+        logger.info("Pruned %s unregistered push tokens", pruned)
+
+class PushDispatcher:
+    """
+    Collects push messages and sends them with publish_multiple in Expo-sized
+    chunks, so fanning out to N devices costs N / chunk size HTTP calls.
+
+    Each message may carry a `source` (e.g. an outbox message id); send()
+    returns the sources whose pushes should be retried, and leaves in
+    `delivered` the tokens of each source that must not be pushed again
+    (accepted by Expo, or rejected for good), so a retry only covers the rest.
+    """
+
+    def __init__(self, client=None):
+        self.client = client
+        self.messages = []
+        self.sources = []
+        self.delivered = defaultdict(list)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def add(self, token, title, message, data=None, source=None):
+        if not token or not PushClient.is_exponent_push_token(token):
+            logger.warning("Skipping invalid push token %r", token)
+            return
+        self.messages.append(PushMessage(to=token, title=title, body=message, data=data))
+        self.sources.append(source)
+
+    def send(self):
+        if not self.messages:
+            return set()
+
+        messages, sources = self.messages, self.sources
+        self.messages, self.sources = [], []
+        client = self.client or get_push_client()
+
+        from users.models import PushTicket
+
+        retry, unregistered, pending = set(), [], []
+        size = client.max_message_count
+        # One request per chunk, so a failed request only retries its own chunk
+        for start in range(0, len(messages), size):
+            chunk, chunk_sources = messages[start:start + size], sources[start:start + size]
+            try:
+                tickets = client.publish_multiple(chunk)
+            except Exception as exc:
+                logger.error("Push delivery failed for %s messages: %s", len(chunk), exc)
+                retry.update(chunk_sources)
+                continue
+
+            for ticket, source in zip(tickets, chunk_sources):
+                token = ticket.push_message.to
+                error = None if ticket.is_success() else (ticket.details or {}).get('error')
+                if ticket.is_success():
+                    if ticket.id:
+                        pending.append(PushTicket(ticket_id=ticket.id, token=token))
+                elif error == ExpoTicket.ERROR_DEVICE_NOT_REGISTERED:
+                    unregistered.append(token)
+                elif error == ExpoTicket.ERROR_MESSAGE_TOO_BIG:
+                    logger.error("Push message too big for %s: %s", token, ticket.message)
+                else:
+                    logger.warning("Push ticket error for %s: %s", token, ticket.message)
+                    retry.add(source)
+                    continue
+                self.delivered[source].append(token)
+
+        PushTicket.objects.bulk_create(pending, ignore_conflicts=True)
+        prune_tokens(unregistered)
+        retry.discard(None)
+        return retry
+
+def poll_push_receipts(batch_size=1000):
+    """
+    Check receipts for tickets older than EXPO_RECEIPT_DELAY and prune tokens
+    whose devices are no longer registered. Run periodically by the outbox worker.
+    Returns the number of tickets checked.
+    """
+    from users.models import PushTicket
+
+    now = timezone.now()
+    # Expo discards receipts after a day; there is nothing left to check
+    PushTicket.objects.filter(created_at__lt=now - timedelta(days=1)).delete()
+
+    due = list(PushTicket.objects
+               .filter(created_at__lte=now - timedelta(seconds=settings.EXPO_RECEIPT_DELAY))
+               .order_by('created_at')[:batch_size])
+    if not due:
+        return 0
+
+    tokens = {ticket.ticket_id: ticket.token for ticket in due}
+    tickets = [ExpoTicket(push_message=None, status=ExpoTicket.SUCCESS_STATUS, message='', details=None, id=ticket_id)
+               for ticket_id in tokens]
+    try:
+        receipts = get_push_client().check_receipts_multiple(tickets)
+    except Exception as exc:
+        logger.error("Push receipt check failed: %s", exc)
+        return 0
+
+    unregistered = []
+    for receipt in receipts:
+        if receipt.is_success():
+            continue
+        error = (receipt.details or {}).get('error')
+        if error == ExpoReceipt.ERROR_DEVICE_NOT_REGISTERED:
+            unregistered.append(tokens.get(receipt.id))
+        else:
+            logger.warning("Push receipt %s error: %s %s", receipt.id, error, receipt.message)
+
+    prune_tokens(token for token in unregistered if token)
+    # Receipts that aren't ready yet are simply absent from the response; keep those tickets
+    PushTicket.objects.filter(ticket_id__in=[receipt.id for receipt in receipts]).delete()
+    return len(receipts)
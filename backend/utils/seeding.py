@@ -0,0 +1,267 @@
+import itertools
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Every seeded account (customers and the baker) logs in with this password
+BENCHMARK_PASSWORD = 'benchmark'
+
+CATEGORIES = ['Cakes', 'Pastries', 'Cupcakes', 'Cookies', 'Brownies', 'Cheesecakes', 'Breads', 'Desserts']
+FLAVOURS = ['Chocolate', 'Vanilla', 'Red Velvet', 'Butterscotch', 'Black Forest', 'Pineapple', 'Strawberry',
+            'Blueberry', 'Mango', 'Coffee', 'Caramel', 'Lemon', 'Pistachio', 'Hazelnut', 'Coconut', 'Oreo']
+STYLES = ['Classic', 'Truffle', 'Fudge', 'Delight', 'Dream', 'Crunch', 'Swirl', 'Bliss', 'Royale', 'Supreme']
+VARIANTS = [('500g', Decimal('1.0')), ('1 kg', Decimal('1.9')), ('2 kg', Decimal('3.6'))]
+PLACES = ['Kochi', 'Thrissur', 'Kozhikode', 'Kannur', 'Kottayam', 'Alappuzha', 'Palakkad', 'Kollam']
+SLOTS = ['10:00-11:00 AM', '12:00-01:00 PM', '03:00-04:00 PM', '06:00-07:00 PM']
+
+def zipf_weights(count, exponent=0.9):
+    """Cumulative weights where the first items are picked far more often, like real customers and products"""
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+def delete_rows(model, pks, batch_size):
+    """DELETE rows by primary key in batches, without loading them or sending signals"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start:start + batch_size]
+            cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({", ".join(["%s"] * len(batch))})', batch)
+
+class BenchmarkSeeder:
+    """
+    Generates a realistic, reproducible dataset with bulk_create:
+    customers with addresses, one baker, a catalog with variants and images,
+    coupons, and an order history spread over `days` days up to `end_date`.
+    The same seed and end date always produce the same data.
+
+    Rows are tagged with `bench<seed>` (emails, category slugs, coupon codes)
+    so a run can be cleared without touching anything else.
+    """
+
+    def __init__(self, seed=42, end_date=None, days=365, batch_size=2000, log=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.end_date = end_date or timezone.localdate()
+        self.days = days
+        self.batch_size = batch_size
+        self.tag = f'bench{seed}'
+        self.log = log or (lambda message: None)
+
+    def exists(self):
+        from users.models import User
+        return User.objects.filter(email__startswith=f'{self.tag}-').exists()
+
+    def clear(self):
+        from catalog.models import Category
+        from coupons.models import Coupon, CouponUsage
+        from inventory.models import StockMovement
+        from orders.models import Order, OrderItem, OutboxMessage
+        from orders.rollups import rebuild_rollups
+        from users.models import User
+
+        users = User.objects.filter(email__startswith=f'{self.tag}-')
+        orders = Order.objects.filter(user__in=users)
+        with transaction.atomic():
+            # Deleting orders one by one through the rollup signals takes minutes at this size,
+            # so remove the rows directly and rebuild the rollups once afterwards
+            for model in (CouponUsage, OrderItem, OutboxMessage):
+                model.objects.filter(order__in=orders).delete()
+            StockMovement.objects.filter(order__in=orders).update(order=None)
+            delete_rows(Order, list(orders.values_list('pk', flat=True)), self.batch_size)
+            users.delete()
+            Category.objects.filter(slug__startswith=f'{self.tag}-').delete()
+            # The dash keeps seed 42 from matching seed 420's codes
+            Coupon.objects.filter(code__startswith=f'{self.tag.upper()}-').delete()
+            rebuild_rollups()
+
+    def run(self, customers, orders, products, coupons=10):
+        from orders.rollups import rebuild_rollups
+
+        with transaction.atomic():
+            users, addresses = self.seed_customers(customers)
+            variants = self.seed_catalog(products)
+            coupon_rows = self.seed_coupons(coupons)
+            order_count, item_count = self.seed_orders(orders, users, addresses, variants, coupon_rows)
+            self.log('Rebuilding sales rollups...')
+            rebuild_rollups()
+        return {
+            'customers': len(users),
+            'products': products,
+            'variants': len(variants),
+            'coupons': len(coupon_rows),
+            'orders': order_count,
+            'items': item_count,
+        }
+
+    def seed_customers(self, count):
+        from users.models import Address, User
+
+        self.log(f'Creating {count} customers and a baker...')
+        rng = self.rng
+        password = make_password(BENCHMARK_PASSWORD)
+        User.objects.create(email=f'{self.tag}-baker@example.com', name='Benchmark Baker',
+                            role='baker', password=password)
+        users = User.objects.bulk_create([
+            User(email=f'{self.tag}-customer{i}@example.com', name=f'Customer {i}', password=password,
+                 phone=f'9{rng.randrange(10 ** 9):09d}', place=rng.choice(PLACES))
+            for i in range(count)
+        ], batch_size=self.batch_size)
+
+        addresses = Address.objects.bulk_create([
+            Address(user=user, line1=f'{rng.randint(1, 400)} {rng.choice(STYLES)} Street',
+                    city=user.place, state='Kerala', pincode=f'68{rng.randrange(10000):04d}', is_default=n == 0)
+            for user in users for n in range(rng.choice((1, 1, 2)))
+        ], batch_size=self.batch_size)
+        by_user = {}
+        for address in addresses:
+            by_user.setdefault(address.user_id, address.pk)
+        return users, by_user
+
+    def seed_catalog(self, count):
+        from catalog.models import Category, Product, ProductImage, ProductVariant
+
+        self.log(f'Creating {count} products...')
+        rng = self.rng
+        categories = Category.objects.bulk_create([
+            Category(name=name, slug=f'{self.tag}-{name.lower()}') for name in CATEGORIES
+        ])
+        products = []
+        for i in range(count):
+            name = f'{rng.choice(FLAVOURS)} {rng.choice(STYLES)}'
+            # Denormalised list fields are normally kept in sync by signals, which bulk_create skips
+            base = Decimal(rng.randrange(80, 900, 10))
+            products.append(Product(
+                category=rng.choice(categories), name=f'{name} #{i}', description=f'{name}, freshly baked.',
+                is_customizable=rng.random() < 0.2, min_price=base,
+            ))
+        products = Product.objects.bulk_create(products, batch_size=self.batch_size)
+
+        variants = []
+        images = []
+        for product in products:
+            for label, factor in VARIANTS[:rng.randint(1, len(VARIANTS))]:
+                price = (product.min_price * factor).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+                variants.append(ProductVariant(product=product, label=label, price=price,
+                                               preparation_hours=rng.choice((0, 4, 24)),
+                                               is_eggless=rng.random() < 0.3))
+            for n in range(rng.randint(1, 3)):
+                images.append(ProductImage(product=product, is_primary=n == 0,
+                                           image_url=f'https://picsum.photos/seed/{self.tag}-{product.pk}-{n}/600/400'))
+        variants = ProductVariant.objects.bulk_create(variants, batch_size=self.batch_size)
+        ProductImage.objects.bulk_create(images, batch_size=self.batch_size)
+        for product in products:
+            product.primary_image_url = f'https://picsum.photos/seed/{self.tag}-{product.pk}-0/600/400'
+        Product.objects.bulk_update(products, ['primary_image_url'], batch_size=self.batch_size)
+        return variants
+
+    def seed_coupons(self, count):
+        from coupons.models import Coupon
+
+        rng = self.rng
+        start = self.end_date - timedelta(days=self.days)
+        coupons = []
+        for i in range(count):
+            valid_from = start + timedelta(days=rng.randrange(max(self.days, 1)))
+            percentage = rng.random() < 0.6
+            coupons.append(Coupon(
+                code=f'{self.tag.upper()}-{i}', discount_type='percentage' if percentage else 'fixed',
+                discount_value=Decimal(rng.choice((5, 10, 15, 20))) if percentage else Decimal(rng.choice((50, 100, 150))),
+                min_order_amount=Decimal(rng.choice((0, 300, 500))),
+                start_date=valid_from, end_date=valid_from + timedelta(days=rng.choice((14, 30, 90))),
+                max_uses=rng.choice((None, 500, 2000)), max_uses_per_user=rng.choice((1, 2, 5)),
+            ))
+        return Coupon.objects.bulk_create(coupons)
+
+    def order_status(self, age_days):
+        rng = self.rng
+        if age_days > 3:
+            status = 'cancelled' if rng.random() < 0.08 else 'completed'
+        else:
+            status = rng.choice(('pending', 'confirmed', 'in_kitchen', 'ready', 'out_for_delivery', 'completed'))
+
+        if status == 'completed':
+            payment = 'paid'
+        elif status == 'cancelled':
+            payment = rng.choice(('refunded', 'refunded', 'failed', 'pending'))
+        else:
+            payment = 'paid' if rng.random() < 0.6 else 'pending'
+        return status, payment
+
+    def seed_orders(self, count, users, addresses, variants, coupons):
+        from coupons.models import CouponUsage
+        from orders.models import Order, OrderItem
+        from orders.pricing import delivery_fee
+
+        self.log(f'Creating {count} orders...')
+        rng = self.rng
+        # Business grows over time: later days get more orders
+        offsets = sorted(int(self.days * rng.random() ** 0.7) for _ in range(count))
+        user_weights = zipf_weights(len(users))
+        variant_weights = zipf_weights(len(variants))
+        created = items_created = 0
+
+        for start in range(0, count, self.batch_size):
+            orders, placed_at, lines, usages = [], [], [], []
+            for offset in offsets[start:start + self.batch_size]:
+                day = self.end_date - timedelta(days=self.days - offset)
+                placed = timezone.make_aware(datetime.combine(day, time(rng.randint(8, 21), rng.randrange(60))))
+                user = rng.choices(users, cum_weights=user_weights)[0]
+                status, payment = self.order_status((self.end_date - day).days)
+                delivery = rng.random() < 0.5
+
+                picked = rng.choices(variants, cum_weights=variant_weights, k=rng.choice((1, 1, 2, 2, 3, 4)))
+                order_lines = []
+                for variant in dict.fromkeys(picked):
+                    quantity = rng.choice((1, 1, 1, 2, 3))
+                    order_lines.append(OrderItem(product_id=variant.product_id, product_variant=variant,
+                                                 quantity=quantity, unit_price=variant.price,
+                                                 subtotal=variant.price * quantity))
+                total = sum(line.subtotal for line in order_lines)
+
+                coupon, discount = None, Decimal('0.00')
+                if rng.random() < 0.15:
+                    usable = [c for c in coupons
+                              if c.start_date <= day <= c.end_date and total >= c.min_order_amount]
+                    if usable:
+                        coupon = rng.choice(usable)
+                        if coupon.discount_type == 'percentage':
+                            discount = (total * coupon.discount_value / 100).quantize(Decimal('0.01'))
+                        else:
+                            discount = min(coupon.discount_value, total)
+
+                order = Order(
+                    user=user, status=status, payment_status=payment,
+                    total_amount=total, discount_amount=discount,
+                    final_amount=total - discount + delivery_fee('delivery' if delivery else 'pickup'),
+                    delivery_type='delivery' if delivery else 'pickup',
+                    delivery_address_id=addresses.get(user.pk) if delivery else None,
+                    delivery_date=day + timedelta(days=rng.randint(0, 3)), delivery_slot=rng.choice(SLOTS),
+                    payment_reference=f'pay_{rng.getrandbits(48):012x}' if payment == 'paid' else '',
+                )
+                orders.append(order)
+                placed_at.append(placed)
+                lines.append(order_lines)
+                usages.append(coupon)
+
+            Order.objects.bulk_create(orders)
+            # bulk_create stamps created_at with now(); backdate in a follow-up UPDATE
+            for order, placed in zip(orders, placed_at):
+                order.created_at = placed
+            Order.objects.bulk_update(orders, ['created_at'], batch_size=self.batch_size)
+            items = []
+            for order, order_lines in zip(orders, lines):
+                for line in order_lines:
+                    line.order = order
+                    items.append(line)
+            OrderItem.objects.bulk_create(items, batch_size=self.batch_size)
+            CouponUsage.objects.bulk_create([
+                CouponUsage(coupon=coupon, user_id=order.user_id, order=order)
+                for order, coupon in zip(orders, usages) if coupon
+            ])
+            created += len(orders)
+            items_created += len(items)
+            self.log(f'  {created}/{count} orders')
+        return created, items_created
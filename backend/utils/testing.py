@@ -0,0 +1,143 @@
+import time
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+try:
+    import fakeredis
+except ImportError:  # only needed for the shared-cache tests
+    fakeredis = None
+
+# Generous enough for a slow CI runner; a regression that matters (a query
+# per row over a few hundred rows) blows well past it
+LATENCY_BUDGET_MS = 500
+
+def other_worker():
+    """
+    override_settings() for code run as if by another gunicorn worker
+    without REDIS_URL: same database, its own local-memory cache
+    """
+    return override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'other-worker',
+        'KEY_PREFIX': 'ronoos',
+    }})
+
+def fake_redis():
+    """override_settings() for the Redis backend, served in-process by fakeredis"""
+    return override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/0',
+        'KEY_PREFIX': 'ronoos',
+        'OPTIONS': {'connection_class': fakeredis.FakeConnection},
+    }})
+
+def seed_catalog(products, variants_per_product=2, images_per_product=2):
+    """Active products with variants and external images, bulk created"""
+    from catalog.models import Category, Product, ProductImage, ProductVariant
+
+    start = Product.objects.count()
+    category = Category.objects.get_or_create(slug='budget', defaults={'name': 'Budget'})[0]
+    created = Product.objects.bulk_create([
+        Product(category=category, name=f'Product {start + i}', min_price=Decimal(100),
+                primary_image_url=f'https://img.example.com/{start + i}-0.jpg')
+        for i in range(products)
+    ])
+    ProductVariant.objects.bulk_create([
+        ProductVariant(product=product, label=f'{v + 1} kg', price=Decimal(100 * (v + 1)))
+        for product in created for v in range(variants_per_product)
+    ])
+    ProductImage.objects.bulk_create([
+        ProductImage(product=product, image_url=f'https://img.example.com/{product.pk}-{i}.jpg', is_primary=i == 0)
+        for product in created for i in range(images_per_product)
+    ])
+    return created
+
+def seed_custom_cake_options(count=3):
+    from catalog.models import CakeBase, CakeFlavour, CakeShape, CakeWeight
+
+    for model, field in ((CakeBase, 'name'), (CakeFlavour, 'name'), (CakeShape, 'name'), (CakeWeight, 'label')):
+        model.objects.bulk_create([model(**{field: f'{model.__name__} {i}'}, price=Decimal(50)) for i in range(count)])
+
+def seed_orders(user, count, items_per_order=2, payment_status='paid'):
+    """Orders with items for `user`, plus the sales rollups that analytics reads"""
+    from catalog.models import ProductVariant
+    from orders.models import Order, OrderItem
+    from orders.rollups import rebuild_rollups
+
+    variants = list(ProductVariant.objects.select_related('product')[:items_per_order])
+    if len(variants) < items_per_order:
+        seed_catalog(items_per_order)
+        variants = list(ProductVariant.objects.select_related('product')[:items_per_order])
+
+    total = sum(variant.price for variant in variants)
+    orders = Order.objects.bulk_create([
+        Order(user=user, delivery_type='pickup', delivery_date=date.today(), delivery_slot='10:00-11:00 AM',
+              payment_status=payment_status, total_amount=total, final_amount=total)
+        for _ in range(count)
+    ])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=variant.product, product_variant=variant,
+                  quantity=1, unit_price=variant.price, subtotal=variant.price)
+        for order in orders for variant in variants
+    ])
+    rebuild_rollups()
+    return orders
+
+class APIClientTestCase(APITestCase):
+    """API tests starting from an empty cache, authenticating with real JWTs"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def authenticate(self, user):
+        """Authenticate with a real JWT, so the user lookup counts too"""
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+class APIBudgetTestCase(APIClientTestCase):
+    """
+    Asserts a maximum query count and a latency budget per request, and that
+    the query count doesn't grow with the amount of data behind an endpoint.
+    Caches are cleared before every measured request so the database path
+    is what gets measured.
+    """
+    latency_budget_ms = LATENCY_BUDGET_MS
+
+    def assertRequestBudget(self, max_queries, method, url, data=None, status_code=200, **extra):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(self.client, method)(url, data, format='json', **extra)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.assertEqual(response.status_code, status_code,
+                         f'{method.upper()} {url}: {getattr(response, "data", response.content)}')
+        self.assertLessEqual(
+            len(queries), max_queries,
+            f'{method.upper()} {url} ran {len(queries)} queries (budget {max_queries}):\n'
+            + '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+        self.assertLess(elapsed_ms, self.latency_budget_ms,
+                        f'{method.upper()} {url} took {elapsed_ms:.0f}ms (budget {self.latency_budget_ms}ms)')
+        response.query_count = len(queries)
+        return response
+
+    def assertScalesFlat(self, max_queries, url, grow, method='get', data=None, status_code=200):
+        """
+        Run the request, call grow() to add more rows behind it, run it again:
+        both must fit the budget and run the same number of queries.
+        """
+        small = self.assertRequestBudget(max_queries, method, url, data, status_code)
+        grow()
+        large = self.assertRequestBudget(max_queries, method, url, data, status_code)
+        self.assertEqual(small.query_count, large.query_count,
+                         f'{method.upper()} {url} went from {small.query_count} to {large.query_count} '
+                         f'queries as data grew')
+        return large
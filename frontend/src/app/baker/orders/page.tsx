@@ -73,7 +73,7 @@ export default function BakerOrdersPage() {
             new Date(order.created_at).toLocaleDateString(),
             order.user?.name || 'N/A',
             order.user?.phone || 'N/A',
-            order.items?.map((i: any) => i.product_name).join(', ') || '',
+            order.product_names?.join(', ') || '',
             `Rs. ${order.final_amount}`
         ]);
 
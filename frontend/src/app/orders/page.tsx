@@ -73,7 +73,7 @@ export default function OrdersPage() {
 
                                 <div className="flex justify-between items-center">
                                     <div className="text-sm text-gray-600">
-                                        {order.items?.length || 0} item(s) • {order.delivery_type}
+                                        {order.item_count ?? order.items?.length ?? 0} item(s) • {order.delivery_type}
                                     </div>
                                     <div className="text-lg font-bold text-orange-600">
                                         ₹{order.final_amount}
@@ -25,6 +25,8 @@ export default function CartScreen() {
     const [addresses, setAddresses] = useState<Address[]>([]);
     const [selectedAddress, setSelectedAddress] = useState<Address | null>(null);
     const [deliveryType, setDeliveryType] = useState<'pickup' | 'delivery'>('delivery');
+    // Charged by the server on delivery orders (orders.pricing.DELIVERY_FEE)
+    const deliveryFee = deliveryType === 'delivery' ? 50 : 0;
     const [deliveryDate, setDeliveryDate] = useState(new Date());
     const [showDatePicker, setShowDatePicker] = useState(false);
     const [deliverySlot, setDeliverySlot] = useState('');
@@ -99,7 +101,7 @@ export default function CartScreen() {
                 delivery_slot: deliverySlot,
                 total_amount: total,
                 discount_amount: 0,
-                final_amount: total,
+                final_amount: total + deliveryFee,
                 payment_status: 'pending'
             };
 
@@ -301,9 +303,15 @@ export default function CartScreen() {
                     )
                 )}
 
+                {deliveryFee > 0 && (
+                    <View className="flex-row justify-between mb-2">
+                        <Text className="text-gray-600">Delivery Fee:</Text>
+                        <Text className="text-gray-800 font-semibold">₹{deliveryFee.toFixed(2)}</Text>
+                    </View>
+                )}
                 <View className="flex-row justify-between mb-4">
                     <Text className="text-lg font-bold text-gray-600">Total:</Text>
-                    <Text className="text-2xl font-bold text-blue-600">₹{getTotal().toFixed(2)}</Text>
+                    <Text className="text-2xl font-bold text-blue-600">₹{(getTotal() + deliveryFee).toFixed(2)}</Text>
                 </View>
 
                 <TouchableOpacity
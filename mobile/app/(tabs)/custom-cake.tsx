@@ -41,47 +41,32 @@ export default function CustomCakeScreen() {
     const [isCustomCakeEnabled, setIsCustomCakeEnabled] = useState(false); // Default to false for safety
 
     useEffect(() => {
-        const fetchInitialData = async () => {
+        // Options and the baker's custom-build flag come in one cached response
+        const fetchBundle = async () => {
             try {
-                // Fetch options
-                const [baseRes, flavourRes, shapeRes, weightRes] = await Promise.all([
-                    api.get('/catalog/cake-bases/'),
-                    api.get('/catalog/cake-flavours/'),
-                    api.get('/catalog/cake-shapes/'),
-                    api.get('/catalog/cake-weights/'),
-                ]);
-
+                const bundleRes = await api.get('/catalog/custom-cake/bundle/');
+                const bundle = bundleRes.data;
                 setOptions({
-                    base: baseRes.data,
-                    flavour: flavourRes.data,
-                    shape: shapeRes.data,
-                    weight: weightRes.data,
+                    base: bundle.base,
+                    flavour: bundle.flavour,
+                    shape: bundle.shape,
+                    weight: bundle.weight,
                 });
-
-                setIsLoading(false);
-            } catch (error) {
-                console.error('Error loading options:', error);
-                setIsLoading(false);
-            }
-        };
-
-        const checkSettings = async () => {
-            try {
-                const settingsRes = await api.get('/users/baker-settings/');
-                if (settingsRes.data && settingsRes.data.is_custom_build_enabled !== undefined) {
-                    setIsCustomCakeEnabled(settingsRes.data.is_custom_build_enabled);
+                if (bundle.is_custom_build_enabled !== undefined) {
+                    setIsCustomCakeEnabled(bundle.is_custom_build_enabled);
                 }
             } catch (error) {
-                console.error('Error checking settings:', error);
+                console.error('Error loading custom cake options:', error);
+            } finally {
+                setIsLoading(false);
             }
         };
 
         // Initial load
-        fetchInitialData();
-        checkSettings();
+        fetchBundle();
 
-        // Poll settings every 3 seconds
-        const interval = setInterval(checkSettings, 3000);
+        // Poll every 3 seconds so the screen follows the baker's setting
+        const interval = setInterval(fetchBundle, 3000);
 
         return () => clearInterval(interval);
     }, []);
@@ -73,7 +73,9 @@ export default function BakerOrdersList() {
 
         setGeneratingReport(true);
         try {
-            const completedOrders = orders.filter(o => o.status === 'completed');
+            // List responses are summaries; the report needs items and customer details
+            const response = await api.get('/orders/', { params: { status: 'completed', view: 'full' } });
+            const completedOrders = response.data;
             if (completedOrders.length === 0) {
                 Alert.alert('No Completed Orders', 'There are no completed orders to include in the report.');
                 return;